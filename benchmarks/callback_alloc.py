@@ -0,0 +1,224 @@
+"""音频回调路径内存分配基准
+
+用法（在项目根目录运行）:
+    python -m benchmarks.callback_alloc
+
+直接驱动真实的 PlaybackEngine._audio_callback：引擎照常打开空输出流，随后停掉输出流的回调线程，
+由基准逐块调用回调，用 tracemalloc 统计每块的瞬时分配峰值。覆盖普通播放、紧凑存储、无缝接续、
+交叉淡化、播放中跳转、均衡器（每 8 块切换一次预设）和可视化分流几种状态。
+只要某一块的峰值达到一个音频块的大小，就说明回调里分配了新的采样数组；任何一种状态的峰值超过
+PEAK_LIMIT 时以非零状态退出。旧回调路径（先相乘生成新数组，再拷贝到 outdata）作为对照。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+from typing import Callable, Optional
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from music_player.models.audio_output import NullBackend, StreamTime
+from music_player.models.playback_engine import PlaybackEngine
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+BLOCKSIZE = 2048  # balanced 档位的块大小
+BLOCKS = 128
+LONG_SECONDS = 10
+SHORT_SECONDS = 3  # 无缝接续和交叉淡化的第一首，在统计期间结束
+CROSSFADE_SECONDS = 1.0
+PEAK_LIMIT = 4096  # 每块瞬时分配峰值的上限（字节），远小于一个块（16 KB）
+EQ_PRESETS = ([6.0, 3.0, 0.0, -2.0, 4.0], [-4.0, 0.0, 5.0, 2.0, -3.0])
+
+
+def _make_test_file(directory: str, name: str, seconds: int, seed: int) -> str:
+    """生成测试用的 WAV 文件"""
+    path = os.path.join(directory, name)
+    noise = np.random.default_rng(seed).uniform(-0.5, 0.5, (SAMPLE_RATE * seconds, CHANNELS))
+    sf.write(path, noise.astype(np.float32), SAMPLE_RATE)
+    return path
+
+
+def _wait(seconds: float) -> None:
+    """运行事件循环一段时间：送达引擎排队的事件，也让解码线程补满缓冲区
+    
+    不循环调用 processEvents()：PySide6 6.12 的 processEvents() 每次调用都少计一次 None 的引用。
+    """
+    loop = QEventLoop()
+    QTimer.singleShot(max(1, round(seconds * 1000)), loop.quit)
+    loop.exec()
+
+
+def _start_engine(file_path: str, compact: bool = True, crossfade: float = 0.0) -> PlaybackEngine:
+    """打开输出流开始播放，然后停掉输出流的回调线程，回调改由基准调用"""
+    engine = PlaybackEngine(NullBackend())
+    engine.set_output_samplerate(SAMPLE_RATE)
+    engine.set_latency_profile("balanced")
+    engine.set_compact_samples(compact)
+    engine.set_crossfade(crossfade)
+    engine.load_track(file_path)
+    engine.play()
+    engine._stream.stop()
+    _wait(0.2)  # 等缓冲区填满
+    return engine
+
+
+def _measure(engine: PlaybackEngine, before_block: Optional[Callable[[int], None]] = None) -> dict:
+    """逐块调用引擎的音频回调并统计分配峰值
+    
+    Args:
+        engine: 已开始播放的引擎
+        before_block: 每块之前在界面线程执行的操作（不计入统计），参数为块序号
+    """
+    outdata = np.zeros((BLOCKSIZE, CHANNELS), dtype=np.float32)
+    block_bytes = outdata.nbytes
+    time_info = StreamTime()
+    
+    # 预热（首次调用可能有缓存初始化）
+    engine._audio_callback(outdata, BLOCKSIZE, time_info, None)
+    
+    peaks = []
+    tracemalloc.start()
+    for index in range(BLOCKS):
+        if before_block is not None:
+            before_block(index)
+        _wait(0.005)
+        time_info.currentTime = index * BLOCKSIZE / SAMPLE_RATE
+        time_info.outputBufferDacTime = time_info.currentTime + 0.01
+        
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        engine._audio_callback(outdata, BLOCKSIZE, time_info, None)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    
+    engine.shutdown()
+    _wait(0.05)
+    return {
+        "blocks": BLOCKS,
+        "max_transient_bytes": max(peaks),
+        "array_allocations": sum(1 for peak in peaks if peak >= block_bytes),
+    }
+
+
+def bench_steady(files: dict) -> dict:
+    """普通播放：缓冲区中的 float32 采样乘以音量写入 outdata"""
+    return _measure(_start_engine(files["long"], compact=False))
+
+
+def bench_compact(files: dict) -> dict:
+    """紧凑存储：int16 缓冲区逐块转换为 float32"""
+    return _measure(_start_engine(files["long"]))
+
+
+def bench_gapless(files: dict) -> dict:
+    """无缝接续：第一首在统计期间播完，同一块内接上预加载的下一首"""
+    engine = _start_engine(files["short"])
+    engine.seek(SHORT_SECONDS - BLOCKS / 2 * BLOCKSIZE / SAMPLE_RATE)  # 统计到一半时切换
+    engine.queue_next_track(files["long"])
+    return _measure(engine)
+
+
+def bench_crossfade(files: dict) -> dict:
+    """交叉淡化：统计期间开始淡化，淡出音源读入预分配的缓冲区后按曲线混合"""
+    engine = _start_engine(files["short"], crossfade=CROSSFADE_SECONDS)
+    engine.seek(SHORT_SECONDS - CROSSFADE_SECONDS - BLOCKS / 4 * BLOCKSIZE / SAMPLE_RATE)
+    engine.queue_next_track(files["long"])
+    return _measure(engine)
+
+
+def bench_seek(files: dict) -> dict:
+    """播放中跳转：每 16 块跳转一次，回调在块边界丢弃旧数据"""
+    engine = _start_engine(files["long"])
+    
+    def seek(index):
+        if index % 16 == 0:
+            engine.seek((index // 16 * 1.7) % (LONG_SECONDS - 2))
+    
+    return _measure(engine, seek)
+
+
+def bench_equalizer(files: dict) -> dict:
+    """均衡器：输出块原地做 FFT 重叠相加，每 8 块切换一次预设（新旧响应交叉淡化）"""
+    engine = _start_engine(files["long"])
+    
+    def switch(index):
+        if index % 8 == 0:
+            engine.set_equalizer(EQ_PRESETS[index // 8 % 2])
+    
+    return _measure(engine, switch)
+
+
+def bench_tap(files: dict) -> dict:
+    """可视化分流点：输出块再复制进分流缓冲区（消费端每块清空）"""
+    engine = _start_engine(files["long"])
+    tap = engine.get_audio_tap()
+    tap.active = True
+    return _measure(engine, lambda index: tap.ring.skip_to(tap.ring.write_index))
+
+
+def bench_legacy(files: dict) -> dict:
+    """旧回调路径：先相乘生成新数组，再拷贝到 outdata（对照）"""
+    audio, _ = sf.read(files["long"], dtype='float32')
+    outdata = np.zeros((BLOCKSIZE, CHANNELS), dtype=np.float32)
+    peaks = []
+    tracemalloc.start()
+    for index in range(BLOCKS):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        outdata[:] = audio[index * BLOCKSIZE:(index + 1) * BLOCKSIZE] * 0.7
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return {
+        "blocks": BLOCKS,
+        "max_transient_bytes": max(peaks),
+        "array_allocations": sum(1 for peak in peaks if peak >= outdata.nbytes),
+    }
+
+
+def main() -> int:
+    """运行基准
+    
+    Returns:
+        退出状态：回调路径的峰值都在 PEAK_LIMIT 以内时为 0
+    """
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        files = {
+            "long": _make_test_file(directory, "long.wav", LONG_SECONDS, 0),
+            "short": _make_test_file(directory, "short.wav", SHORT_SECONDS, 1),
+        }
+        for name, bench in (("legacy", bench_legacy), ("steady", bench_steady),
+                            ("compact", bench_compact), ("gapless", bench_gapless),
+                            ("crossfade", bench_crossfade), ("seek", bench_seek),
+                            ("equalizer", bench_equalizer), ("tap", bench_tap)):
+            result = bench(files)
+            print(f"{name:>10}: {result['blocks']} 块, "
+                  f"每块新分配数组 {result['array_allocations'] / result['blocks']:.2f} 次, "
+                  f"最大瞬时分配 {result['max_transient_bytes']} 字节 "
+                  f"(一个块 {BLOCKSIZE * CHANNELS * 4} 字节)")
+            if bench is not bench_legacy and result["max_transient_bytes"] > PEAK_LIMIT:
+                failures.append(name)
+    
+    leftover = [thread.name for thread in threading.enumerate() if thread is not threading.main_thread()]
+    if leftover:
+        print(f"❌ 引擎关闭后仍有线程在运行: {', '.join(leftover)}")
+        return 1
+    if failures:
+        print(f"❌ 回调瞬时分配超过 {PEAK_LIMIT} 字节: {', '.join(failures)}")
+        return 1
+    print(f"✓ 回调瞬时分配都在 {PEAK_LIMIT} 字节以内")
+    return 0
+
+
+if __name__ == "__main__":
+    status = main()
+    # 引擎和线程都已在 main() 中结束。PySide6 6.12 的 Signal.emit() 每次少计一次 True 的引用，
+    # 解释器清理时会因此中止，所以跳过清理直接退出
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(status)
@@ -0,0 +1,122 @@
+"""回调健康指标在系统负载下的变化（无需声卡）
+
+用法（在项目根目录运行）:
+    python -m benchmarks.callback_health [输出目录]
+
+用空输出按实时速度、低延迟档位播放，分别在空闲和有忙线程抢占 CPU 的情况下统计
+回调耗时分布、超时次数、解码欠载次数、缓冲区填充率和从解码到输出的延迟。
+给出输出目录时把每种情况的完整指标导出为 JSON。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from music_player.models.audio_output import NullBackend
+from music_player.models.playback_engine import PlaybackEngine
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+SECONDS = 30
+PLAY_SECONDS = 3.0
+BUSY_THREADS = 4
+
+
+def _make_test_file(directory: str) -> str:
+    """生成测试用的 WAV 文件"""
+    path = os.path.join(directory, "bench.wav")
+    noise = np.random.default_rng(0).uniform(-0.5, 0.5, (SAMPLE_RATE * SECONDS, CHANNELS))
+    sf.write(path, noise.astype(np.float32), SAMPLE_RATE)
+    return path
+
+
+def _wait(app: QCoreApplication, seconds: float) -> None:
+    """运行事件循环一段时间（把引擎排队的事件送达）
+    
+    不循环调用 processEvents()：PySide6 6.12 的 processEvents() 每次调用都少计一次 None 的引用。
+    """
+    loop = QEventLoop()
+    QTimer.singleShot(max(1, round(seconds * 1000)), loop.quit)
+    loop.exec()
+
+
+def _check_stopped() -> None:
+    """确认引擎的解码、输出和事件分发线程以及忙线程都已结束"""
+    leftover = [thread.name for thread in threading.enumerate() if thread is not threading.main_thread()]
+    if leftover:
+        raise RuntimeError(f"引擎关闭后仍有线程在运行: {', '.join(leftover)}")
+
+
+def _spin(stop_event: threading.Event) -> None:
+    """占用 CPU（并持有 GIL）的忙线程"""
+    value = 0
+    while not stop_event.is_set():
+        for i in range(10000):
+            value += i
+
+
+def bench_load(app: QCoreApplication, file_path: str, busy_threads: int) -> dict:
+    """在指定数量的忙线程下播放一段时间，返回指标快照"""
+    engine = PlaybackEngine(NullBackend())
+    engine.set_output_samplerate(SAMPLE_RATE)
+    engine.set_latency_profile("low_latency")
+    engine.load_track(file_path)
+    engine.play()
+    _wait(app, 0.5)  # 等缓冲区填满，预热不计入统计
+    engine.reset_metrics()
+    
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=_spin, args=(stop_event,), daemon=True) for _ in range(busy_threads)]
+    for thread in threads:
+        thread.start()
+    _wait(app, PLAY_SECONDS)
+    metrics = engine.get_metrics()
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    
+    engine.shutdown()
+    _wait(app, 0.1)  # 送达已排队的事件
+    return metrics
+
+
+def main() -> None:
+    """运行基准"""
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = _make_test_file(directory)
+        results = [(name, bench_load(app, file_path, threads))
+                   for name, threads in (("idle", 0), ("busy", BUSY_THREADS))]
+    _check_stopped()
+    
+    for name, metrics in results:
+        counters = metrics["counters"]
+        histograms = metrics["histograms"]
+        callback = histograms["callback_ms"]
+        print(f"{name:>5}: {counters['callbacks']} 次回调, 耗时 p50 {callback['p50']:.2f} ms / "
+              f"p99 {callback['p99']:.2f} ms / 最大 {callback['max']:.2f} ms (预算 {metrics['budget_ms']:.1f} ms), "
+              f"超时 {counters['deadline_misses']} 次, 解码欠载 {counters['decode_underruns']} 块, "
+              f"缓冲区填充 p50 {histograms['buffer_fill']['p50']:.0%}, "
+              f"解码到输出 p50 {histograms['decode_to_output_ms']['p50']:.0f} ms, "
+              f"进程 CPU {metrics['system']['process_cpu_share']:.0%}")
+        if output_dir:
+            path = os.path.join(output_dir, f"callback_health_{name}.json")
+            os.makedirs(output_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(metrics, f, ensure_ascii=False, indent=2)
+            print(f"       已导出 {path}")
+
+
+if __name__ == "__main__":
+    main()
+    # 引擎和线程都已在 main() 中结束。PySide6 6.12 的 Signal.emit() 每次少计一次 True 的引用，
+    # 解释器清理时会因此中止，所以跳过清理直接退出
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
@@ -0,0 +1,84 @@
+"""音频回调耗时基准（无需声卡）
+
+用法（在项目根目录运行）:
+    python -m benchmarks.callback_timing
+
+用空输出和 WAV 文件输出驱动完整的播放引擎，统计每次回调的耗时，
+并把 WAV 输出与源文件逐采样比对，确认回调链路输出的音频没有丢帧或错位。
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QCoreApplication, QTimer
+
+from music_player.models.audio_output import NullBackend, WavFileBackend
+from music_player.models.playback_engine import PlaybackEngine
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+SECONDS = 3
+
+
+def _make_test_file(directory: str) -> str:
+    """生成测试用的 WAV 文件"""
+    path = os.path.join(directory, "bench.wav")
+    noise = np.random.default_rng(0).uniform(-0.5, 0.5, (SAMPLE_RATE * SECONDS, CHANNELS))
+    sf.write(path, noise.astype(np.float32), SAMPLE_RATE, subtype='FLOAT')
+    return path
+
+
+def _play_to_end(app: QCoreApplication, backend, file_path: str) -> dict:
+    """用指定后端完整播放一遍，返回回调统计"""
+    engine = PlaybackEngine(backend)
+    engine.set_volume(1.0)
+    engine.track_finished.connect(app.quit)
+    QTimer.singleShot((SECONDS + 5) * 1000, app.quit)  # 防止卡死
+    
+    engine.load_track(file_path)
+    engine.play()
+    app.exec()
+    
+    stats = engine.get_callback_stats()
+    engine.shutdown()
+    return stats
+
+
+def _compare(source_path: str, rendered_path: str) -> bool:
+    """检查渲染结果是否与源文件逐采样一致（允许首尾的静音）"""
+    source, _ = sf.read(source_path, dtype='float32', always_2d=True)
+    rendered, _ = sf.read(rendered_path, dtype='float32', always_2d=True)
+    nonzero = np.flatnonzero(np.any(rendered != 0, axis=1))
+    if len(nonzero) == 0:
+        return False
+    rendered = rendered[nonzero[0]:]
+    if len(rendered) < len(source):
+        return False
+    return (np.array_equal(rendered[:len(source)], source)
+            and not np.any(rendered[len(source):]))
+
+
+def main() -> None:
+    """运行基准"""
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = _make_test_file(directory)
+        rendered_path = os.path.join(directory, "rendered.wav")
+        
+        results = (
+            ("null", _play_to_end(app, NullBackend(), file_path)),
+            ("wav", _play_to_end(app, WavFileBackend(rendered_path), file_path)),
+        )
+        for name, stats in results:
+            print(f"{name:>5}: {stats['calls']} 次回调, "
+                  f"平均 {stats['mean_ms']:.3f} ms, 最大 {stats['max_ms']:.3f} ms, "
+                  f"预算 {stats['budget_ms']:.1f} ms (占用 {stats['load']:.2%}), "
+                  f"超时 {stats['overruns']} 次")
+        
+        print(f"WAV 输出与源文件一致: {_compare(file_path, rendered_path)}")
+
+
+if __name__ == "__main__":
+    main()
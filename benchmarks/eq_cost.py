@@ -0,0 +1,48 @@
+"""均衡器 CPU 开销基准
+
+用法（在项目根目录运行）:
+    python -m benchmarks.eq_cost
+
+按播放引擎的块大小处理 10 秒立体声噪声，统计每秒音频消耗的 CPU 时间占单核的比例，
+并单独统计每块都切换增益（交叉淡化路径）时的开销。
+"""
+
+import time
+import numpy as np
+
+from music_player.models.equalizer import Equalizer, filter_taps
+
+CHANNELS = 2
+BLOCKSIZE = 2048
+SECONDS = 10
+GAINS = (6.0, -3.0, 2.0, -4.0, 5.0)
+
+
+def _measure(samplerate: int, switching: bool) -> float:
+    """处理 SECONDS 秒音频，返回 CPU 时间占音频时长的比例"""
+    audio = np.random.default_rng(0).uniform(-0.5, 0.5, (samplerate * SECONDS, CHANNELS)).astype(np.float32)
+    equalizer = Equalizer()
+    equalizer.set_bands(GAINS)
+    equalizer.configure(samplerate, CHANNELS, BLOCKSIZE)
+    equalizer.process(audio[:BLOCKSIZE].copy())  # 预热，完成首次切换
+    alternate = (tuple(-g for g in GAINS), GAINS)
+    
+    start = time.process_time()
+    for index, offset in enumerate(range(0, len(audio), BLOCKSIZE)):
+        if switching:
+            equalizer.set_bands(alternate[index % 2])
+        equalizer.process(audio[offset:offset + BLOCKSIZE])
+    return (time.process_time() - start) / SECONDS
+
+
+def main() -> None:
+    """运行基准"""
+    for samplerate in (44100, 96000, 192000):
+        steady = _measure(samplerate, switching=False)
+        switching = _measure(samplerate, switching=True)
+        print(f"{samplerate:>6} Hz (FIR {filter_taps(samplerate)} 点): "
+              f"稳态 {steady:.2%} 单核, 每块切换增益 {switching:.2%} 单核")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""已加载曲目的内存报告
+
+用法（在项目根目录运行）:
+    python -m benchmarks.memory_report
+
+分别以 float32 和紧凑存储加载同一首 44.1kHz 16 位曲目（以及它的 PCM 缓存副本），
+打印播放引擎报告的每个曲目占用的内存。NullBackend 不提供设备采样率，曲目按原采样率播放；
+另外以 48kHz 输出再加载一次，覆盖声卡采样率不同时的重采样路径。
+紧凑存储的缓冲区在任一路径下不是 float32 的一半时以非零状态退出。
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QCoreApplication
+
+from music_player.models.audio_output import NullBackend
+from music_player.models.pcm_cache import PCMCache
+from music_player.models.playback_engine import PlaybackEngine
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+OUTPUT_RATE = 48000  # 常见声卡的采样率，与曲目不同
+SECONDS = 30
+
+
+def _make_test_file(directory: str) -> str:
+    """生成 16 位测试文件"""
+    path = os.path.join(directory, "cd.wav")
+    noise = np.random.default_rng(0).uniform(-0.5, 0.5, (SAMPLE_RATE * SECONDS, CHANNELS))
+    sf.write(path, noise.astype(np.float32), SAMPLE_RATE, subtype='PCM_16')
+    return path
+
+
+def _fill_cache(cache: PCMCache, file_path: str) -> None:
+    """完整解码一遍，写入 PCM 缓存"""
+    info = sf.info(file_path)
+    writer = cache.create_writer(file_path, info.samplerate, info.channels, info.frames)
+    with sf.SoundFile(file_path) as f:
+        writer.write(0, f.read(dtype='int16', always_2d=True))
+    writer.mark_end(info.frames)
+    writer.close()
+
+
+def _print_report(label: str, engine: PlaybackEngine) -> None:
+    """打印引擎的内存报告"""
+    for usage in engine.memory_report():
+        print(f"{label:>16} [{usage['role']}]: {usage['sample_dtype']:>7}, "
+              f"缓冲区 {usage['buffer_bytes'] / 1024:.0f} KB, "
+              f"映射 {usage['mapped_bytes'] / 1024 / 1024:.1f} MB")
+
+
+def main() -> int:
+    """运行报告
+    
+    Returns:
+        退出状态：紧凑存储在两种输出采样率下都只占 float32 一半的缓冲区时为 0
+    """
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    engine = PlaybackEngine(NullBackend())
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = _make_test_file(directory)
+        print(f"整首解码为 float32 需要 {SAMPLE_RATE * SECONDS * CHANNELS * 4 / 1024 / 1024:.1f} MB")
+        
+        for rate in (None, OUTPUT_RATE):
+            engine.set_output_samplerate(rate)
+            suffix = f"@{rate // 1000}k" if rate else ""
+            buffers = {}
+            for label, compact in (("float32", False), ("compact", True)):
+                engine.set_compact_samples(compact)
+                engine.load_track(file_path)
+                _print_report(label + suffix, engine)
+                buffers[label] = engine.memory_report()[0]["buffer_bytes"]
+            if buffers["compact"] * 2 != buffers["float32"]:
+                failures.append(f"compact{suffix}")
+        
+        engine.set_output_samplerate(None)
+        cache = PCMCache(os.path.join(directory, "pcm"), dtype="int16")
+        _fill_cache(cache, file_path)
+        engine.set_pcm_cache(cache)
+        engine.load_track(file_path)
+        _print_report("compact+cache", engine)
+        
+        engine.shutdown()
+    
+    if failures:
+        print(f"❌ 紧凑存储的缓冲区没有减半: {', '.join(failures)}")
+        return 1
+    print("✓ 紧凑存储的缓冲区在原采样率和重采样时都减半")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
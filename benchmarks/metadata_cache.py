@@ -0,0 +1,88 @@
+"""元数据内存缓存的命中率和内存占用（不读取文件）
+
+用法（在项目根目录运行）:
+    python -m benchmarks.metadata_cache [曲库曲目数]
+
+模拟一个曲库：先整库添加一次，然后反复加载随机的播放列表（每个 300 首，偏向常听的曲目），
+再整库重新添加一次，统计不同容量下的命中率和淘汰次数。最后用 tracemalloc 测量实际内存，
+和缓存按字符串长度估算的字节数对照。
+"""
+
+import random
+import sys
+import tracemalloc
+
+from music_player.models.metadata_cache import MetadataCache
+from music_player.models.track import Metadata
+
+LIBRARY = 10000
+PLAYLISTS = 200
+PLAYLIST_SIZE = 300
+CAPACITIES = (1000, 5000, 20000)
+
+
+def _make_library(count: int) -> list:
+    """生成曲库的 (路径, 元数据) 列表"""
+    library = []
+    for index in range(count):
+        album = index // 12
+        path = f"/home/user/Music/Artist {album % 400:03d}/Album {album:04d}/{index % 12 + 1:02d} Track {index:05d}.flac"
+        metadata = Metadata(title=f"Track {index:05d}", artist=f"Artist {album % 400:03d}",
+                            album=f"Album {album:04d}", duration=200.0 + index % 120,
+                            cover_id=f"{album:040x}")
+        library.append((path, metadata))
+    return library
+
+
+def _run(library: list, capacity: int) -> dict:
+    """按固定的访问序列使用一个缓存，返回统计"""
+    rng = random.Random(0)
+    cache = MetadataCache(max_entries=capacity, max_bytes=1 << 40)
+
+    def add(entries):
+        for path, metadata in entries:
+            if cache.get(path) is None:
+                cache.put(path, metadata)
+
+    add(library)
+    # 播放列表偏向常听的曲目：下标按指数分布抽取
+    for _ in range(PLAYLISTS):
+        picks = {min(len(library) - 1, int(rng.expovariate(1 / (len(library) / 8)))) for _ in range(PLAYLIST_SIZE)}
+        add(library[index] for index in sorted(picks))
+    add(library)
+    return cache.stats()
+
+
+def _measure_memory(library: list) -> tuple:
+    """实际内存占用和估算值（字节）"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cache = MetadataCache(max_entries=len(library), max_bytes=1 << 40)
+    for path, metadata in library:
+        # 复制字符串和对象，模拟从文件读出的新数据
+        cache.put("".join(path), Metadata(title="".join(metadata.title), artist="".join(metadata.artist),
+                                          album="".join(metadata.album), duration=metadata.duration,
+                                          cover_id="".join(metadata.cover_id)))
+    actual = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return actual, cache.stats()["bytes"]
+
+
+def main() -> None:
+    """运行基准"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else LIBRARY
+    library = _make_library(count)
+    print(f"曲库 {count} 首: 整库添加 → {PLAYLISTS} 个播放列表（每个 {PLAYLIST_SIZE} 首）→ 整库重新添加")
+    for capacity in CAPACITIES:
+        stats = _run(library, capacity)
+        print(f"容量 {capacity:>6} 条: 命中 {stats['hits']:>6} 次, 未命中 {stats['misses']:>6} 次 "
+              f"(命中率 {stats['hit_rate']:.0%}), 淘汰 {stats['evictions']:>6} 次, "
+              f"占用 {stats['bytes'] / 1024 / 1024:.1f} MB")
+
+    actual, estimated = _measure_memory(library)
+    print(f"内存: 实际 {actual / 1024 / 1024:.1f} MB ({actual / count:.0f} 字节/条), "
+          f"估算 {estimated / 1024 / 1024:.1f} MB ({estimated / count:.0f} 字节/条)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""元数据读取的文件打开次数和读取量
+
+用法（在项目根目录运行）:
+    python -m benchmarks.metadata_scan [文件数]
+
+生成带标签和内嵌封面的 FLAC、MP3、Ogg Vorbis 文件各若干份，分别用旧的读取方式
+（标签、时长、封面各解析一次文件）和 MetadataReader.read_metadata（只解析一次）读取全部文件，
+统计打开文件的次数、从文件读取的字节数（Linux 上取 /proc/self/io 的 rchar）和耗时。
+最后用 MetadataStore 模拟冷启动（解析并写入缓存）和热启动（文件未改动，只 stat 不解析），
+并用 MetadataScanner 在不同并发数下后台扫描，统计总耗时和界面线程最长的一次停顿。
+最后比较封面占用的内存：每个曲目一张解码后的 QPixmap，和按内容哈希只保存一份原始数据。
+"""
+
+import base64
+import builtins
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Optional
+import numpy as np
+import soundfile as sf
+from PySide6.QtCore import QBuffer, QByteArray, QEventLoop, QIODevice, QTimer
+from PySide6.QtGui import QGuiApplication, QImage
+from mutagen import File as MutagenFile
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import ID3, APIC, TALB, TIT2, TPE1
+from mutagen.oggvorbis import OggVorbis
+
+from music_player.models.metadata_reader import MetadataReader
+from music_player.models.metadata_scanner import MetadataScanner
+from music_player.models.metadata_store import MetadataStore
+
+SCAN_CONFIGS = ((1, False), (2, False), (4, False), (0, True))  # (并发数, 是否用进程池)
+SAMPLE_RATE = 44100
+SECONDS = 0.5
+FILES = 3000
+COVER_SIZE = 300
+
+
+def _cover_jpeg() -> bytes:
+    """生成一张 JPEG 封面"""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (COVER_SIZE, COVER_SIZE, 4), dtype=np.uint8)
+    pixels[:, :, 3] = 255
+    image = QImage(pixels.data, COVER_SIZE, COVER_SIZE, QImage.Format.Format_RGBA8888)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "JPG", 85)
+    return bytes(data.data())
+
+
+def _make_templates(directory: str) -> list:
+    """生成每种格式各一个带标签和封面的模板文件"""
+    audio = np.random.default_rng(1).uniform(-0.3, 0.3, (int(SAMPLE_RATE * SECONDS), 2)).astype(np.float32)
+    cover = _cover_jpeg()
+    picture = Picture()
+    picture.type = 3
+    picture.mime = "image/jpeg"
+    picture.data = cover
+    
+    flac_path = os.path.join(directory, "template.flac")
+    sf.write(flac_path, audio, SAMPLE_RATE)
+    flac = FLAC(flac_path)
+    flac.update({"title": "Song", "artist": "Artist", "album": "Album"})
+    flac.add_picture(picture)
+    flac.save()
+    
+    mp3_path = os.path.join(directory, "template.mp3")
+    sf.write(mp3_path, audio, SAMPLE_RATE, format="MP3")
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="Song"))
+    tags.add(TPE1(encoding=3, text="Artist"))
+    tags.add(TALB(encoding=3, text="Album"))
+    tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover))
+    tags.save(mp3_path)
+    
+    ogg_path = os.path.join(directory, "template.ogg")
+    sf.write(ogg_path, audio, SAMPLE_RATE, format="OGG")
+    ogg = OggVorbis(ogg_path)
+    ogg.update({"title": "Song", "artist": "Artist", "album": "Album"})
+    ogg["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
+    ogg.save()
+    return [flac_path, mp3_path, ogg_path]
+
+
+def _read_bytes() -> Optional[int]:
+    """本进程累计从文件读取的字节数（不支持时返回 None）"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _measure(run, paths: list) -> dict:
+    """运行一次 run()，统计对 paths 中文件的打开次数、读取量和耗时"""
+    opens = [0]
+    real_open = builtins.open
+    
+    def counting_open(file, *args, **kwargs):
+        if isinstance(file, str) and file in targets:
+            opens[0] += 1
+        return real_open(file, *args, **kwargs)
+    
+    targets = set(paths)
+    builtins.open = counting_open
+    try:
+        before = _read_bytes()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        after = _read_bytes()
+    finally:
+        builtins.open = real_open
+    return {
+        "opens": opens[0],
+        "bytes": after - before if before is not None and after is not None else None,
+        "seconds": elapsed,
+    }
+
+
+def _scan(paths: list, workers: int, use_processes: bool) -> dict:
+    """用 MetadataScanner 冷启动扫描全部文件，界面线程处理事件并把每批结果交给 finish()"""
+    directory = tempfile.mkdtemp()
+    store = MetadataStore(os.path.join(directory, "metadata.sqlite3"))
+    reader = MetadataReader(store)
+    scanner = MetadataScanner(reader, workers, use_processes)
+    finished = []
+    scanner.batch_ready.connect(lambda scan_id, batch: reader.finish(batch))
+    scanner.finished.connect(lambda scan_id, cancelled: finished.append(scan_id))
+    
+    # 不循环调用 processEvents()：PySide6 6.12 的 processEvents() 每次调用都少计一次 None 的引用。
+    # 改由事件循环中每毫秒触发的定时器记录相邻两次触发的间隔，即界面线程的停顿
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setInterval(1)
+    state = {"longest": 0.0, "last": 0.0}
+    
+    def tick():
+        now = time.perf_counter()
+        state["longest"] = max(state["longest"], now - state["last"])
+        state["last"] = now
+        if finished:
+            loop.quit()
+    
+    timer.timeout.connect(tick)
+    start = time.perf_counter()
+    state["last"] = start
+    scanner.start(paths)
+    timer.start()
+    loop.exec()
+    timer.stop()
+    longest = state["longest"]
+    elapsed = time.perf_counter() - start
+    scanner.shutdown()
+    store.close()
+    shutil.rmtree(directory)
+    return {"workers": scanner.workers, "processes": use_processes, "seconds": elapsed, "stall": longest}
+
+
+def _legacy_read(reader: MetadataReader, path: str) -> None:
+    """旧的读取方式：标签、时长、封面各解析一次文件"""
+    MutagenFile(path)
+    reader.get_duration(path)
+    reader.get_cover_art(path)
+
+
+def main() -> None:
+    """运行基准"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else FILES
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as directory:
+        templates = _make_templates(directory)
+        paths = []
+        for index in range(count):
+            template = templates[index % len(templates)]
+            path = os.path.join(directory, f"{index:05d}{os.path.splitext(template)[1]}")
+            shutil.copyfile(template, path)
+            paths.append(path)
+        total = sum(os.path.getsize(path) for path in paths)
+        print(f"{count} 个文件, 共 {total / 1024 / 1024:.1f} MB")
+        
+        legacy_reader = MetadataReader()
+        legacy = _measure(lambda: [_legacy_read(legacy_reader, path) for path in paths], paths)
+        reader = MetadataReader()
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")  # read_metadata 每个文件打印一行
+        try:
+            single = _measure(lambda: [reader.read_metadata(path) for path in paths], paths)
+            # 持久化缓存：每次启动都是新的 MetadataReader，内存缓存为空
+            db_path = os.path.join(directory, "metadata.sqlite3")
+            store = MetadataStore(db_path)
+            cold_reader = MetadataReader(store)
+            cold = _measure(lambda: cold_reader.read_many(paths), paths)
+            store.close()
+            store = MetadataStore(db_path)
+            warm_reader = MetadataReader(store)
+            warm = _measure(lambda: warm_reader.read_many(paths), paths)
+            cover_stats = cold_reader.covers.stats()
+            store.close()
+            scans = [_scan(paths, workers, use_processes) for workers, use_processes in SCAN_CONFIGS]
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        db_size = os.path.getsize(db_path)
+        sample = legacy_reader.get_cover_art(paths[0])
+        pixmap_bytes = sample.width() * sample.height() * sample.depth() // 8 if sample else 0
+    
+    for name, result in (("三次解析", legacy), ("一次解析", single), ("冷启动", cold), ("热启动", warm)):
+        read_mb = f"{result['bytes'] / 1024 / 1024:.1f} MB" if result["bytes"] is not None else "未知"
+        print(f"{name}: 打开文件 {result['opens']} 次, 读取 {read_mb}, "
+              f"耗时 {result['seconds']:.2f} 秒 ({result['seconds'] / count * 1000:.2f} ms/文件)")
+    if legacy["bytes"] and single["bytes"]:
+        print(f"打开次数减少到 1/{legacy['opens'] / single['opens']:.1f}, "
+              f"读取量减少到 1/{legacy['bytes'] / single['bytes']:.1f}")
+    print(f"元数据缓存 {db_size / 1024:.0f} KB（封面按内容去重）")
+    print(f"封面: 每个曲目一张 QPixmap 共 {pixmap_bytes * count / 1024 / 1024:.0f} MB, "
+          f"按内容哈希保存 {cover_stats['pending']} 份原始数据 {cover_stats['pending_bytes'] / 1024:.0f} KB"
+          f"（缩略图显示时才解码）")
+    for scan in scans:
+        pool = "进程" if scan["processes"] else "线程"
+        print(f"后台扫描 {scan['workers']} 个{pool}: 耗时 {scan['seconds']:.2f} 秒, "
+              f"界面线程最长停顿 {scan['stall'] * 1000:.0f} ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
+    # 扫描线程都已在 main() 中结束。PySide6 6.12 的 Signal.emit() 每次少计一次 True 的引用，
+    # 解释器清理时会因此中止，所以跳过清理直接退出
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
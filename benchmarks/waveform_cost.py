@@ -0,0 +1,67 @@
+"""波形峰值的计算和绘制开销
+
+用法（在项目根目录运行）:
+    python -m benchmarks.waveform_cost
+
+生成一首较长的测试曲目，统计计算峰值金字塔的耗时（相对实时的倍数）、缓存文件大小、
+从缓存加载的耗时，以及进度条在不同宽度下取像素列的耗时。
+"""
+
+import os
+import tempfile
+import time
+import numpy as np
+import soundfile as sf
+
+from music_player.models.waveform import WaveformStore
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+SECONDS = 300
+WIDTHS = (200, 800, 2000, 5000)
+
+
+def _make_test_file(directory: str) -> str:
+    """生成测试用的 FLAC 文件"""
+    path = os.path.join(directory, "bench.flac")
+    rng = np.random.default_rng(0)
+    envelope = np.abs(np.sin(np.linspace(0, 20, SAMPLE_RATE * SECONDS)))[:, np.newaxis]
+    noise = rng.uniform(-0.5, 0.5, (SAMPLE_RATE * SECONDS, CHANNELS)) * envelope
+    sf.write(path, noise.astype(np.float32), SAMPLE_RATE)
+    return path
+
+
+def main() -> None:
+    """运行基准"""
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = _make_test_file(directory)
+        store = WaveformStore(os.path.join(directory, "waveforms"))
+        
+        start = time.perf_counter()
+        store.get(file_path)
+        compute = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        peaks = store.load(file_path)
+        load = time.perf_counter() - start
+        
+        size = sum(os.path.getsize(os.path.join(store.cache_dir, name))
+                   for name in os.listdir(store.cache_dir))
+        print(f"计算: {compute * 1000:.0f} ms ({SECONDS / compute:.0f} 倍实时), "
+              f"缓存 {size} 字节, 从缓存加载 {load * 1000:.2f} ms, 金字塔 {len(peaks.levels)} 层")
+        
+        for width in WIDTHS:
+            repeats = 200
+            start = time.perf_counter()
+            for _ in range(repeats):
+                peaks.columns(width)
+            elapsed = (time.perf_counter() - start) / repeats
+            zoomed = time.perf_counter()
+            for _ in range(repeats):
+                peaks.columns(width, 0.4, 0.45)
+            zoomed = (time.perf_counter() - zoomed) / repeats
+            print(f"{width:>5} 列: 全曲 {elapsed * 1e6:.0f} us, 放大到 5% {zoomed * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
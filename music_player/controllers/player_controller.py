@@ -1,13 +1,17 @@
 """播放器控制器"""
 
 import os
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional
 from PySide6.QtCore import QObject, Signal
 
 from ..models.playback_engine import PlaybackEngine
 from ..models.playlist_manager import PlaylistManager
 from ..models.config_manager import ConfigManager
-from ..models.metadata_reader import MetadataReader
+from ..models.metadata_reader import MetadataReader, ScanResult
+from ..models.metadata_scanner import MetadataScanner
+from ..models.loudness import LoudnessAnalyzer
+from ..models.waveform import WaveformStore
 from ..models.track import Track
 from ..models.playback_mode import PlaybackMode
 
@@ -18,6 +22,12 @@ class PlayerController(QObject):
     # 信号
     track_changed = Signal(int)  # 当前曲目变化
     error_occurred = Signal(str)  # 错误发生
+    waveform_changed = Signal(object)  # 当前曲目的波形（WaveformPeaks，None 表示暂无）
+    scan_progress = Signal(int, int)  # 后台读取元数据的进度（已完成, 总数），全部结束时为 (0, 0)
+    scan_finished = Signal(int, int, bool)  # 一次添加完成（扫描编号, 加入的曲目数, 是否被取消）
+    
+    # 内部信号：波形线程 -> 界面线程
+    _waveform_computed = Signal(str, object)
     
     def __init__(self, engine: PlaybackEngine, playlist: PlaylistManager, 
                  config: ConfigManager, metadata_reader: MetadataReader):
@@ -39,8 +49,37 @@ class PlayerController(QObject):
         self._consecutive_failures = 0  # 连续失败计数器
         self._max_failures = 5  # 最大连续失败次数
         
+        # 无缝播放 / 交叉淡化：提前把下一首交给引擎预解码
+        self._gapless = True
+        self._crossfade = 0.0
+        self._queued_index: Optional[int] = None
+        
+        # 响度均衡：后台分析曲目响度，引擎加载曲目时按模式取增益
+        self.loudness = LoudnessAnalyzer(os.path.join(config.get_cache_dir(), "loudness.json"))
+        self._replay_gain_mode = "track"  # off / track / album
+        self.engine.set_gain_provider(self._gain_for_file)
+        
+        # 波形：切歌时在后台读取缓存或计算，完成后交给进度条
+        self.waveforms = WaveformStore(os.path.join(config.get_cache_dir(), "waveforms"))
+        self._waveform_file: Optional[str] = None
+        
+        # 元数据扫描：添加曲目时在后台并行读取，分批加入播放列表
+        self.scanner = MetadataScanner(metadata_reader)
+        self._scans: Dict[int, List[str]] = {}  # 扫描编号 -> 要添加的路径
+        self._scan_position: Dict[int, int] = {}  # 扫描编号 -> 之前的路径都已处理
+        self._scan_added: Dict[int, List[str]] = {}  # 扫描编号 -> 已加入播放列表的路径
+        self._scan_progress: Dict[int, tuple] = {}  # 扫描编号 -> (已完成, 总数)
+        
         # 连接信号
         self.engine.track_finished.connect(self._on_track_finished)
+        self.engine.track_advanced.connect(self._on_track_advanced)
+        self.track_changed.connect(self._load_waveform)
+        self._waveform_computed.connect(self._on_waveform_computed)
+        self.scanner.batch_ready.connect(self._on_scan_batch)
+        self.scanner.progress.connect(self._on_scan_progress)
+        self.scanner.finished.connect(self._on_scan_finished)
+        self.playlist.playlist_changed.connect(self._prepare_next_track)
+        self.playlist.play_mode_changed.connect(self._prepare_next_track)
     
     def play_pause(self) -> None:
         """播放/暂停"""
@@ -50,9 +89,10 @@ class PlayerController(QObject):
             self.engine.play()
         else:
             # 如果没有播放，检查是否已经加载了曲目
-            if self.engine._audio_data is not None:
+            if self.engine.is_loaded():
                 # 已经加载了曲目（可能是恢复状态），直接播放
                 self.engine.play()
+                self._prepare_next_track()
             else:
                 # 没有加载曲目，从当前索引开始
                 if self.current_index == -1 and self.playlist.get_track_count() > 0:
@@ -114,6 +154,7 @@ class PlayerController(QObject):
             self.current_index = index
             self._consecutive_failures = 0  # 重置失败计数
             self.track_changed.emit(index)
+            self._prepare_next_track()
         else:
             # 加载失败
             self._consecutive_failures += 1
@@ -145,6 +186,37 @@ class PlayerController(QObject):
         """
         self.engine.set_volume(volume)
     
+    def set_gapless(self, enabled: bool) -> None:
+        """设置无缝播放
+        
+        Args:
+            enabled: 是否启用
+        """
+        self._gapless = enabled
+        self._prepare_next_track()
+    
+    def set_crossfade(self, seconds: float) -> None:
+        """设置曲目之间的交叉淡化时长（自动切换到下一首时生效）
+        
+        Args:
+            seconds: 淡化时长（秒），0 表示不淡化
+        """
+        self._crossfade = max(0.0, seconds)
+        self.engine.set_crossfade(self._crossfade)
+        self._prepare_next_track()
+    
+    def set_replay_gain_mode(self, mode: str) -> None:
+        """设置响度均衡模式（之后加载的曲目生效）
+        
+        Args:
+            mode: "off" 关闭，"track" 按曲目均衡，"album" 按专辑均衡（保留专辑内的响度差异）
+        """
+        if mode not in ("off", "track", "album"):
+            mode = "track"
+        self._replay_gain_mode = mode
+        if mode != "off":
+            self._analyze_loudness([track.file_path for track in self.playlist.get_all_tracks()])
+    
     def set_play_mode(self, mode: PlaybackMode) -> None:
         """设置播放模式
         
@@ -153,27 +225,98 @@ class PlayerController(QObject):
         """
         self.playlist.set_play_mode(mode)
     
-    def add_tracks(self, file_paths: List[str]) -> None:
-        """添加曲目
+    def add_tracks(self, file_paths: List[str]) -> int:
+        """添加曲目（在后台读取元数据，读好的曲目分批加入播放列表）
         
         Args:
             file_paths: 文件路径列表
+        
+        Returns:
+            扫描编号，完成时随 scan_finished 发出
+        """
+        scan_id = self.scanner.start(file_paths)
+        self._scans[scan_id] = list(file_paths)
+        self._scan_position[scan_id] = 0
+        self._scan_added[scan_id] = []
+        return scan_id
+    
+    def cancel_scan(self) -> None:
+        """取消所有未完成的添加（已加入播放列表的曲目保留）"""
+        self.scanner.cancel()
+    
+    def set_scan_workers(self, workers: int, use_processes: bool = False) -> None:
+        """设置读取元数据的并发数
+        
+        Args:
+            workers: 并发数，0 表示自动
+            use_processes: 是否用进程池解析
         """
-        tracks = []
-        for file_path in file_paths:
-            if os.path.exists(file_path):
-                metadata = self.metadata_reader.read_metadata(file_path)
-                track = Track(
-                    file_path=file_path,
-                    title=metadata.title or os.path.splitext(os.path.basename(file_path))[0],
-                    artist=metadata.artist or "未知艺术家",
-                    album=metadata.album or "未知专辑",
-                    duration=metadata.duration,
-                    cover_art=metadata.cover_art
-                )
-                tracks.append(track)
+        self.scanner.set_workers(workers)
+        self.scanner.use_processes = use_processes
+    
+    def shutdown(self) -> None:
+        """停止后台扫描"""
+        self.scanner.shutdown()
+    
+    def _add_tracks_now(self, file_paths: List[str]) -> None:
+        """在当前线程读取元数据并添加曲目（恢复状态时使用，未改动的文件直接来自元数据缓存）
         
+        Args:
+            file_paths: 文件路径列表
+        """
+        file_paths = [file_path for file_path in file_paths if os.path.exists(file_path)]
+        metadata_list = self.metadata_reader.read_many(file_paths)
+        tracks = [self._make_track(file_path, metadata) for file_path, metadata in zip(file_paths, metadata_list)]
         self.playlist.add_tracks(tracks)
+        self._analyze_loudness(file_paths)
+    
+    @staticmethod
+    def _make_track(file_path: str, metadata) -> Track:
+        """由元数据创建曲目"""
+        return Track(
+            file_path=file_path,
+            title=metadata.title or os.path.splitext(os.path.basename(file_path))[0],
+            artist=metadata.artist or "未知艺术家",
+            album=metadata.album or "未知专辑",
+            duration=metadata.duration,
+            cover_id=metadata.cover_id
+        )
+    
+    def _on_scan_batch(self, scan_id: int, batch: List[ScanResult]) -> None:
+        """一批元数据读好了（界面线程）：登记封面、创建曲目，加入播放列表"""
+        if scan_id not in self._scans:
+            return
+        metadata_list = self.metadata_reader.finish(batch)
+        tracks = [self._make_track(file_path, metadata)
+                  for (file_path, _, _), metadata in zip(batch, metadata_list)]
+        self.playlist.add_tracks(tracks)
+        
+        # 记录处理到的位置：退出时尚未加入的部分仍要保存到播放列表
+        self._scan_added[scan_id].extend(track.file_path for track in tracks)
+        paths = self._scans[scan_id]
+        position = self._scan_position[scan_id]
+        while position < len(paths) and paths[position] != tracks[-1].file_path:
+            position += 1
+        self._scan_position[scan_id] = position + 1
+    
+    def _on_scan_progress(self, scan_id: int, done: int, total: int) -> None:
+        """扫描进度（界面线程），汇总所有未完成的扫描"""
+        self._scan_progress[scan_id] = (done, total)
+        self.scan_progress.emit(sum(d for d, _ in self._scan_progress.values()),
+                                sum(t for _, t in self._scan_progress.values()))
+    
+    def _on_scan_finished(self, scan_id: int, cancelled: bool) -> None:
+        """一次扫描结束（界面线程）"""
+        self._scans.pop(scan_id, None)
+        self._scan_position.pop(scan_id, None)
+        self._scan_progress.pop(scan_id, None)
+        added = self._scan_added.pop(scan_id, [])
+        if not self._scans:
+            self._scan_progress.clear()
+            self.scan_progress.emit(0, 0)
+        # 整次添加结束后再分析响度，避免每一批都启动一次进程池
+        self._analyze_loudness(added)
+        self.scan_finished.emit(scan_id, len(added), cancelled)
     
     def remove_track(self, index: int) -> None:
         """删除曲目
@@ -191,22 +334,6 @@ class PlayerController(QObject):
         
         self.playlist.remove_track(index)
     
-    def save_state(self) -> None:
-        """保存当前状态"""
-        # 获取当前播放位置
-        current_position = 0.0
-        if self.engine.is_playing() or self.engine.is_paused():
-            current_position = self.engine.get_position()
-        
-        config = {
-            "volume": self.config.get("volume", 70),
-            "playback_mode": self.playlist.get_play_mode().value,
-            "current_track_index": self.current_index,
-            "current_position": current_position,
-            "playlist": [track.file_path for track in self.playlist.get_all_tracks()]
-        }
-        self.config.save_config(config)
-    
     def restore_state(self) -> None:
         """恢复状态"""
         config = self.config.load_config()
@@ -222,7 +349,7 @@ class PlayerController(QObject):
         # 恢复播放列表
         playlist_paths = config.get("playlist", [])
         if playlist_paths:
-            self.add_tracks(playlist_paths)
+            self._add_tracks_now(playlist_paths)
         
         # 恢复当前曲目索引和播放位置
         self.current_index = config.get("current_track_index", -1)
@@ -246,6 +373,107 @@ class PlayerController(QObject):
             else:
                 print(f"❌ 曲目不存在或文件路径无效")
     
+    def playlist_paths(self) -> List[str]:
+        """要保存的播放列表：已加入的曲目，加上仍在后台读取、尚未加入的文件
+        
+        Returns:
+            文件路径列表（按添加顺序）
+        """
+        paths = [track.file_path for track in self.playlist.get_all_tracks()]
+        for scan_id, scan_paths in self._scans.items():
+            paths.extend(scan_paths[self._scan_position[scan_id]:])
+        return paths
+    
+    def _analyze_loudness(self, file_paths: List[str]) -> None:
+        """在后台线程分析曲目响度（已缓存的曲目会跳过）
+        
+        Args:
+            file_paths: 文件路径列表
+        """
+        if self._replay_gain_mode == "off" or not file_paths:
+            return
+        threading.Thread(target=self.loudness.analyze, args=(file_paths,), daemon=True).start()
+    
+    def _load_waveform(self, index: int) -> None:
+        """在后台线程读取或计算当前曲目的波形
+        
+        Args:
+            index: 曲目索引
+        """
+        track = self.playlist.get_track(index)
+        file_path = track.file_path if track is not None else None
+        if file_path == self._waveform_file:
+            return
+        self._waveform_file = file_path
+        self.waveform_changed.emit(None)
+        if file_path is None:
+            return
+        
+        def run():
+            self._waveform_computed.emit(file_path, self.waveforms.get(file_path))
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _on_waveform_computed(self, file_path: str, peaks) -> None:
+        """波形就绪（界面线程），只采用仍是当前曲目的结果"""
+        if file_path == self._waveform_file:
+            self.waveform_changed.emit(peaks)
+    
+    def _gain_for_file(self, file_path: str) -> float:
+        """引擎加载曲目时查询的响度增益
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            线性增益，尚未分析时为 1.0
+        """
+        if self._replay_gain_mode == "off":
+            return 1.0
+        
+        gain = None
+        if self._replay_gain_mode == "album":
+            tracks = self.playlist.get_all_tracks()
+            album = next((t.album for t in tracks if t.file_path == file_path), None)
+            if album and album != "未知专辑":
+                gain = self.loudness.album_gain(t.file_path for t in tracks if t.album == album)
+        if gain is None:
+            gain = self.loudness.track_gain(file_path)
+        return gain if gain is not None else 1.0
+    
+    def _prepare_next_track(self, *args) -> None:
+        """根据播放模式预加载下一首，供引擎无缝接续或交叉淡化
+        
+        播放列表每次变化（包括扫描中每批曲目加入）都会调用；下一首没有变化且引擎仍预加载着它时
+        直接返回，不重建解码器。
+        """
+        if not (self._gapless or self._crossfade > 0) or not (self.engine.is_playing() or self.engine.is_paused()):
+            self._queued_index = None
+            self.engine.clear_next_track()
+            return
+        
+        next_index = self.playlist.get_next_track(self.current_index)
+        track = self.playlist.get_track(next_index) if next_index is not None else None
+        if track is None or not os.path.exists(track.file_path):
+            self._queued_index = None
+            self.engine.clear_next_track()
+            return
+        
+        if next_index == self._queued_index and self.engine.get_next_track() == track.file_path:
+            return
+        
+        self._queued_index = next_index if self.engine.queue_next_track(track.file_path) else None
+    
+    def _on_track_advanced(self, file_path: str) -> None:
+        """引擎已无缝切换（或开始淡化）到预加载的下一首"""
+        if self._queued_index is None:
+            return
+        
+        self.current_index = self._queued_index
+        self._consecutive_failures = 0
+        self.track_changed.emit(self.current_index)
+        self._prepare_next_track()
+    
     def _on_track_finished(self) -> None:
         """曲目播放完成处理"""
         print("🎵 控制器：收到 track_finished 信号")
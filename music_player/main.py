@@ -2,21 +2,33 @@
 
 import sys
 import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+_STARTUP_BEGIN = time.perf_counter()  # 启动计时的起点（导入界面和播放引擎模块之前）
+
 from PySide6.QtWidgets import QApplication, QMessageBox
-from PySide6.QtCore import QTimer
 from PySide6.QtGui import QIcon
+from PySide6.QtCore import QTimer
 
 from .models.playback_engine import PlaybackEngine
 from .models.playlist_manager import PlaylistManager
 from .models.config_manager import ConfigManager
+from .models.pcm_cache import PCMCache
 from .models.metadata_reader import MetadataReader
+from .models.metadata_store import MetadataStore
 from .models.playback_mode import PlaybackMode
 from .models.track import Track
+from .models.visualizer import Visualizer
 from .controllers.player_controller import PlayerController
 from .views.main_window import MainWindow
 from .views.mini_window import MiniWindow
 from .views.system_tray import SystemTray
 from .utils.logger import MusicPlayerLogger
+from .utils.startup_timer import StartupTimer
+from .utils.process_support import enable_freeze_support
 
 
 class MusicPlayerApp:
@@ -24,6 +36,10 @@ class MusicPlayerApp:
     
     def __init__(self):
         """初始化应用"""
+        # 启动各阶段的耗时，首次绘制后输出
+        self.startup = StartupTimer(_STARTUP_BEGIN)
+        self.startup.mark("导入模块")
+        
         # 获取或创建 Qt 应用
         self.app = QApplication.instance()
         if self.app is None:
@@ -32,14 +48,17 @@ class MusicPlayerApp:
         
         # 设置应用图标
         self._set_app_icon()
+        self.startup.mark("创建 Qt 应用")
         
         # 初始化组件
         self.config_manager = ConfigManager()
         self.logger = MusicPlayerLogger(self.config_manager.get_log_file())
         
         self.engine = PlaybackEngine()
+        self.visualizer = Visualizer(self.engine.get_audio_tap())
+        self._visualizer_enabled = True
         self.playlist_manager = PlaylistManager()
-        self.metadata_reader = MetadataReader()
+        self.metadata_reader = MetadataReader(self._open_metadata_store())
         
         self.controller = PlayerController(
             self.engine,
@@ -47,6 +66,7 @@ class MusicPlayerApp:
             self.config_manager,
             self.metadata_reader
         )
+        self.startup.mark("创建播放引擎")
         
         # 创建主窗口
         self.main_window = MainWindow()
@@ -63,17 +83,15 @@ class MusicPlayerApp:
         
         # 当前显示的窗口模式
         self._is_mini_mode = False
+        self._scan_notices = {}  # 扫描编号 -> 读取完成后的提示
+        self.startup.mark("创建窗口")
         
         # 连接信号
         self._connect_signals()
         
-        # 创建进度更新定时器
-        self.progress_timer = QTimer()
-        self.progress_timer.timeout.connect(self._update_progress)
-        self.progress_timer.start(100)
-        
-        # 恢复状态
+        # 恢复状态（不枚举音频设备，恢复的曲目第一次播放时才打开输出流）
         self._restore_state()
+        self.startup.mark("恢复状态")
         
         self.logger.info("音乐播放器启动")
     
@@ -187,12 +205,23 @@ class MusicPlayerApp:
         # 控制器信号
         self.controller.track_changed.connect(self._on_track_changed)
         self.controller.error_occurred.connect(self._on_error)
+        self.controller.waveform_changed.connect(self.main_window.set_waveform)
+        self.controller.scan_progress.connect(self.main_window.set_scan_progress)
+        self.controller.scan_finished.connect(self._on_scan_finished)
+        self.main_window.cancel_scan_requested.connect(self.controller.cancel_scan)
         
         # 播放列表管理器信号
         self.playlist_manager.playlist_changed.connect(self._on_playlist_changed)
         
-        # 播放引擎信号
+        # 播放引擎信号（位置由音频线程按固定间隔推送，不再轮询）
         self.engine.state_changed.connect(self._on_state_changed)
+        self.engine.position_changed.connect(self._update_progress)
+        
+        # 可视化：只在有频谱视图显示时运行
+        self.visualizer.frame_ready.connect(self.main_window.update_spectrum)
+        self.visualizer.frame_ready.connect(self.mini_window.update_spectrum)
+        self.main_window.spectrum_view.visibility_changed.connect(self._update_visualizer)
+        self.mini_window.spectrum_view.visibility_changed.connect(self._update_visualizer)
         
         # 系统托盘信号
         self.system_tray.play_pause_requested.connect(self.controller.play_pause)
@@ -217,12 +246,9 @@ class MusicPlayerApp:
                     files.append(os.path.join(root, filename))
         
         if files:
-            self.controller.add_tracks(files)
-            QMessageBox.information(
-                self.main_window,
-                "成功",
-                f"已添加 {len(files)} 首歌曲"
-            )
+            # 元数据在后台读取，读完后再提示
+            scan_id = self.controller.add_tracks(files)
+            self._scan_notices[scan_id] = "已添加 {} 首歌曲"
             self.logger.info(f"从文件夹添加了 {len(files)} 个文件")
         else:
             QMessageBox.warning(
@@ -231,8 +257,21 @@ class MusicPlayerApp:
                 "该文件夹中没有找到音频文件"
             )
     
+    def _on_scan_finished(self, scan_id: int, added: int, cancelled: bool) -> None:
+        """一次添加的元数据读取完成"""
+        notice = self._scan_notices.pop(scan_id, None)
+        if cancelled:
+            self.logger.info(f"取消添加，已加入 {added} 首")
+        elif notice is not None:
+            QMessageBox.information(
+                self.main_window,
+                "成功",
+                notice.format(added)
+            )
+    
     def _on_clear_playlist(self) -> None:
         """清空播放列表"""
+        self.controller.cancel_scan()
         self.controller.stop()
         self.playlist_manager.clear()
         self.main_window.reset_progress()
@@ -254,12 +293,8 @@ class MusicPlayerApp:
         """加载播放列表"""
         track_paths = self.playlist_manager.load_playlist(file_path)
         if track_paths:
-            self.controller.add_tracks(track_paths)
-            QMessageBox.information(
-                self.main_window,
-                "成功",
-                f"已加载 {len(track_paths)} 首歌曲"
-            )
+            scan_id = self.controller.add_tracks(track_paths)
+            self._scan_notices[scan_id] = "已加载 {} 首歌曲"
             self.logger.info(f"加载播放列表: {file_path}")
     
     def _on_track_changed(self, index: int) -> None:
@@ -271,7 +306,7 @@ class MusicPlayerApp:
                 track.title,
                 track.artist,
                 track.album,
-                track.cover_art
+                self._cover_for(track, MainWindow.COVER_SIZE)
             )
             self.main_window.playlist_view.update_current_track(index)
             
@@ -279,7 +314,7 @@ class MusicPlayerApp:
             self.mini_window.update_now_playing(
                 track.title,
                 track.artist,
-                track.cover_art
+                self._cover_for(track, MiniWindow.COVER_SIZE)
             )
             
             # 更新托盘提示
@@ -311,10 +346,13 @@ class MusicPlayerApp:
         self.logger.error(message, "playback")
         QMessageBox.warning(self.main_window, "错误", message)
     
-    def _update_progress(self) -> None:
-        """更新进度"""
-        if self.engine.is_playing() or self.engine.is_paused():
-            position = self.engine.get_position()
+    def _update_progress(self, position: float) -> None:
+        """更新进度
+        
+        Args:
+            position: 当前位置（秒）
+        """
+        if self.engine.is_loaded():
             duration = self.engine.get_duration()
             self.main_window.update_progress(position, duration)
             
@@ -356,7 +394,7 @@ class MusicPlayerApp:
             self.mini_window.update_now_playing(
                 track.title,
                 track.artist,
-                track.cover_art
+                self._cover_for(track, MiniWindow.COVER_SIZE)
             )
         
         # 同步播放状态
@@ -408,14 +446,49 @@ class MusicPlayerApp:
         
         self.logger.info("切换到正常模式")
     
+    def _update_visualizer(self, *args) -> None:
+        """有频谱视图显示时运行可视化，全部隐藏或最小化时停止（音频回调不再复制数据）"""
+        views = (self.main_window.spectrum_view, self.mini_window.spectrum_view)
+        showing = self._visualizer_enabled and any(view.is_showing() for view in views)
+        self.visualizer.set_running(showing)
+        if not showing:
+            for view in views:
+                view.clear()
+    
     def _quit_application(self) -> None:
         """退出应用"""
         self._save_state()
+        self.controller.shutdown()
+        self.visualizer.set_running(False)
+        # 导出本次运行的回调健康指标，方便和系统日志对照排查爆音
+        try:
+            self.engine.dump_metrics(os.path.join(self.config_manager.config_dir, "metrics.json"))
+        except OSError as e:
+            print(f"⚠️ 导出播放指标失败: {e}")
+        self.engine.shutdown()
+        # 元数据缓存的命中情况，用来调整 metadata_cache 的容量
+        cache_summary = self.metadata_reader.cache.summary()
+        print(f"📚 元数据缓存: {cache_summary}")
+        self.logger.info(f"元数据缓存: {cache_summary}")
         self.logger.info("音乐播放器退出")
         self.app.quit()
     
     def _restore_state(self) -> None:
         """恢复状态"""
+        # 解码相关的设置要在恢复曲目之前生效（例如恢复的曲目才能命中缓存）
+        self.config_manager.load_config()
+        self._setup_pcm_cache()
+        self.engine.set_compact_samples(self.config_manager.get("compact_samples", True))
+        self.engine.set_output_samplerate(self.config_manager.get("output_samplerate"))
+        self.engine.set_latency_profile(self.config_manager.get("latency_profile", "balanced"))
+        self.controller.set_replay_gain_mode(self.config_manager.get("replay_gain", "track"))
+        metadata_cache = self.config_manager.get("metadata_cache", {})
+        self.metadata_reader.cache.resize(int(metadata_cache.get("max_entries", 20000)),
+                                          int(float(metadata_cache.get("max_mb", 16)) * 1024 * 1024))
+        metadata_scan = self.config_manager.get("metadata_scan", {})
+        self.controller.set_scan_workers(int(metadata_scan.get("workers", 0)),
+                                         bool(metadata_scan.get("use_processes", False)))
+        
         # 恢复播放列表和设置
         self.controller.restore_state()
         
@@ -429,6 +502,23 @@ class MusicPlayerApp:
         self.mini_window.volume_slider.setValue(volume)
         self.mini_window.volume_slider.blockSignals(False)
         
+        # 恢复无缝播放和交叉淡化设置
+        self.controller.set_gapless(self.config_manager.get("gapless", True))
+        self.controller.set_crossfade(self.config_manager.get("crossfade", 0.0))
+        
+        # 恢复均衡器
+        equalizer = self.config_manager.get("equalizer", {})
+        if equalizer.get("enabled", False):
+            self.engine.set_equalizer(equalizer.get("bands", []))
+        
+        # 恢复可视化设置
+        visualizer = self.config_manager.get("visualizer", {})
+        self._visualizer_enabled = visualizer.get("enabled", True)
+        self.visualizer.fps = max(1, min(120, visualizer.get("fps", 30)))
+        self.main_window.spectrum_view.setVisible(self._visualizer_enabled)
+        self.mini_window.set_spectrum_visible(self._visualizer_enabled)
+        self._update_visualizer()
+        
         # 恢复播放模式
         mode_str = self.config_manager.get("playback_mode", "sequential")
         try:
@@ -445,7 +535,7 @@ class MusicPlayerApp:
                     track.title,
                     track.artist,
                     track.album,
-                    track.cover_art
+                    self._cover_for(track, MainWindow.COVER_SIZE)
                 )
                 self.main_window.playlist_view.update_current_track(self.controller.current_index)
                 
@@ -458,6 +548,47 @@ class MusicPlayerApp:
                 
                 self.logger.info(f"恢复状态: {track.get_display_name()}, 位置={saved_position:.2f}秒")
     
+    def _cover_for(self, track: Track, size: int):
+        """曲目封面的缩略图（按需解码，同一张封面的缩略图只解码一次）
+        
+        Args:
+            track: 曲目
+            size: 缩略图边长
+        
+        Returns:
+            QPixmap 或 None
+        """
+        return self.metadata_reader.covers.thumbnail(track.cover_id, size)
+    
+    def _open_metadata_store(self) -> Optional[MetadataStore]:
+        """打开持久化的元数据缓存（打不开时只在内存中缓存）
+        
+        Returns:
+            元数据存储或 None
+        """
+        try:
+            return MetadataStore(os.path.join(self.config_manager.get_cache_dir(), "metadata.sqlite3"))
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ 无法打开元数据缓存: {e}")
+            return None
+    
+    def _setup_pcm_cache(self) -> None:
+        """按配置创建解码后 PCM 的磁盘缓存"""
+        cache_config = self.config_manager.get("pcm_cache", {})
+        if not cache_config.get("enabled", True):
+            return
+        
+        try:
+            cache = PCMCache(
+                os.path.join(self.config_manager.get_cache_dir(), "pcm"),
+                max_bytes=int(cache_config.get("max_mb", 1024)) * 1024 * 1024,
+                dtype=cache_config.get("dtype", "float32")
+            )
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"PCM 缓存不可用: {e}")
+            return
+        self.engine.set_pcm_cache(cache)
+    
     def _save_state(self) -> None:
         """保存状态"""
         # 保存音量
@@ -468,10 +599,8 @@ class MusicPlayerApp:
         mode = self.playlist_manager.get_play_mode()
         self.config_manager.set("playback_mode", mode.value)
         
-        # 保存播放列表
-        tracks = self.playlist_manager.get_all_tracks()
-        playlist_paths = [track.file_path for track in tracks]
-        self.config_manager.set("playlist", playlist_paths)
+        # 保存播放列表（包括仍在后台读取元数据、尚未加入列表的文件）
+        self.config_manager.set("playlist", self.controller.playlist_paths())
         
         # 保存当前曲目和播放位置
         self.config_manager.set("current_track_index", self.controller.current_index)
@@ -494,7 +623,26 @@ class MusicPlayerApp:
         """
         # 默认显示主窗口
         self.main_window.show()
+        self.startup.mark("显示窗口")
+        # 零延时定时器在事件循环处理完窗口的显示和绘制事件后触发
+        QTimer.singleShot(0, self._on_first_paint)
         return self.app.exec_()
+    
+    def _on_first_paint(self) -> None:
+        """首次绘制完成：输出启动耗时，然后在后台初始化音频设备"""
+        self.startup.mark("首次绘制")
+        summary = self.startup.summary()
+        print(f"⏱ 启动耗时 {summary}")
+        self.logger.info(f"启动耗时 {summary}")
+        threading.Thread(target=self._warm_up_audio, daemon=True).start()
+    
+    def _warm_up_audio(self) -> None:
+        """后台线程：枚举音频设备并查询采样率（不在启动的关键路径上）"""
+        start = time.perf_counter()
+        self.engine.warm_up_output()
+        seconds = time.perf_counter() - start
+        self.startup.record("音频设备", seconds)
+        print(f"⏱ 音频设备初始化完成（后台）: {seconds * 1000:.0f} ms")
 
 
 def main():
@@ -504,4 +652,5 @@ def main():
 
 
 if __name__ == "__main__":
+    enable_freeze_support()
     main()
@@ -0,0 +1,312 @@
+"""流式音频解码器"""
+
+import threading
+from typing import Optional, Tuple
+import numpy as np
+import soundfile as sf
+
+from .ring_buffer import RingBuffer
+from .pcm_cache import PCMCache
+from .resampler import Resampler
+
+# 紧凑存储：按原始位宽存放的 soundfile 子类型 -> 缓冲区采样格式
+# 24/32 位整数在 numpy 中只能用 int32 存放，并不比 float32 省内存，因此仍按 float32 解码
+COMPACT_DTYPES = {
+    "PCM_S8": "int16",
+    "PCM_U8": "int16",
+    "PCM_16": "int16",
+}
+
+
+class StreamingDecoder:
+    """基于 soundfile.SoundFile 分块读取的流式解码器
+    
+    解码线程按块读取音频，直接写入预分配的 SPSC 环形缓冲区，播放回调只从缓冲区取数据。
+    无论曲目多长，首个声音的延迟和内存占用都是恒定的；解码和回调各按自己的节奏运行。
+    
+    跳转是一个带序号的命令：解码线程处理跳转时记下旧数据的结束位置并确认序号，
+    回调在下一个块边界看到确认后跳过旧数据，从目标帧开始输出。
+    
+    指定 PCM 缓存时，命中的曲目直接从内存映射的缓存文件读取，不再解码；
+    未命中时解码结果会同时写入缓存，完整解码一遍后供下次使用。
+    
+    紧凑模式下，8/16 位的音频按 int16 存放在缓冲区里，回调逐块转换为 float32。
+    需要重采样时也是如此：重采样的浮点输出四舍五入并限幅后写入 int16 缓冲区。
+    
+    指定输出采样率且与文件不同时，解码线程把每块重采样后再写入缓冲区；
+    缓冲区和回调看到的都是输出采样率的帧，position 仍以文件的帧为单位。
+    """
+    
+    def __init__(self, file_path: str, block_frames: int = 4096, buffer_frames: int = 65536,
+                 cache: Optional[PCMCache] = None, compact: bool = False,
+                 output_samplerate: Optional[int] = None):
+        """初始化解码器（只读取文件头，不解码音频）
+        
+        Args:
+            file_path: 音频文件路径
+            block_frames: 每次读取的帧数
+            buffer_frames: 环形缓冲区容量（帧）
+            cache: PCM 缓存，None 表示不使用缓存
+            compact: 是否按原始位宽存放采样
+            output_samplerate: 输出采样率，None 表示与文件相同
+        """
+        self.file_path = file_path
+        self.gain = 1.0  # 响度均衡的线性增益（由播放引擎设置）
+        self._cache_writer = None
+        cached = cache.open(file_path) if cache is not None else None
+        self.from_cache = cached is not None
+        if cached is not None:
+            self._file = cached
+        else:
+            self._file = sf.SoundFile(file_path)
+            if cache is not None:
+                self._cache_writer = cache.create_writer(
+                    file_path, self._file.samplerate, self._file.channels, self._file.frames)
+        self.samplerate: int = self._file.samplerate
+        self.channels: int = self._file.channels
+        self.frames: int = self._file.frames
+        
+        self._block_frames = block_frames
+        self._write_frames = block_frames  # 每块写入缓冲区前需要的空闲帧数
+        self.output_samplerate: int = output_samplerate or self.samplerate
+        self._resampler: Optional[Resampler] = None
+        self._scratch: Optional[np.ndarray] = None
+        if self.output_samplerate != self.samplerate:
+            self._resampler = Resampler(self.samplerate, self.output_samplerate, self.channels)
+            self._scratch = np.zeros((block_frames, self.channels), dtype=np.float32)
+            self._write_frames = self._resampler.max_output(block_frames)
+        
+        self._sample_dtype = "float32"
+        if compact:
+            self._sample_dtype = COMPACT_DTYPES.get(getattr(self._file, "subtype", ""), "float32")
+        self._ring = RingBuffer(max(buffer_frames, self._write_frames), self.channels, self._sample_dtype)
+        self._quantize: Optional[Tuple[float, int, int]] = None  # 重采样输出写入整数缓冲区时的 (缩放, 下限, 上限)
+        if self._resampler is not None and self._ring.dtype.kind == "i":
+            info = np.iinfo(self._ring.dtype)
+            self._quantize = (float(info.max + 1), info.min, info.max)
+        
+        # 跳转请求：(序号, 目标帧)，整体赋值保证线程间读取的一致性
+        self._seek_request: Tuple[int, int] = (0, 0)
+        
+        # 解码线程确认的跳转：(序号, 旧数据结束的写入序号, 目标帧)
+        self._seek_ack: Tuple[int, int, int] = (-1, 0, 0)
+        self._eof_serial = -1  # 已解码到文件末尾的跳转序号
+        self._decode_frame = 0  # 解码线程下一次读取的帧（只由解码线程访问）
+        
+        # 回调侧的读取状态（只由回调线程访问）
+        self._read_serial = -1
+        self._base_index = 0
+        self._base_frame = 0
+        self._primed = False  # 跳转后是否已拿到第一块数据
+        self._position = 0
+        
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+    
+    @property
+    def duration(self) -> float:
+        """时长（秒）"""
+        return self.frames / self.samplerate if self.samplerate else 0.0
+    
+    @property
+    def position(self) -> int:
+        """回调下一次将要读取的帧"""
+        return self._position
+    
+    @property
+    def ring(self) -> RingBuffer:
+        """解码器与回调之间的环形缓冲区"""
+        return self._ring
+    
+    def memory_usage(self) -> dict:
+        """统计解码器占用的内存
+        
+        Returns:
+            包含采样格式、缓冲区字节数（Python 堆）和映射的缓存文件字节数（页缓存）的字典
+        """
+        return {
+            "file": self.file_path,
+            "sample_dtype": self._sample_dtype,
+            "buffer_bytes": self._ring.nbytes,
+            "mapped_bytes": self._file.nbytes if self.from_cache else 0,
+        }
+    
+    def is_primed(self) -> bool:
+        """跳转（或开始）后是否已经输出过数据，用于区分欠载和正常的起播等待
+        
+        Returns:
+            是否已输出过数据
+        """
+        return self._primed
+    
+    def start(self, start_frame: int = 0) -> None:
+        """从指定帧开始解码（解码线程已在运行时等同于跳转）
+        
+        Args:
+            start_frame: 起始帧
+        """
+        self.seek(start_frame)
+        
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self._thread.start()
+    
+    def seek(self, frame: int) -> None:
+        """请求跳转到指定帧（可在任意线程调用，不阻塞）
+        
+        回调会在下一个块边界丢弃旧数据，从目标帧开始输出。
+        
+        Args:
+            frame: 目标帧
+        """
+        frame = max(0, min(int(frame), self.frames))
+        self._seek_request = (self._seek_request[0] + 1, frame)
+        self._position = frame
+        self._wake_event.set()
+    
+    def stop(self) -> None:
+        """停止解码线程"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+    
+    def close(self) -> None:
+        """停止解码并关闭文件（完整解码过的曲目在这里加入缓存）"""
+        self.stop()
+        if self._cache_writer is not None:
+            self._cache_writer.close()
+            self._cache_writer = None
+        try:
+            self._file.close()
+        except Exception:
+            pass
+    
+    def read_into(self, out: np.ndarray, gain: float) -> int:
+        """把缓冲区中的音频乘以增益后直接写入 out（供音频回调使用，不分配内存）
+        
+        Args:
+            out: 目标缓冲区，形状为 (帧数, 声道数)
+            gain: 增益
+        
+        Returns:
+            实际写入的帧数，小于 len(out) 表示缓冲区已空
+        """
+        serial = self._seek_request[0]
+        if self._read_serial != serial:
+            # 等待解码线程确认跳转，然后跳过跳转前写入的旧数据
+            ack_serial, stale_end, frame = self._seek_ack
+            if ack_serial != serial:
+                return 0
+            self._ring.skip_to(stale_end)
+            self._read_serial = serial
+            self._base_index = stale_end
+            self._base_frame = frame
+            self._primed = False
+        
+        if not self._primed and self._ring.available_read() == 0:
+            return 0
+        
+        written = self._ring.read_into(out, gain)
+        if written:
+            self._primed = True
+            played = self._ring.read_index - self._base_index
+            if self._resampler is not None:
+                played = played * self.samplerate // self.output_samplerate
+            self._position = self._base_frame + played
+        return written
+    
+    def is_exhausted(self) -> bool:
+        """是否已解码到文件末尾且缓冲区已取空
+        
+        Returns:
+            是否已耗尽
+        """
+        serial = self._seek_request[0]
+        return (self._eof_serial == serial and self._read_serial == serial
+                and self._ring.available_read() == 0)
+    
+    def _decode_loop(self) -> None:
+        """解码线程：按块读取并直接写入环形缓冲区"""
+        ring = self._ring
+        try:
+            while not self._stop_event.is_set():
+                serial, frame = self._seek_request
+                if serial != self._seek_ack[0]:
+                    # 处理跳转：此前写入的数据全部作废，回调会跳过它们
+                    self._file.seek(frame)
+                    self._decode_frame = frame
+                    if self._resampler is not None:
+                        self._resampler.reset()
+                    ring.end_of_stream = False
+                    self._seek_ack = (serial, ring.write_index, frame)
+                
+                if self._eof_serial == serial:
+                    # 已到文件末尾，阻塞等待跳转或停止
+                    self._wake_event.wait()
+                    self._wake_event.clear()
+                    continue
+                
+                if ring.available_write() < self._write_frames:
+                    # 缓冲区已满，等回调消费大约半个块的时间再看；
+                    # 刚跳转时回调很快会跳过旧数据，这时要尽快开始填充
+                    if ring.read_index < self._seek_ack[1]:
+                        timeout = 0.002
+                    else:
+                        timeout = self._block_frames / self.samplerate / 2
+                    self._wake_event.wait(timeout)
+                    self._wake_event.clear()
+                    continue
+                
+                if self._resampler is None:
+                    # 直接解码到环形缓冲区（回绕时分两段读取）
+                    regions = ring.write_regions(self._block_frames)
+                    count = 0
+                    for region in regions:
+                        if len(region) == 0:
+                            continue
+                        read = len(self._file.read(dtype=self._sample_dtype, always_2d=True, out=region))
+                        count += read
+                        if read < len(region):
+                            break
+                    first, second = regions
+                    decoded = (first[:count], second[:max(0, count - len(first))])
+                else:
+                    # 先解码到暂存区，重采样后再写入
+                    block = self._file.read(dtype='float32', always_2d=True, out=self._scratch)
+                    count = len(block)
+                    decoded = (block,)
+                
+                # 解码结果同时写入缓存（即使这一块因跳转作废，数据本身仍然有效）
+                writer = self._cache_writer
+                if writer is not None:
+                    writer.write(self._decode_frame, *decoded)
+                    if count < self._block_frames:
+                        writer.mark_end(self._decode_frame + count)
+                self._decode_frame += count
+                
+                if self._seek_request[0] != serial:
+                    # 解码期间来了新的跳转，这一块直接作废
+                    continue
+                
+                if self._resampler is None:
+                    ring.commit_write(count)
+                else:
+                    output = self._resampler.process(decoded[0], final=count < self._block_frames)
+                    if self._quantize is not None:
+                        # 按回调转换时的比例还原为整数，插值产生的过冲限幅到整数范围内
+                        scale, low, high = self._quantize
+                        np.multiply(output, scale, out=output)
+                        np.rint(output, out=output)
+                        np.clip(output, low, high, out=output)
+                    ring.write(output)
+                if count < self._block_frames:
+                    ring.end_of_stream = True
+                    self._eof_serial = serial
+        except Exception as e:
+            print(f"❌ 解码错误: {e} - {self.file_path}")
+            ring.end_of_stream = True
+            self._eof_serial = self._seek_request[0]
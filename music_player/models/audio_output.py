@@ -0,0 +1,339 @@
+"""音频输出后端
+
+播放引擎只依赖这里的后端接口：open_stream() 返回一个具有 start/stop/abort/close 和
+active、time、latency 属性的输出流，流在自己的线程里按块调用回调 callback(outdata, frames, time_info, status)。
+time_info.outputBufferDacTime 和 stream.time 使用同一个时钟，引擎据此推算当前听到的位置。
+
+- SoundDeviceBackend: 通过 sounddevice 输出到声卡
+- NullBackend: 丢弃音频，按实时速度驱动回调（没有声卡的构建机/基准机）
+- WavFileBackend: 把回调输出写入 WAV 文件（回归测试可以逐采样比对）
+"""
+
+import importlib.util
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+import numpy as np
+import soundfile as sf
+
+# sounddevice 在导入时初始化 PortAudio，枚举所有宿主 API 和设备（USB/蓝牙设备多时很慢），
+# 所以推迟到第一次真正需要声卡时再导入，不挡在启动和首次绘制的路径上
+sd = None
+_sd_error: Optional[str] = None
+_sd_lock = threading.Lock()
+
+
+def _load_sounddevice():
+    """按需导入 sounddevice（只导入一次，多线程同时调用时只有一个线程真正导入）
+    
+    Returns:
+        sounddevice 模块，未安装或找不到 PortAudio 库时返回 None
+    """
+    global sd, _sd_error
+    with _sd_lock:
+        if sd is None and _sd_error is None:
+            try:
+                import sounddevice
+                sd = sounddevice
+            except (ImportError, OSError) as e:  # 未安装或找不到 PortAudio 库
+                _sd_error = str(e)
+        return sd
+
+
+class StreamTime:
+    """线程驱动的输出流传给回调的时间信息（字段名与 sounddevice 一致）"""
+    
+    __slots__ = ("currentTime", "outputBufferDacTime", "inputBufferAdcTime")
+    
+    def __init__(self):
+        self.currentTime = 0.0
+        self.outputBufferDacTime = 0.0
+        self.inputBufferAdcTime = 0.0
+
+
+class OutputBackend:
+    """输出后端基类"""
+    
+    name = "base"
+    
+    def open_stream(self, device: Optional[int], samplerate: int, channels: int,
+                    blocksize: int, callback: Callable, latency: Union[str, float, None] = None):
+        """打开输出流（不启动）
+        
+        Args:
+            device: 设备索引，None 表示默认设备
+            samplerate: 采样率
+            channels: 声道数
+            blocksize: 每次回调的帧数
+            callback: 音频回调
+            latency: 建议的设备延迟，'low' / 'high' 或秒数，None 表示后端默认
+        
+        Returns:
+            输出流对象
+        """
+        raise NotImplementedError
+    
+    def default_samplerate(self, device: Optional[int]) -> Optional[int]:
+        """设备的默认（原生）采样率
+        
+        Args:
+            device: 设备索引，None 表示默认设备
+        
+        Returns:
+            采样率，无法确定时返回 None
+        """
+        return None
+    
+    def warm_up(self) -> None:
+        """提前完成耗时的初始化（可以在后台线程调用，之后第一次打开输出流不必再等）"""
+        pass
+
+
+class SoundDeviceBackend(OutputBackend):
+    """通过 sounddevice 输出到声卡"""
+    
+    name = "sounddevice"
+    
+    def __init__(self):
+        """初始化后端（不访问音频设备，设备在第一次使用时才枚举）"""
+        super().__init__()
+        self._devices: Optional[List[dict]] = None
+        self._samplerates: Dict[Optional[int], Optional[int]] = {}
+        self._fallback: Optional[OutputBackend] = None
+        self._lock = threading.Lock()
+    
+    def devices(self) -> List[dict]:
+        """所有音频设备（第一次调用时枚举并缓存）
+        
+        Returns:
+            设备信息列表，sounddevice 不可用时为空列表
+        """
+        with self._lock:
+            if self._devices is None:
+                module = self._module()
+                if module is None:
+                    self._devices = []
+                else:
+                    self._devices = list(module.query_devices())
+                    print(f"✓ SoundDevice 音频引擎初始化成功")
+                    print(f"ℹ️ 找到 {len(self._devices)} 个音频设备")
+            return self._devices
+    
+    def refresh_devices(self) -> None:
+        """清除设备缓存（插拔设备后调用，下次使用时重新枚举）"""
+        with self._lock:
+            self._devices = None
+            self._samplerates.clear()
+    
+    def warm_up(self) -> None:
+        """在后台完成 PortAudio 初始化、设备枚举和默认设备采样率的查询"""
+        self.devices()
+        self.default_samplerate(None)
+    
+    def default_samplerate(self, device):
+        with self._lock:
+            if device in self._samplerates:
+                return self._samplerates[device]
+        module = self._module()
+        samplerate = None
+        if module is not None:
+            try:
+                samplerate = int(module.query_devices(device, 'output')['default_samplerate'])
+            except Exception as e:
+                print(f"⚠️ 无法获取设备采样率: {e}")
+        with self._lock:
+            self._samplerates[device] = samplerate
+        return samplerate
+    
+    def open_stream(self, device, samplerate, channels, blocksize, callback, latency=None):
+        module = self._module()
+        if module is None:
+            # 没有声卡可用时退回空输出，播放流程照常进行
+            if self._fallback is None:
+                print(f"⚠️ SoundDevice 初始化失败，使用空输出: {_sd_error}")
+                self._fallback = NullBackend()
+            return self._fallback.open_stream(device, samplerate, channels, blocksize, callback, latency)
+        return module.OutputStream(
+            device=device,
+            samplerate=samplerate,
+            channels=channels,
+            callback=callback,
+            blocksize=blocksize,
+            dtype='float32',
+            latency=latency
+        )
+    
+    def _module(self):
+        """sounddevice 模块（按需导入）"""
+        return _load_sounddevice()
+
+
+class _ThreadedStream:
+    """由后台线程驱动回调的输出流（模拟声卡的拉取节奏）"""
+    
+    def __init__(self, samplerate: int, channels: int, blocksize: int,
+                 callback: Callable, realtime: bool = True):
+        """初始化输出流
+        
+        Args:
+            samplerate: 采样率
+            channels: 声道数
+            blocksize: 每次回调的帧数
+            callback: 音频回调
+            realtime: 是否按实时速度调用回调（否则尽快调用）
+        """
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self._callback = callback
+        self._realtime = realtime
+        self._outdata = np.zeros((blocksize, channels), dtype=np.float32)
+        self._time_info = StreamTime()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._frames_played = 0
+        self._epoch = time.perf_counter()  # 流时钟的零点（重新启动时按已输出的帧数顺延）
+        self.latency = 0.0  # 回调输出的块立即被消费，没有设备缓冲
+    
+    @property
+    def active(self) -> bool:
+        """是否正在运行"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def time(self) -> float:
+        """流时钟（秒）：实时模式下随墙上时间推进，否则随已输出的帧数推进"""
+        if self._realtime and self.active:
+            return time.perf_counter() - self._epoch
+        return self._frames_played / self.samplerate
+    
+    def start(self) -> None:
+        """启动输出流"""
+        if self.active:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """停止输出流"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+    
+    def abort(self) -> None:
+        """立即停止输出流"""
+        self.stop()
+    
+    def close(self) -> None:
+        """关闭输出流"""
+        self.stop()
+    
+    def _consume(self, outdata: np.ndarray) -> None:
+        """处理回调产生的一块音频（子类实现）
+        
+        Args:
+            outdata: 本块音频
+        """
+        pass
+    
+    def _run(self) -> None:
+        """驱动线程：按块调用回调"""
+        period = self.blocksize / self.samplerate
+        time_info = self._time_info
+        start = time.perf_counter()
+        self._epoch = start - self._frames_played / self.samplerate
+        next_deadline = start
+        while not self._stop_event.is_set():
+            time_info.currentTime = self.time
+            time_info.outputBufferDacTime = self._frames_played / self.samplerate
+            self._callback(self._outdata, self.blocksize, time_info, None)
+            self._consume(self._outdata)
+            self._frames_played += self.blocksize
+            
+            if self._realtime:
+                # 按绝对时间推进，避免误差累积；落后太多时重新对齐
+                next_deadline += period
+                delay = next_deadline - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                elif delay < -period * 4:
+                    next_deadline = time.perf_counter()
+
+
+class NullBackend(OutputBackend):
+    """空输出：丢弃音频，按实时速度驱动回调"""
+    
+    name = "null"
+    
+    def __init__(self, realtime: bool = True):
+        """初始化后端
+        
+        Args:
+            realtime: 是否按实时速度调用回调
+        """
+        super().__init__()
+        self.realtime = realtime
+    
+    def open_stream(self, device, samplerate, channels, blocksize, callback, latency=None):
+        return _ThreadedStream(samplerate, channels, blocksize,
+                               callback, self.realtime)
+
+
+class _WavFileStream(_ThreadedStream):
+    """把回调输出写入 WAV 文件的输出流"""
+    
+    def __init__(self, file_path: str, samplerate: int, channels: int, blocksize: int,
+                 callback: Callable, realtime: bool):
+        super().__init__(samplerate, channels, blocksize, callback, realtime)
+        self._file = sf.SoundFile(file_path, 'w', samplerate=samplerate,
+                                  channels=channels, subtype='FLOAT')
+    
+    def _consume(self, outdata: np.ndarray) -> None:
+        self._file.write(outdata)
+    
+    def close(self) -> None:
+        super().close()
+        if not self._file.closed:
+            self._file.close()
+
+
+class WavFileBackend(OutputBackend):
+    """文件输出：把回调输出写入 32 位浮点 WAV 文件
+    
+    每次打开输出流都会重新创建文件。非实时模式下回调会尽快运行，
+    解码跟不上时输出的静音也会被写入文件。
+    """
+    
+    name = "wav"
+    
+    def __init__(self, file_path: str, realtime: bool = True):
+        """初始化后端
+        
+        Args:
+            file_path: 输出文件路径
+            realtime: 是否按实时速度调用回调
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.realtime = realtime
+    
+    def open_stream(self, device, samplerate, channels, blocksize, callback, latency=None):
+        return _WavFileStream(self.file_path, samplerate, channels, blocksize,
+                              callback, self.realtime)
+
+
+def create_default_backend() -> OutputBackend:
+    """创建默认后端：优先使用声卡，不可用时退回空输出
+    
+    这里只检查 sounddevice 是否已安装，不导入也不枚举设备；
+    已安装但找不到 PortAudio 库时，第一次打开输出流时退回空输出。
+    
+    Returns:
+        输出后端
+    """
+    if sd is None and importlib.util.find_spec("sounddevice") is None:
+        print("⚠️ 未安装 sounddevice，使用空输出")
+        return NullBackend()
+    return SoundDeviceBackend()
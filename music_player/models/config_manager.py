@@ -18,6 +18,7 @@ class ConfigManager:
         self.config_file = os.path.join(self.config_dir, "config.json")
         self.playlists_dir = os.path.join(self.config_dir, "playlists")
         self.log_file = os.path.join(self.config_dir, "music_player.log")
+        self.cache_dir = os.path.join(self.config_dir, "cache")
         self._config: Dict[str, Any] = {}
         
         # 确保目录存在
@@ -98,6 +99,14 @@ class ConfigManager:
         """
         return self.log_file
     
+    def get_cache_dir(self) -> str:
+        """获取缓存目录路径
+        
+        Returns:
+            缓存目录路径
+        """
+        return self.cache_dir
+    
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认配置
         
@@ -111,8 +120,31 @@ class ConfigManager:
             "current_track_index": -1,
             "current_position": 0.0,
             "playlist": [],
+            "gapless": True,
+            "crossfade": 0.0,
+            "compact_samples": True,
+            "output_samplerate": None,
+            "latency_profile": "balanced",
+            "replay_gain": "track",
+            "pcm_cache": {
+                "enabled": True,
+                "max_mb": 1024,
+                "dtype": "float32"
+            },
             "equalizer": {
                 "enabled": False,
                 "bands": [0.0, 0.0, 0.0, 0.0, 0.0]
+            },
+            "visualizer": {
+                "enabled": True,
+                "fps": 30
+            },
+            "metadata_scan": {
+                "workers": 0,
+                "use_processes": False
+            },
+            "metadata_cache": {
+                "max_entries": 20000,
+                "max_mb": 16
             }
         }
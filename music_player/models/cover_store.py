@@ -0,0 +1,137 @@
+"""封面存储
+
+封面按图片数据的 SHA-1 只保存一份：有 MetadataStore 时原始数据保存在它的 covers 表里，
+曲目只记录哈希。显示时才按需解码成指定大小的缩略图，缩略图放在容量有限的 LRU 里，
+同一专辑的所有曲目共用同一张缩略图。
+
+内存中的原始数据按字节数限制大小，最久未使用的先淘汰：有存储时只是写入前的暂存，淘汰后从存储读取；
+没有存储时（存储无法打开）就是唯一的一份，淘汰后要等重新扫描该曲目才能再显示封面。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from PySide6.QtCore import QByteArray, Qt
+from PySide6.QtGui import QImage, QPixmap
+
+from .metadata_store import MetadataStore
+
+MAX_THUMBNAILS = 64  # 缓存的缩略图数
+MAX_PENDING_BYTES = 32 * 1024 * 1024  # 有存储时暂存的原始数据上限（新解析的封面写入存储前可能就要显示）
+MAX_MEMORY_BYTES = 64 * 1024 * 1024  # 没有存储时内存中原始数据的上限
+
+
+class CoverStore:
+    """按内容哈希保存封面原始数据，按需解码缩略图
+    
+    add() 和 data() 可以在任意线程调用；thumbnail() 创建 QPixmap，只能在界面线程调用。
+    """
+    
+    def __init__(self, store: Optional[MetadataStore] = None, max_thumbnails: int = MAX_THUMBNAILS,
+                 max_bytes: Optional[int] = None):
+        """初始化封面存储
+        
+        Args:
+            store: 持久化存储（封面数据在它的 covers 表里），None 表示只保存在内存中
+            max_thumbnails: 缓存的缩略图数
+            max_bytes: 内存中原始数据的上限（字节），None 表示按有无存储取 MAX_PENDING_BYTES 或 MAX_MEMORY_BYTES
+        """
+        self._store = store
+        self.max_thumbnails = max_thumbnails
+        if max_bytes is None:
+            max_bytes = MAX_PENDING_BYTES if store is not None else MAX_MEMORY_BYTES
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._raw: "OrderedDict[str, bytes]" = OrderedDict()  # 哈希 -> 原始数据（最近使用的在后）
+        self._raw_bytes = 0
+        self.evictions = 0
+        self._thumbnails: "OrderedDict[Tuple[str, int], Optional[QPixmap]]" = OrderedDict()
+    
+    def add(self, cover_id: str, data: bytes) -> None:
+        """登记一张封面的原始数据（相同哈希只保存一份）
+        
+        Args:
+            cover_id: 图片数据的 SHA-1
+            data: 图片文件的字节
+        """
+        with self._lock:
+            if cover_id in self._raw:
+                self._raw.move_to_end(cover_id)
+                return
+            self._raw[cover_id] = data
+            self._raw_bytes += len(data)
+            # 超出上限时丢掉最久未使用的（至少保留刚加入的一份）
+            while self._raw_bytes > self.max_bytes and len(self._raw) > 1:
+                _, evicted = self._raw.popitem(last=False)
+                self._raw_bytes -= len(evicted)
+                self.evictions += 1
+    
+    def data(self, cover_id: str) -> Optional[bytes]:
+        """读取封面的原始数据
+        
+        Args:
+            cover_id: 图片数据的 SHA-1
+        
+        Returns:
+            图片文件的字节，找不到时返回 None
+        """
+        with self._lock:
+            data = self._raw.get(cover_id)
+            if data is not None:
+                self._raw.move_to_end(cover_id)
+        if data is None and self._store is not None:
+            data = self._store.get_cover(cover_id)
+        return data
+    
+    def thumbnail(self, cover_id: Optional[str], size: int) -> Optional[QPixmap]:
+        """取得缩略图（按需解码并缩放，结果放入 LRU）
+        
+        Args:
+            cover_id: 图片数据的 SHA-1，None 表示没有封面
+            size: 缩略图的边长（像素，保持宽高比）
+        
+        Returns:
+            缩略图，没有封面或无法解码时返回 None
+        """
+        if not cover_id:
+            return None
+        key = (cover_id, size)
+        if key in self._thumbnails:
+            self._thumbnails.move_to_end(key)
+            return self._thumbnails[key]
+        
+        pixmap = None
+        data = self.data(cover_id)
+        if data:
+            image = QImage()
+            if image.loadFromData(QByteArray(data)):
+                image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+                pixmap = QPixmap.fromImage(image)
+        if pixmap is None and data is None:
+            return None  # 可能还没写入存储，不缓存失败结果
+        
+        self._thumbnails[key] = pixmap
+        while len(self._thumbnails) > self.max_thumbnails:
+            self._thumbnails.popitem(last=False)
+        return pixmap
+    
+    def clear_thumbnails(self) -> None:
+        """清空缩略图缓存"""
+        self._thumbnails.clear()
+    
+    def stats(self) -> dict:
+        """缓存状况
+        
+        Returns:
+            {"thumbnails": 缩略图数, "pending": 内存中的封面数, "pending_bytes": 内存中的字节数,
+             "max_bytes": 字节数上限, "evictions": 淘汰次数}
+        """
+        with self._lock:
+            return {
+                "thumbnails": len(self._thumbnails),
+                "pending": len(self._raw),
+                "pending_bytes": self._raw_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
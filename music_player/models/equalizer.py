@@ -0,0 +1,340 @@
+"""多段均衡器
+
+5 段均衡器：低频搁架 + 3 个峰值滤波 + 高频搁架（RBJ 双二阶滤波器级联）。
+
+递归的双二阶滤波无法按块向量化，所以这里把级联的频率响应截断成最小相位的 FIR，
+在音频回调中用 FFT 重叠相加（overlap-add）整块处理。所有缓冲区在 configure() 中预分配，
+频率响应预先展开成 (频点, 声道) 的形状，淡化曲线按块长预先算好，回调中的运算都写入
+这些缓冲区，不分配数组。FFT 用 float64 计算：NumPy 2 的 float32 rfft 即使给了 out=
+每次也会分配内部工作区，float64 的 rfft/irfft 则直接写入 out=（NumPy 1.x 没有 out= 参数，
+只能退回每次分配）。
+
+系数（FFT 域的频率响应）按 (采样率, 各段增益) 缓存。修改增益时，新响应在下一个块生效，
+新旧滤波器的输出在这一块内交叉淡化；新滤波器的重叠尾部由最近的输入历史补算，
+因此切换没有断点或咔嗒声。
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# 各段的 (类型, 中心频率 Hz)
+BANDS: Tuple[Tuple[str, float], ...] = (
+    ("lowshelf", 60.0),
+    ("peaking", 230.0),
+    ("peaking", 910.0),
+    ("peaking", 3600.0),
+    ("highshelf", 14000.0),
+)
+BAND_Q = 1.0  # 峰值滤波的 Q 值
+MAX_GAIN_DB = 12.0  # 每段增益的范围（±dB）
+
+try:
+    np.fft.rfft(np.zeros(4, dtype=np.float32), out=np.zeros(3, dtype=np.complex64))
+    _FFT_HAS_OUT = True
+except TypeError:  # NumPy 1.x 的 FFT 没有 out= 参数
+    _FFT_HAS_OUT = False
+
+
+def _biquad(kind: str, freq: float, gain_db: float, samplerate: int) -> Tuple[np.ndarray, np.ndarray]:
+    """计算 RBJ 双二阶滤波器系数
+    
+    Args:
+        kind: 滤波器类型（lowshelf/peaking/highshelf）
+        freq: 中心（转折）频率
+        gain_db: 增益（dB）
+        samplerate: 采样率
+    
+    Returns:
+        (b, a) 两组系数
+    """
+    a_gain = 10 ** (gain_db / 40)
+    w0 = 2 * np.pi * min(freq, samplerate * 0.45) / samplerate
+    cos_w0 = np.cos(w0)
+    if kind == "peaking":
+        alpha = np.sin(w0) / (2 * BAND_Q)
+        b = [1 + alpha * a_gain, -2 * cos_w0, 1 - alpha * a_gain]
+        a = [1 + alpha / a_gain, -2 * cos_w0, 1 - alpha / a_gain]
+    else:
+        # 搁架滤波器使用 S = 1 的斜率
+        alpha = np.sin(w0) / 2 * np.sqrt(2)
+        k = 2 * np.sqrt(a_gain) * alpha
+        sign = 1 if kind == "lowshelf" else -1
+        b = [a_gain * ((a_gain + 1) - sign * (a_gain - 1) * cos_w0 + k),
+             sign * 2 * a_gain * ((a_gain - 1) - sign * (a_gain + 1) * cos_w0),
+             a_gain * ((a_gain + 1) - sign * (a_gain - 1) * cos_w0 - k)]
+        a = [(a_gain + 1) + sign * (a_gain - 1) * cos_w0 + k,
+             -sign * 2 * ((a_gain - 1) + sign * (a_gain + 1) * cos_w0),
+             (a_gain + 1) + sign * (a_gain - 1) * cos_w0 - k]
+    return np.array(b), np.array(a)
+
+
+def filter_taps(samplerate: int) -> int:
+    """FIR 长度：覆盖约 20 毫秒（足够 60Hz 搁架滤波器的冲激响应衰减），取 2 的幂
+    
+    Args:
+        samplerate: 采样率
+    
+    Returns:
+        FIR 长度
+    """
+    return 1 << int(np.ceil(np.log2(samplerate * 0.02)))
+
+
+@lru_cache(maxsize=32)
+def frequency_response(samplerate: int, gains: Tuple[float, ...], channels: int = 1) -> np.ndarray:
+    """计算均衡器在 FFT 网格上的频率响应（含自动前级衰减，避免削波）
+    
+    Args:
+        samplerate: 采样率
+        gains: 各段增益（dB）
+        channels: 声道数（每个声道一列相同的响应，回调中相乘时不需要广播）
+    
+    Returns:
+        形状为 (fft_size // 2 + 1, channels) 的只读 complex128 数组，fft_size 为 filter_taps 的 2 倍
+    """
+    taps = filter_taps(samplerate)
+    dense = taps * 8
+    
+    # 在密集网格上计算级联滤波器的响应
+    z_inv = np.exp(-1j * np.pi * np.arange(dense // 2 + 1) / (dense // 2))
+    response = np.ones(dense // 2 + 1, dtype=np.complex128)
+    for (kind, freq), gain in zip(BANDS, gains):
+        if gain == 0:
+            continue
+        b, a = _biquad(kind, freq, gain, samplerate)
+        response *= (b[0] + b[1] * z_inv + b[2] * z_inv ** 2) / (a[0] + a[1] * z_inv + a[2] * z_inv ** 2)
+    
+    # 截断冲激响应（级联本身是最小相位的，能量集中在开头），尾部加半个汉宁窗平滑
+    impulse = np.fft.irfft(response, dense)[:taps]
+    fade = taps // 4
+    impulse[-fade:] *= np.hanning(2 * fade)[fade:]
+    
+    fir = np.fft.rfft(impulse, taps * 2)
+    
+    # 自动前级：把最大增益压到 0dB 以下
+    peak = np.abs(fir).max()
+    if peak > 1.0:
+        fir /= peak
+    
+    fir = np.repeat(fir.reshape(-1, 1), channels, axis=1)
+    fir.setflags(write=False)
+    return fir
+
+
+class Equalizer:
+    """块处理的 FFT 重叠相加均衡器
+    
+    set_bands() 可在任意线程调用；process() 只在音频回调中调用。
+    """
+    
+    def __init__(self):
+        """初始化均衡器（默认为直通）"""
+        self._gains: Tuple[float, ...] = (0.0,) * len(BANDS)
+        self._samplerate = 0
+        self._channels = 0
+        
+        # 当前生效的频率响应（None 表示直通）
+        self._response: Optional[np.ndarray] = None
+        
+        # 切换请求：(序号, 新响应)，整体赋值；回调记下已应用的序号，不会丢失并发的修改
+        self._request: Tuple[int, Optional[np.ndarray]] = (0, None)
+        self._applied = 0
+    
+    @property
+    def gains(self) -> List[float]:
+        """各段增益（dB）"""
+        return list(self._gains)
+    
+    def is_active(self) -> bool:
+        """是否需要处理（非直通，或正在切换）
+        
+        Returns:
+            是否需要处理
+        """
+        return self._response is not None or self._request[0] != self._applied
+    
+    def set_bands(self, gains: Sequence[float]) -> None:
+        """设置各段增益（下一个块生效，并与当前响应交叉淡化）
+        
+        Args:
+            gains: 各段增益（dB），多余的忽略，不足的补 0
+        """
+        gains = [max(-MAX_GAIN_DB, min(MAX_GAIN_DB, float(g))) for g in gains[:len(BANDS)]]
+        gains += [0.0] * (len(BANDS) - len(gains))
+        self._gains = tuple(gains)
+        if self._samplerate:
+            self._request = (self._request[0] + 1, self._response_for(self._gains))
+    
+    def configure(self, samplerate: int, channels: int, max_block: int) -> None:
+        """按输出流格式分配缓冲区（打开输出流时调用，不在回调中调用）
+        
+        Args:
+            samplerate: 采样率
+            channels: 声道数
+            max_block: 回调的最大块大小
+        """
+        self._samplerate = samplerate
+        self._channels = channels
+        self._taps = filter_taps(samplerate)
+        self._fft_size = self._taps * 2
+        self._tail_len = self._taps - 1
+        self._hop = self._fft_size - self._tail_len  # 每次 FFT 最多处理的帧数
+        
+        bins = self._fft_size // 2 + 1
+        self._padded = np.zeros((self._fft_size, channels))
+        self._spectrum = np.zeros((bins, channels), dtype=np.complex128)
+        self._spectrum_new = np.zeros((bins, channels), dtype=np.complex128)
+        self._output = np.zeros((self._fft_size, channels))
+        self._output_new = np.zeros((self._fft_size, channels))
+        self._tail = np.zeros((self._tail_len, channels))
+        self._tail_new = np.zeros((self._tail_len, channels))
+        self._history = np.zeros((self._tail_len, channels))
+        self._history_new = np.zeros((self._tail_len, channels))
+        
+        # 淡化曲线：按 max_block 切出的各段长度预先算好；其他长度在回调中就地写入 _ramp_scratch
+        self._ramp_steps = np.repeat(np.arange(self._hop, dtype=np.float64).reshape(-1, 1), channels, axis=1)
+        self._ramp_scratch = np.zeros((self._hop, channels))
+        self._ramps = {}
+        chunk = min(max_block, self._hop)
+        for length in {chunk, max_block % self._hop if max_block > self._hop else chunk}:
+            if length:
+                self._ramps[length] = self._ramp_steps[:length] / max(length - 1, 1)
+        
+        self._response = None
+        self._request = (self._request[0] + 1, self._response_for(self._gains))
+    
+    def process(self, block: np.ndarray) -> None:
+        """原地处理一块音频（供音频回调使用）
+        
+        Args:
+            block: 形状为 (帧数, 声道数) 的 float32 数组
+        """
+        for start in range(0, len(block), self._hop):
+            self._process_chunk(block[start:start + self._hop])
+    
+    def _response_for(self, gains: Tuple[float, ...]) -> Optional[np.ndarray]:
+        """取得（缓存的）频率响应，全部为 0dB 时返回 None 表示直通"""
+        if not any(gains):
+            return None
+        return frequency_response(self._samplerate, gains, self._channels)
+    
+    def _process_chunk(self, chunk: np.ndarray) -> None:
+        """处理不超过 hop 帧的一段"""
+        length = len(chunk)
+        switching = False
+        serial, new_response = self._request
+        if serial != self._applied:
+            self._applied = serial
+            if new_response is not self._response:
+                switching = True
+                self._prime_tail(new_response)
+        
+        old_response = self._response
+        padded = self._padded
+        padded[:length] = chunk
+        padded[length:].fill(0)
+        self._push_history(chunk)
+        
+        if old_response is not None or switching:
+            self._forward(padded)
+        
+        if not switching:
+            rendered = self._render(old_response, self._spectrum, self._output, self._tail, length)
+            np.copyto(chunk, rendered)
+            return
+        
+        # 切换：新旧响应分别计算，在这一段内线性交叉淡化（old + (new - old) * ramp）
+        np.copyto(self._spectrum_new, self._spectrum)
+        new_rendered = self._render(new_response, self._spectrum_new, self._output_new, self._tail_new, length)
+        old_rendered = self._render(old_response, self._spectrum, self._output, self._tail, length)
+        np.subtract(new_rendered, old_rendered, out=new_rendered)
+        np.multiply(new_rendered, self._ramp_for(length), out=new_rendered)
+        np.add(new_rendered, old_rendered, out=new_rendered)
+        np.copyto(chunk, new_rendered)
+        
+        self._response = new_response
+        self._tail, self._tail_new = self._tail_new, self._tail
+    
+    def _prime_tail(self, response: Optional[np.ndarray]) -> None:
+        """用最近的输入历史算出新响应的重叠尾部（就像它一直在运行一样）"""
+        if response is None:
+            self._tail_new.fill(0)
+            return
+        padded = self._padded
+        padded[:self._tail_len] = self._history
+        padded[self._tail_len:].fill(0)
+        self._forward(padded)
+        np.multiply(self._spectrum, response, out=self._spectrum)
+        self._inverse(self._spectrum, self._output)
+        np.copyto(self._tail_new, self._output[self._tail_len:2 * self._tail_len])
+    
+    def _render(self, response: Optional[np.ndarray], spectrum: np.ndarray, output: np.ndarray,
+                tail: np.ndarray, length: int) -> np.ndarray:
+        """用给定响应完成一段的卷积与重叠相加，并更新 tail
+        
+        spectrum 中须已是这一段输入的频谱（会被原地修改）；response 为 None 时直通。
+        
+        Returns:
+            output 中这一段的结果（视图）
+        """
+        if response is None:
+            np.copyto(output[:length], self._padded[:length])
+            addition = None
+        else:
+            np.multiply(spectrum, response, out=spectrum)
+            self._inverse(spectrum, output)
+            addition = output[length:length + self._tail_len]
+        overlap = min(length, self._tail_len)
+        np.add(output[:overlap], tail[:overlap], out=output[:overlap])
+        self._shift_tail(tail, addition, length)
+        return output[:length]
+    
+    def _shift_tail(self, tail: np.ndarray, addition: Optional[np.ndarray], length: int) -> None:
+        """把尾部前移 length 帧，空出的部分补 0，再加上这一段新产生的尾部"""
+        if length < self._tail_len:
+            # 重叠区域的移动：从前往后逐段复制，源总在目标之后，不会覆盖未读数据
+            remain = self._tail_len - length
+            step = length
+            for pos in range(0, remain, step):
+                end = min(pos + step, remain)
+                tail[pos:end] = tail[pos + length:end + length]
+            tail[remain:].fill(0)
+        else:
+            tail.fill(0)
+        if addition is not None:
+            np.add(tail, addition, out=tail)
+    
+    def _push_history(self, chunk: np.ndarray) -> None:
+        """记录最近 tail_len 帧的输入"""
+        length = len(chunk)
+        if length >= self._tail_len:
+            np.copyto(self._history, chunk[length - self._tail_len:])
+            return
+        remain = self._tail_len - length
+        np.copyto(self._history_new[:remain], self._history[length:])
+        np.copyto(self._history_new[remain:], chunk)
+        self._history, self._history_new = self._history_new, self._history
+    
+    def _ramp_for(self, length: int) -> np.ndarray:
+        """取得长度为 length、形状为 (length, 声道数) 的淡入曲线（0 到 1）"""
+        ramp = self._ramps.get(length)
+        if ramp is None:
+            # 不常见的块长：就地写入预分配的缓冲区
+            ramp = self._ramp_scratch[:length]
+            np.multiply(self._ramp_steps[:length], 1.0 / max(length - 1, 1), out=ramp)
+        return ramp
+    
+    def _forward(self, padded: np.ndarray) -> None:
+        """正向 FFT 到 self._spectrum"""
+        if _FFT_HAS_OUT:
+            np.fft.rfft(padded, axis=0, out=self._spectrum)
+        else:
+            self._spectrum[:] = np.fft.rfft(padded, axis=0)
+    
+    def _inverse(self, spectrum: np.ndarray, output: np.ndarray) -> None:
+        """逆向 FFT 到 output"""
+        if _FFT_HAS_OUT:
+            np.fft.irfft(spectrum, n=self._fft_size, axis=0, out=output)
+        else:
+            output[:] = np.fft.irfft(spectrum, n=self._fft_size, axis=0)
@@ -0,0 +1,363 @@
+"""响度分析（EBU R128 / ReplayGain 2.0）
+
+按 ITU-R BS.1770 计算每首曲目的综合响度（LUFS）和真峰值（dBTP），专辑响度由各曲目的
+门限块直方图合并得到。分析在进程池中并行进行，结果按路径 + 修改时间缓存到 JSON 文件。
+
+K 计权不逐采样做递归滤波，而是对每个 100 毫秒子块做 FFT，在频域乘以 K 计权滤波器的
+功率响应后求能量（Parseval 定理），整块向量化；400 毫秒门限块由相邻 4 个子块的能量合成。
+"""
+
+import json
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+import soundfile as sf
+
+from .resampler import Resampler
+from ..utils.process_support import process_pool_available
+
+REFERENCE_LUFS = -18.0  # ReplayGain 2.0 的参考响度
+ABSOLUTE_GATE = -70.0  # 绝对门限（LUFS）
+RELATIVE_GATE = -10.0  # 相对门限（LU）
+HISTOGRAM_STEP = 0.1  # 专辑合并用的直方图精度（LU）
+HISTOGRAM_BINS = 1000  # 覆盖 -70 到 +30 LUFS
+
+SUBBLOCK_SECONDS = 0.1
+SUBBLOCKS_PER_BLOCK = 4  # 400 毫秒门限块，重叠 75%
+READ_SUBBLOCKS = 100  # 每次读取 10 秒
+
+
+def _channel_weights(channels: int) -> np.ndarray:
+    """各声道的加权（5.1 的环绕声道为 1.41，其余为 1，LFE 不计）"""
+    weights = np.ones(channels)
+    if channels == 6:
+        weights[3] = 0.0
+        weights[4:] = 1.41
+    return weights
+
+
+def _k_weighting_coefficients(samplerate: int):
+    """BS.1770 K 计权两级滤波器在任意采样率下的系数
+    
+    Returns:
+        [(b, a), (b, a)]：高频搁架 + RLB 高通
+    """
+    # 第一级：高频搁架
+    k = np.tan(np.pi * 1681.974450955533 / samplerate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+             [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    
+    # 第二级：RLB 高通
+    k = np.tan(np.pi * 38.13547087602444 / samplerate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = ([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return [shelf, highpass]
+
+
+@lru_cache(maxsize=16)
+def _k_weighting_power(samplerate: int, length: int) -> np.ndarray:
+    """K 计权在 rfft 网格上的功率响应，已并入单边谱的折算系数和 1/N²
+    
+    Args:
+        samplerate: 采样率
+        length: 子块长度
+    
+    Returns:
+        形状为 (length // 2 + 1, 1) 的数组，与 |rfft|² 相乘求和即得子块的均方值
+    """
+    z_inv = np.exp(-2j * np.pi * np.arange(length // 2 + 1) / length)
+    response = np.ones(len(z_inv), dtype=np.complex128)
+    for b, a in _k_weighting_coefficients(samplerate):
+        response *= (b[0] + b[1] * z_inv + b[2] * z_inv ** 2) / (a[0] + a[1] * z_inv + a[2] * z_inv ** 2)
+    power = np.abs(response) ** 2
+    
+    # 单边谱：除直流和奈奎斯特外每个频点代表正负两个频率
+    power[1:] *= 2
+    if length % 2 == 0:
+        power[-1] /= 2
+    return (power / (length * length)).reshape(-1, 1)
+
+
+def _block_loudness(powers: np.ndarray) -> np.ndarray:
+    """把 100 毫秒子块能量合成为 400 毫秒门限块的响度"""
+    if len(powers) < SUBBLOCKS_PER_BLOCK:
+        powers = np.concatenate([powers, np.zeros(SUBBLOCKS_PER_BLOCK - len(powers))])
+    windows = np.lib.stride_tricks.sliding_window_view(powers, SUBBLOCKS_PER_BLOCK)
+    block_powers = windows.mean(axis=1)
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10 * np.log10(block_powers)
+
+
+def _gated_loudness(loudness: np.ndarray, counts: Optional[np.ndarray] = None) -> Optional[float]:
+    """按绝对门限和相对门限计算综合响度
+    
+    Args:
+        loudness: 各门限块的响度
+        counts: 各块的权重（直方图的计数），None 表示都为 1
+    
+    Returns:
+        综合响度（LUFS），全部低于绝对门限时返回 None
+    """
+    if counts is None:
+        counts = np.ones(len(loudness))
+    powers = 10 ** ((loudness + 0.691) / 10)
+    
+    gated = loudness > ABSOLUTE_GATE
+    if not np.any(counts[gated]):
+        return None
+    ungated = -0.691 + 10 * np.log10(np.average(powers[gated], weights=counts[gated]))
+    
+    gated &= loudness > ungated + RELATIVE_GATE
+    if not np.any(counts[gated]):
+        return None
+    return float(-0.691 + 10 * np.log10(np.average(powers[gated], weights=counts[gated])))
+
+
+def _histogram(loudness: np.ndarray) -> Dict[str, int]:
+    """把门限块的响度做成稀疏直方图（专辑合并用）"""
+    loudness = loudness[loudness > ABSOLUTE_GATE]
+    bins = np.clip(((loudness - ABSOLUTE_GATE) / HISTOGRAM_STEP).astype(int), 0, HISTOGRAM_BINS - 1)
+    values, counts = np.unique(bins, return_counts=True)
+    return {str(int(v)): int(c) for v, c in zip(values, counts)}
+
+
+def analyze_file(file_path: str) -> dict:
+    """分析一首曲目的响度和真峰值（在进程池的工作进程中运行）
+    
+    Args:
+        file_path: 音频文件路径
+    
+    Returns:
+        {"integrated": LUFS 或 None, "true_peak": dBTP, "histogram": {bin: count}}
+    """
+    with sf.SoundFile(file_path) as f:
+        samplerate, channels = f.samplerate, f.channels
+        sub_len = int(round(samplerate * SUBBLOCK_SECONDS))
+        weighting = _k_weighting_power(samplerate, sub_len)
+        channel_weights = _channel_weights(channels)
+        
+        # 真峰值：低于 96kHz 时 4 倍过采样，低于 192kHz 时 2 倍
+        oversample = 4 if samplerate < 96000 else 2 if samplerate < 192000 else 1
+        upsampler = Resampler(samplerate, samplerate * oversample, channels) if oversample > 1 else None
+        
+        powers: List[np.ndarray] = []
+        peak = 0.0
+        while True:
+            data = f.read(sub_len * READ_SUBBLOCKS, dtype='float32', always_2d=True)
+            final = len(data) < sub_len * READ_SUBBLOCKS
+            
+            upsampled = upsampler.process(data, final=final) if upsampler is not None else data
+            if len(upsampled):
+                peak = max(peak, float(np.abs(upsampled).max()))
+            
+            # 不足一个子块的尾部补零（BS.1770 的门限块只统计完整的块，这里保留尾部以免短曲目没有结果）
+            count = -(-len(data) // sub_len)
+            if count:
+                padded = np.zeros((count * sub_len, channels), dtype=np.float32)
+                padded[:len(data)] = data
+                spectrum = np.fft.rfft(padded.reshape(count, sub_len, channels), axis=1)
+                mean_square = (np.abs(spectrum) ** 2 * weighting).sum(axis=1)
+                powers.append(mean_square @ channel_weights)
+            if final:
+                break
+    
+    loudness = _block_loudness(np.concatenate(powers) if powers else np.zeros(0))
+    with np.errstate(divide='ignore'):
+        true_peak = float(20 * np.log10(peak)) if peak > 0 else -np.inf
+    return {
+        "integrated": _gated_loudness(loudness),
+        "true_peak": true_peak,
+        "histogram": _histogram(loudness),
+    }
+
+
+def gain_to_linear(gain_db: float, true_peak_db: float) -> float:
+    """把增益换算为线性倍数，并限制在不让真峰值超过 0 dBTP 的范围内
+    
+    Args:
+        gain_db: 增益（dB）
+        true_peak_db: 真峰值（dBTP）
+    
+    Returns:
+        线性增益
+    """
+    return float(10 ** (min(gain_db, -true_peak_db) / 20))
+
+
+class LoudnessAnalyzer:
+    """曲目响度的批量分析和缓存
+    
+    analyze() 会阻塞到分析完成，应在后台线程调用；其余方法可在任意线程调用。
+    """
+    
+    def __init__(self, cache_file: str, workers: Optional[int] = None):
+        """初始化分析器并加载缓存
+        
+        Args:
+            cache_file: 缓存文件路径（JSON）
+            workers: 进程池大小，None 表示 CPU 核数
+        """
+        self.cache_file = os.path.expanduser(cache_file)
+        self.workers = workers
+        self._results: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._analyze_lock = threading.Lock()
+        self._load()
+    
+    def get(self, file_path: str) -> Optional[dict]:
+        """获取曲目的分析结果（文件修改过则视为没有结果）
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            分析结果，没有时返回 None
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._results.get(key)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if entry.get("mtime") != stat.st_mtime_ns or entry.get("size") != stat.st_size:
+            return None
+        return entry
+    
+    def track_gain(self, file_path: str) -> Optional[float]:
+        """曲目增益的线性倍数（ReplayGain 2.0 参考响度，带峰值保护）
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            线性增益，尚未分析或为静音时返回 None
+        """
+        entry = self.get(file_path)
+        if entry is None or entry["integrated"] is None:
+            return None
+        return gain_to_linear(REFERENCE_LUFS - entry["integrated"], entry["true_peak"])
+    
+    def album_gain(self, file_paths: Iterable[str]) -> Optional[float]:
+        """专辑增益的线性倍数（所有曲目的门限块合并计算，峰值取专辑最大值）
+        
+        Args:
+            file_paths: 专辑中各曲目的路径
+        
+        Returns:
+            线性增益，任一曲目尚未分析时返回 None
+        """
+        histogram = np.zeros(HISTOGRAM_BINS)
+        true_peak = -np.inf
+        for file_path in file_paths:
+            entry = self.get(file_path)
+            if entry is None:
+                return None
+            for index, count in entry["histogram"].items():
+                histogram[int(index)] += count
+            true_peak = max(true_peak, entry["true_peak"])
+        
+        centers = ABSOLUTE_GATE + (np.arange(HISTOGRAM_BINS) + 0.5) * HISTOGRAM_STEP
+        used = histogram > 0
+        integrated = _gated_loudness(centers[used], histogram[used])
+        if integrated is None:
+            return None
+        return gain_to_linear(REFERENCE_LUFS - integrated, true_peak)
+    
+    def analyze(self, file_paths: Iterable[str]) -> int:
+        """在进程池中分析尚无结果的曲目，并保存缓存
+        
+        Args:
+            file_paths: 音频文件路径
+        
+        Returns:
+            新分析的曲目数
+        """
+        with self._analyze_lock:
+            pending = []
+            for file_path in dict.fromkeys(file_paths):
+                if self.get(file_path) is None and os.path.exists(file_path):
+                    pending.append(file_path)
+            if not pending:
+                return 0
+            
+            print(f"📊 分析响度: {len(pending)} 首曲目")
+            analyzed = 0
+            try:
+                if not process_pool_available():
+                    # 打包后的程序入口没有调用 freeze_support() 时，工作进程会再打开一个播放器窗口
+                    raise OSError("打包程序的入口未调用 multiprocessing.freeze_support()")
+                # 用 spawn 启动工作进程，避免在带有 Qt 线程的进程中 fork
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                    futures = {file_path: pool.submit(analyze_file, file_path) for file_path in pending}
+                    for file_path, future in futures.items():
+                        if self._store(file_path, future.result):
+                            analyzed += 1
+            except (BrokenProcessPool, OSError) as e:
+                # 无法启动工作进程时（例如入口脚本缺少 __main__ 保护）退回在当前线程中逐首分析
+                print(f"⚠️ 响度分析进程池不可用，改为单线程分析: {e}")
+                for file_path in pending:
+                    if self.get(file_path) is None and self._store(file_path, lambda: analyze_file(file_path)):
+                        analyzed += 1
+            
+            self._save()
+            print(f"✓ 响度分析完成: {analyzed} 首")
+            return analyzed
+    
+    def _store(self, file_path: str, compute: Callable[[], dict]) -> bool:
+        """取得一首曲目的分析结果并记录
+        
+        Args:
+            file_path: 音频文件路径
+            compute: 返回分析结果的函数
+        
+        Returns:
+            是否成功
+        """
+        try:
+            result = compute()
+            stat = os.stat(file_path)
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            print(f"⚠️ 响度分析失败: {e} - {os.path.basename(file_path)}")
+            return False
+        result["mtime"] = stat.st_mtime_ns
+        result["size"] = stat.st_size
+        with self._lock:
+            self._results[os.path.abspath(file_path)] = result
+        return True
+    
+    def _load(self) -> None:
+        """加载缓存文件"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._results = json.load(f)
+        except Exception as e:
+            print(f"加载响度缓存失败: {e}")
+    
+    def _save(self) -> None:
+        """保存缓存文件"""
+        with self._lock:
+            data = dict(self._results)
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except Exception as e:
+            print(f"保存响度缓存失败: {e}")
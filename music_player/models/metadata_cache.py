@@ -0,0 +1,155 @@
+"""元数据的内存缓存
+
+按路径缓存读好的元数据，最久未使用的先淘汰，同时限制条目数和估算的内存占用。
+记录命中、未命中和淘汰次数，用来判断容量是否合适（例如重复添加或加载播放列表时能否命中）。
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .track import Metadata
+
+MAX_ENTRIES = 20000
+MAX_BYTES = 16 * 1024 * 1024
+ENTRY_OVERHEAD = 240  # 每个条目除字符串外的估算开销（Metadata 对象、字典槽位、浮点数等）
+
+
+def estimate_size(file_path: str, metadata: Metadata) -> int:
+    """估算一个条目占用的内存
+    
+    Args:
+        file_path: 路径（缓存的键）
+        metadata: 元数据
+    
+    Returns:
+        字节数
+    """
+    size = ENTRY_OVERHEAD + sys.getsizeof(file_path)
+    for text in (metadata.title, metadata.artist, metadata.album, metadata.cover_id):
+        if text is not None:
+            size += sys.getsizeof(text)
+    return size
+
+
+class MetadataCache:
+    """按条目数和估算字节数限制大小的 LRU 缓存（可以在任意线程调用）"""
+    
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        """初始化缓存
+        
+        Args:
+            max_entries: 最多缓存的条目数
+            max_bytes: 估算内存占用的上限（字节）
+        """
+        self._entries: "OrderedDict[str, Metadata]" = OrderedDict()  # 最近使用的在后
+        self._sizes: Dict[str, int] = {}  # 路径 -> 估算字节数
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, file_path: str) -> Optional[Metadata]:
+        """查找元数据（命中时标记为最近使用）
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            元数据，不在缓存中时返回 None
+        """
+        with self._lock:
+            metadata = self._entries.get(file_path)
+            if metadata is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file_path)
+            self.hits += 1
+            return metadata
+    
+    def put(self, file_path: str, metadata: Metadata) -> None:
+        """加入或更新元数据，超出限制时淘汰最久未使用的条目
+        
+        Args:
+            file_path: 音频文件路径
+            metadata: 元数据
+        """
+        size = estimate_size(file_path, metadata)
+        with self._lock:
+            if file_path in self._entries:
+                self._bytes -= self._sizes[file_path]
+            self._entries[file_path] = metadata
+            self._entries.move_to_end(file_path)
+            self._sizes[file_path] = size
+            self._bytes += size
+            self._evict()
+    
+    def resize(self, max_entries: int, max_bytes: int) -> None:
+        """修改容量（缩小时立即淘汰）
+        
+        Args:
+            max_entries: 最多缓存的条目数
+            max_bytes: 估算内存占用的上限（字节）
+        """
+        with self._lock:
+            self.max_entries = max(1, max_entries)
+            self.max_bytes = max(1, max_bytes)
+            self._evict()
+    
+    def clear(self) -> None:
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+    
+    def reset_stats(self) -> None:
+        """清零命中、未命中和淘汰计数"""
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+    
+    def __len__(self) -> int:
+        """缓存的条目数"""
+        with self._lock:
+            return len(self._entries)
+    
+    def stats(self) -> dict:
+        """缓存状况
+        
+        Returns:
+            条目数、估算字节数、容量、命中/未命中/淘汰次数和命中率
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+    
+    def summary(self) -> str:
+        """生成一行摘要
+        
+        Returns:
+            例如 "1200 条 / 0.6 MB, 命中 800 次, 未命中 1200 次 (40%), 淘汰 0 次"
+        """
+        stats = self.stats()
+        return (f"{stats['entries']} 条 / {stats['bytes'] / 1024 / 1024:.1f} MB, "
+                f"命中 {stats['hits']} 次, 未命中 {stats['misses']} 次 ({stats['hit_rate']:.0%}), "
+                f"淘汰 {stats['evictions']} 次")
+    
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目直到满足限制（调用方持有锁）"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            file_path, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(file_path)
+            self.evictions += 1
@@ -1,115 +1,244 @@
-"""元数据读取器"""
+"""元数据读取器
 
+每个文件只用 mutagen 解析一次，从同一个对象里取出标签、时长和内嵌封面。
+各格式的标签键不同，按 mutagen 的文件类型预先确定要查的键，不再对每个文件逐个试探所有写法。
+配置了 MetadataStore 时，大小和修改时间都没变的文件直接使用保存的结果，完全不解析。
+封面不随元数据解码：元数据只记录封面的内容哈希，原始数据交给 CoverStore，显示时才解码缩略图。
+"""
+
+import base64
+import hashlib
 import os
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Sequence, Tuple
 from PySide6.QtGui import QPixmap
 from PySide6.QtCore import QByteArray
-from mutagen import File as MutagenFile
-from mutagen.mp3 import MP3
-from mutagen.flac import FLAC
-from mutagen.oggvorbis import OggVorbis
+from mutagen import File as MutagenFile, FileType
+from mutagen.id3 import ID3, ID3FileType
+from mutagen.flac import FLAC, Picture
+from mutagen.mp4 import MP4
+from mutagen.apev2 import APEv2File
+from mutagen.ogg import OggFileType
 
 from .track import Metadata
+from .cover_store import CoverStore
+from .metadata_cache import MetadataCache
+from .metadata_store import MetadataStore, StoreRecord
+
+SAVE_BATCH = 500  # 新解析的结果每攒够这么多条写入一次存储
+
+# 一个文件的读取结果：(路径, 元数据, 封面数据)，封面已在 CoverStore 中或没有封面时封面数据为 None
+ScanResult = Tuple[str, Metadata, Optional[bytes]]
+
+# (标题, 艺术家, 专辑) 各自的候选键
+TagKeys = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]
+
+# 按文件类型的标签键（Vorbis 注释不区分大小写，一个键就够）
+_ID3_KEYS: TagKeys = (('TIT2',), ('TPE1',), ('TALB',))
+_VORBIS_KEYS: TagKeys = (('title',), ('artist',), ('album',))
+_MP4_KEYS: TagKeys = (('\xa9nam',), ('\xa9ART',), ('\xa9alb',))
+_APE_KEYS: TagKeys = (('Title',), ('Artist',), ('Album',))
+# 未知格式时逐个试探所有常见写法
+_GENERIC_KEYS: TagKeys = (
+    ('title', 'TITLE', 'Title', '\xa9nam', 'TIT2'),
+    ('artist', 'ARTIST', 'Artist', '\xa9ART', 'TPE1'),
+    ('album', 'ALBUM', 'Album', '\xa9alb', 'TALB'),
+)
+_FORMAT_KEYS = (
+    (ID3FileType, _ID3_KEYS),
+    (FLAC, _VORBIS_KEYS),
+    (OggFileType, _VORBIS_KEYS),
+    (MP4, _MP4_KEYS),
+    (APEv2File, _APE_KEYS),
+)
 
 
 class MetadataReader:
     """读取音频文件的元数据"""
     
-    def __init__(self):
-        """初始化元数据读取器"""
-        self._cache: Dict[str, Metadata] = {}
+    def __init__(self, store: Optional[MetadataStore] = None, cache: Optional[MetadataCache] = None):
+        """初始化元数据读取器
+        
+        Args:
+            store: 持久化存储，None 表示只在内存中缓存
+            cache: 内存缓存，None 表示使用默认容量
+        """
+        self.cache = cache if cache is not None else MetadataCache()
+        self._keys_by_type: Dict[type, TagKeys] = {}  # 按 mutagen 文件类型缓存的标签键
+        self._store = store
+        self.covers = CoverStore(store)  # 封面按内容哈希保存，显示时按需解码
     
     def read_metadata(self, file_path: str) -> Metadata:
-        """读取音频文件元数据
+        """读取音频文件元数据（只打开和解析文件一次）
         
         Args:
             file_path: 音频文件路径
-            
+        
         Returns:
             元数据对象
         """
-        # 检查缓存
-        if file_path in self._cache:
-            return self._cache[file_path]
+        return self.read_many([file_path])[0]
+    
+    def read_many(self, file_paths: Sequence[str]) -> List[Metadata]:
+        """在当前线程批量读取元数据：先查内存缓存，再按 stat 结果查持久化存储，剩下的才解析文件
+        
+        会阻塞到全部读完，大量文件请用 MetadataScanner 在后台读取。
+        
+        Args:
+            file_paths: 音频文件路径列表
+        
+        Returns:
+            与 file_paths 一一对应的元数据
+        """
+        found = self.lookup(file_paths)
+        results: List[ScanResult] = []
+        records: List[StoreRecord] = []
+        parsed = 0
+        for file_path in file_paths:
+            if file_path not in found:
+                metadata, cover, record = self.parse(file_path)
+                found[file_path] = (metadata, cover)
+                parsed += 1
+                if record is not None:
+                    records.append(record)
+                    if len(records) >= SAVE_BATCH:
+                        self.save(records)
+                        records = []
+            results.append((file_path,) + found[file_path])
+        self.save(records)
+        
+        if self._store is not None and file_paths:
+            print(f"📚 元数据: {len(file_paths) - parsed} 个来自缓存, {parsed} 个重新解析")
+        return self.finish(results)
+    
+    def lookup(self, file_paths: Sequence[str]) -> Dict[str, Tuple[Metadata, Optional[bytes]]]:
+        """查找不必解析的文件：内存缓存和持久化存储中仍然有效的结果（只 stat，不打开文件）
+        
+        可以在任意线程调用。
+        
+        Args:
+            file_paths: 音频文件路径列表
+        
+        Returns:
+            路径到 (元数据, None) 的字典（保存过的封面已在存储中，不必读出）
+        """
+        found: Dict[str, Tuple[Metadata, Optional[bytes]]] = {}
+        pending: List[str] = []
+        for file_path in dict.fromkeys(file_paths):
+            metadata = self.cache.get(file_path)
+            if metadata is not None:
+                found[file_path] = (metadata, None)
+            else:
+                pending.append(file_path)
+        if self._store is None or not pending:
+            return found
+        
+        stats = []
+        for file_path in pending:
+            try:
+                stats.append((file_path, os.stat(file_path)))
+            except OSError:
+                pass
+        for file_path, metadata in self._store.lookup(stats).items():
+            found[file_path] = (metadata, None)
+        return found
+    
+    def parse(self, file_path: str) -> Tuple[Metadata, Optional[bytes], Optional[StoreRecord]]:
+        """解析文件（可以在工作线程调用）
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            (元数据, 封面数据, 待写入存储的记录)；文件无法 stat 时记录为 None
+        """
+        try:
+            stat = os.stat(file_path)  # 解析前 stat：解析期间文件被改动时下次会重新解析
+        except OSError:
+            stat = None
+        metadata, cover = self._parse(file_path)
+        record = (file_path, stat, metadata, cover) if stat is not None else None
+        return metadata, cover, record
+    
+    def save(self, records: Sequence[StoreRecord]) -> None:
+        """把新解析的结果写入持久化存储（一个事务）
+        
+        Args:
+            records: parse() 返回的记录
+        """
+        if self._store is not None and records:
+            self._store.save(records)
+    
+    def finish(self, results: Sequence[ScanResult]) -> List[Metadata]:
+        """登记新解析出的封面数据，并把元数据放入内存缓存
+        
+        Args:
+            results: (路径, 元数据, 封面数据) 列表
+        
+        Returns:
+            与 results 一一对应的元数据
+        """
+        metadata_list = []
+        for file_path, metadata, cover in results:
+            if cover and metadata.cover_id:
+                self.covers.add(metadata.cover_id, cover)
+            self.cache.put(file_path, metadata)
+            metadata_list.append(metadata)
+        return metadata_list
+    
+    def _parse(self, file_path: str) -> Tuple[Metadata, Optional[bytes]]:
+        """解析文件，取出标签、时长和封面数据
+        
+        Args:
+            file_path: 音频文件路径
         
+        Returns:
+            (元数据, 封面图片数据)
+        """
         metadata = Metadata()
+        cover = None
+        fallback_title = os.path.splitext(os.path.basename(file_path))[0]
+        audio = None
         
         try:
-            # 先尝试不使用 easy=True，获取更多信息
             audio = MutagenFile(file_path)
             
             if audio is None:
                 # 无法读取元数据，使用文件名
                 print(f"⚠️ 无法读取元数据: {os.path.basename(file_path)}")
-                metadata.title = os.path.splitext(os.path.basename(file_path))[0]
-                metadata.duration = self.get_duration(file_path)
+                metadata.title = fallback_title
             else:
-                # 提取标题
-                title = None
-                if hasattr(audio, 'tags') and audio.tags:
-                    # 尝试多种标题标签
-                    for key in ['title', 'TITLE', 'Title', '\xa9nam', 'TIT2']:
-                        if key in audio.tags:
-                            value = audio.tags[key]
-                            title = str(value[0]) if isinstance(value, list) else str(value)
-                            break
-                
-                metadata.title = title or os.path.splitext(os.path.basename(file_path))[0]
-                
-                # 提取艺术家
-                artist = None
-                if hasattr(audio, 'tags') and audio.tags:
-                    for key in ['artist', 'ARTIST', 'Artist', '\xa9ART', 'TPE1']:
-                        if key in audio.tags:
-                            value = audio.tags[key]
-                            artist = str(value[0]) if isinstance(value, list) else str(value)
-                            break
-                
+                title, artist, album = self._read_tags(audio)
+                metadata.title = title or fallback_title
                 metadata.artist = artist or "未知艺术家"
-                
-                # 提取专辑
-                album = None
-                if hasattr(audio, 'tags') and audio.tags:
-                    for key in ['album', 'ALBUM', 'Album', '\xa9alb', 'TALB']:
-                        if key in audio.tags:
-                            value = audio.tags[key]
-                            album = str(value[0]) if isinstance(value, list) else str(value)
-                            break
-                
                 metadata.album = album or "未知专辑"
-                
-                # 提取时长
-                metadata.duration = self.get_duration(file_path)
-                
-                # 提取封面
-                metadata.cover_art = self.get_cover_art(file_path)
+                metadata.duration = _duration_of(audio)
+                cover = _cover_data(audio)
+                if cover:
+                    metadata.cover_id = hashlib.sha1(cover).hexdigest()
                 
                 print(f"✓ 成功读取: {metadata.title} - {metadata.artist}")
         
         except Exception as e:
             print(f"❌ 读取元数据失败 {os.path.basename(file_path)}: {e}")
-            import traceback
-            traceback.print_exc()
-            metadata.title = os.path.splitext(os.path.basename(file_path))[0]
-            metadata.duration = self.get_duration(file_path)
+            metadata.title = fallback_title
+            if audio is not None:
+                metadata.duration = _duration_of(audio)
         
-        # 缓存元数据
-        self._cache[file_path] = metadata
-        return metadata
+        return metadata, cover
     
     def get_duration(self, file_path: str) -> float:
         """获取音频文件时长
         
         Args:
             file_path: 音频文件路径
-            
+        
         Returns:
             时长（秒）
         """
         try:
             audio = MutagenFile(file_path)
-            if audio is not None and hasattr(audio.info, 'length'):
-                return float(audio.info.length)
+            if audio is not None:
+                return _duration_of(audio)
         except Exception as e:
             print(f"获取时长失败 {file_path}: {e}")
         
@@ -120,43 +249,14 @@ class MetadataReader:
         
         Args:
             file_path: 音频文件路径
-            
+        
         Returns:
             封面图片或 None
         """
         try:
             audio = MutagenFile(file_path)
-            
-            if audio is None:
-                return None
-            
-            # MP3 文件
-            if isinstance(audio, MP3):
-                for tag in audio.tags.values():
-                    if hasattr(tag, 'mime') and tag.mime.startswith('image/'):
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(QByteArray(tag.data))
-                        return pixmap
-            
-            # FLAC 文件
-            elif isinstance(audio, FLAC):
-                if audio.pictures:
-                    picture = audio.pictures[0]
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(QByteArray(picture.data))
-                    return pixmap
-            
-            # OGG 文件
-            elif isinstance(audio, OggVorbis):
-                if 'metadata_block_picture' in audio:
-                    import base64
-                    from mutagen.flac import Picture
-                    picture_data = base64.b64decode(audio['metadata_block_picture'][0])
-                    picture = Picture(picture_data)
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(QByteArray(picture.data))
-                    return pixmap
-        
+            if audio is not None:
+                return _pixmap_from(_cover_data(audio))
         except Exception as e:
             print(f"获取封面失败 {file_path}: {e}")
         
@@ -164,4 +264,95 @@ class MetadataReader:
     
     def clear_cache(self) -> None:
         """清空元数据缓存"""
-        self._cache.clear()
+        self.cache.clear()
+    
+    def _read_tags(self, audio: FileType) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """读取标题、艺术家和专辑
+        
+        Args:
+            audio: mutagen 解析结果
+        
+        Returns:
+            (标题, 艺术家, 专辑)，没有的项为 None
+        """
+        tags = getattr(audio, 'tags', None)
+        if not tags:
+            return None, None, None
+        keys = self._tag_keys(type(audio))
+        return tuple(_first_value(tags, candidates) for candidates in keys)
+    
+    def _tag_keys(self, file_type: type) -> TagKeys:
+        """文件类型对应的标签键（每种类型只查找一次）
+        
+        Args:
+            file_type: mutagen 文件类型
+        
+        Returns:
+            (标题, 艺术家, 专辑) 的候选键
+        """
+        keys = self._keys_by_type.get(file_type)
+        if keys is None:
+            keys = next((format_keys for base, format_keys in _FORMAT_KEYS
+                         if issubclass(file_type, base)), _GENERIC_KEYS)
+            self._keys_by_type[file_type] = keys
+        return keys
+
+
+def _first_value(tags, candidates: Tuple[str, ...]) -> Optional[str]:
+    """取第一个存在的标签值"""
+    for key in candidates:
+        if key in tags:
+            value = tags[key]
+            return str(value[0]) if isinstance(value, list) else str(value)
+    return None
+
+
+def _duration_of(audio: FileType) -> float:
+    """解析结果中的时长（秒）"""
+    info = getattr(audio, 'info', None)
+    length = getattr(info, 'length', None)
+    return float(length) if length else 0.0
+
+
+def _cover_data(audio: FileType) -> Optional[bytes]:
+    """解析结果中第一张内嵌封面的图片数据
+    
+    Args:
+        audio: mutagen 解析结果
+    
+    Returns:
+        图片文件的字节，没有封面时返回 None
+    """
+    # FLAC 的图片块
+    pictures = getattr(audio, 'pictures', None)
+    if pictures:
+        return pictures[0].data
+    
+    tags = getattr(audio, 'tags', None)
+    if not tags:
+        return None
+    
+    # MP3、WAV、AIFF 等 ID3 标签的 APIC 帧
+    if isinstance(tags, ID3):
+        frames = tags.getall('APIC')
+        return frames[0].data if frames else None
+    
+    # MP4 / M4A
+    if isinstance(audio, MP4):
+        covers = tags.get('covr')
+        return bytes(covers[0]) if covers else None
+    
+    # Ogg Vorbis / Opus 把 FLAC 图片块以 base64 存在注释里
+    if isinstance(audio, OggFileType) and 'metadata_block_picture' in tags:
+        return Picture(base64.b64decode(tags['metadata_block_picture'][0])).data
+    
+    return None
+
+
+def _pixmap_from(data: Optional[bytes]) -> Optional[QPixmap]:
+    """由图片数据创建 QPixmap"""
+    if not data:
+        return None
+    pixmap = QPixmap()
+    pixmap.loadFromData(QByteArray(data))
+    return pixmap
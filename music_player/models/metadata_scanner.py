@@ -0,0 +1,263 @@
+"""后台并行读取元数据
+
+添加大量文件时，元数据在工作线程（或工作进程）中解析，界面线程不再等待。结果按添加时的
+顺序分批送回界面线程，每批只包含标签、时长和封面的原始数据（由 MetadataReader.finish()
+交给 CoverStore，不解码）。未改动的文件仍然直接来自元数据缓存，不交给工作者解析。
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from PySide6.QtCore import QObject, Signal
+
+from .track import Metadata
+from .metadata_reader import MetadataReader, ScanResult, SAVE_BATCH
+from .metadata_store import StoreRecord
+from ..utils.process_support import process_pool_available
+
+MAX_WORKERS = 8  # 自动选择时的并发上限（再多磁盘也跟不上）
+BATCH_SIZE = 200  # 每批最多交给界面线程的曲目数
+BATCH_INTERVAL = 0.1  # 凑不满一批时最多等待的秒数，让前面的曲目尽快出现
+PROCESS_MIN_FILES = 64  # 需要解析的文件少于这个数时不值得启动工作进程
+
+ParseOutput = Tuple[Metadata, Optional[bytes], Optional[StoreRecord]]
+
+_process_reader: Optional[MetadataReader] = None
+
+
+def _parse_in_process(file_path: str) -> ParseOutput:
+    """在工作进程中解析一个文件（每个进程一个 MetadataReader，不带存储）"""
+    global _process_reader
+    if _process_reader is None:
+        _process_reader = MetadataReader()
+    return _process_reader.parse(file_path)
+
+
+def default_workers() -> int:
+    """自动选择的并发数
+    
+    Returns:
+        CPU 核数，至少 2（解析中有等待磁盘的时间），最多 MAX_WORKERS
+    """
+    return max(2, min(MAX_WORKERS, os.cpu_count() or 1))
+
+
+@dataclass
+class _ScanJob:
+    """一次扫描"""
+    scan_id: int
+    paths: List[str]
+    cancelled: threading.Event = field(default_factory=threading.Event)
+
+
+class MetadataScanner(QObject):
+    """用线程池（或进程池）并行读取元数据
+    
+    start() 立即返回；扫描按提交顺序逐个进行，结果通过信号分批送到界面线程。
+    """
+    
+    # 信号（在扫描线程发出，跨线程排队到接收者所在的线程）
+    batch_ready = Signal(int, object)  # (扫描编号, [(路径, 元数据, 封面数据)])
+    progress = Signal(int, int, int)  # (扫描编号, 已完成, 总数)
+    finished = Signal(int, bool)  # (扫描编号, 是否被取消)
+    
+    def __init__(self, reader: MetadataReader, workers: int = 0, use_processes: bool = False):
+        """初始化扫描器
+        
+        Args:
+            reader: 元数据读取器（查缓存、解析和写入存储）
+            workers: 并发数，0 表示自动
+            use_processes: 是否用进程池解析（mutagen 的解析是纯 Python，进程池才能用上多个核）
+        """
+        super().__init__()
+        self._reader = reader
+        self._workers = 0
+        self.set_workers(workers)
+        self.use_processes = use_processes
+        self.batch_size = BATCH_SIZE
+        
+        self._jobs: "queue.Queue[Optional[_ScanJob]]" = queue.Queue()
+        self._active: Dict[int, _ScanJob] = {}  # 已提交且未结束的扫描
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def workers(self) -> int:
+        """实际使用的并发数"""
+        return self._workers
+    
+    def set_workers(self, workers: int) -> None:
+        """设置并发数（从下一次扫描开始生效）
+        
+        Args:
+            workers: 并发数，0 或负数表示自动
+        """
+        self._workers = workers if workers and workers > 0 else default_workers()
+    
+    def start(self, file_paths: Sequence[str]) -> int:
+        """提交一次扫描
+        
+        Args:
+            file_paths: 音频文件路径（不存在的文件会被跳过）
+        
+        Returns:
+            扫描编号
+        """
+        with self._lock:
+            job = _ScanJob(self._next_id, list(file_paths))
+            self._next_id += 1
+            self._active[job.scan_id] = job
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="MetadataScanner", daemon=True)
+                self._thread.start()
+        self._jobs.put(job)
+        return job.scan_id
+    
+    def cancel(self, scan_id: Optional[int] = None) -> None:
+        """取消扫描（已经送出的批次不受影响）
+        
+        Args:
+            scan_id: 扫描编号，None 表示全部
+        """
+        with self._lock:
+            jobs = list(self._active.values()) if scan_id is None else [self._active.get(scan_id)]
+        for job in jobs:
+            if job is not None:
+                job.cancelled.set()
+    
+    def is_scanning(self) -> bool:
+        """是否有未结束的扫描"""
+        with self._lock:
+            return bool(self._active)
+    
+    def shutdown(self) -> None:
+        """取消所有扫描并停止扫描线程"""
+        self.cancel()
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._jobs.put(None)
+            thread.join(timeout=2.0)
+    
+    def _run(self) -> None:
+        """扫描线程：按提交顺序逐个处理扫描"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                self._scan(job)
+            except Exception as e:
+                print(f"❌ 元数据扫描失败: {e}")
+            with self._lock:
+                self._active.pop(job.scan_id, None)
+            self.finished.emit(job.scan_id, job.cancelled.is_set())
+    
+    def _scan(self, job: _ScanJob) -> None:
+        """处理一次扫描：缓存命中的直接使用，其余交给工作者解析，按原顺序分批送出"""
+        paths = [file_path for file_path in job.paths if os.path.exists(file_path)]
+        total = len(paths)
+        self.progress.emit(job.scan_id, 0, total)
+        if job.cancelled.is_set() or not paths:
+            return
+        
+        started = time.perf_counter()
+        found = self._reader.lookup(paths)
+        misses = [file_path for file_path in dict.fromkeys(paths) if file_path not in found]
+        executor = self._create_executor(len(misses))
+        window = self._workers * 4  # 同时排队的文件数，取消时不必等太多
+        futures: Dict[str, Future] = {}
+        pending = iter(misses)
+        
+        batch: List[ScanResult] = []
+        records: List[StoreRecord] = []
+        done = 0
+        last_emit = time.monotonic()
+        try:
+            self._submit(executor, pending, futures, window)
+            for file_path in paths:
+                if job.cancelled.is_set():
+                    break
+                if file_path not in found:
+                    future = futures.pop(file_path)
+                    try:
+                        metadata, cover, record = future.result()
+                    except BrokenProcessPool as e:
+                        # 工作进程异常退出（例如入口脚本缺少 __main__ 保护），剩下的改用线程池
+                        print(f"⚠️ 元数据进程池不可用，改用线程池: {e}")
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = self._thread_pool()
+                        futures = {path: executor.submit(self._reader.parse, path) for path in futures}
+                        metadata, cover, record = self._reader.parse(file_path)
+                    found[file_path] = (metadata, cover)
+                    self._submit(executor, pending, futures, window)
+                    if record is not None:
+                        records.append(record)
+                        if len(records) >= SAVE_BATCH:
+                            self._reader.save(records)
+                            records = []
+                batch.append((file_path,) + found[file_path])
+                done += 1
+                
+                now = time.monotonic()
+                if len(batch) >= self.batch_size or now - last_emit >= BATCH_INTERVAL:
+                    self.batch_ready.emit(job.scan_id, batch)
+                    self.progress.emit(job.scan_id, done, total)
+                    batch = []
+                    last_emit = now
+        finally:
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=not job.cancelled.is_set(), cancel_futures=True)
+            self._reader.save(records)
+        
+        if batch and not job.cancelled.is_set():
+            self.batch_ready.emit(job.scan_id, batch)
+            self.progress.emit(job.scan_id, done, total)
+        elapsed = time.perf_counter() - started
+        state = "已取消" if job.cancelled.is_set() else "完成"
+        print(f"📚 元数据扫描{state}: {done}/{total} 个文件, {total - len(misses)} 个来自缓存, "
+              f"{self._workers} 个{'进程' if isinstance(executor, ProcessPoolExecutor) else '线程'}, "
+              f"耗时 {elapsed:.2f} 秒")
+    
+    def _create_executor(self, count: int) -> Executor:
+        """创建本次扫描的工作者池
+        
+        Args:
+            count: 需要解析的文件数
+        """
+        if self.use_processes and count >= PROCESS_MIN_FILES:
+            if not process_pool_available():
+                # 打包后的程序入口没有调用 freeze_support() 时，工作进程会再打开一个播放器窗口
+                print("⚠️ 打包程序的入口未调用 multiprocessing.freeze_support()，元数据改用线程池解析")
+                return self._thread_pool()
+            try:
+                # 用 spawn 启动工作进程，避免在带有 Qt 线程的进程中 fork
+                context = multiprocessing.get_context("spawn")
+                return ProcessPoolExecutor(max_workers=self._workers, mp_context=context)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 元数据进程池不可用，改用线程池: {e}")
+        return self._thread_pool()
+    
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        """创建解析用的线程池"""
+        return ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="MetadataWorker")
+    
+    def _submit(self, executor: Executor, pending: Iterator[str],
+                futures: Dict[str, Future], window: int) -> None:
+        """按顺序提交待解析的文件，直到排队数达到 window"""
+        while len(futures) < window:
+            file_path = next(pending, None)
+            if file_path is None:
+                return
+            if isinstance(executor, ProcessPoolExecutor):
+                futures[file_path] = executor.submit(_parse_in_process, file_path)
+            else:
+                futures[file_path] = executor.submit(self._reader.parse, file_path)
@@ -0,0 +1,156 @@
+"""元数据的持久化存储（SQLite）
+
+每个文件的标签和时长按路径保存，同时记录文件大小和修改时间；读取时只 stat 文件，
+大小和修改时间都没变就直接使用保存的结果，不再解析文件。封面按内容的 SHA-1 单独保存，
+同一张专辑封面只存一份。写入按批次放在一个事务里，扫描大量文件时不会每个文件提交一次。
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .track import Metadata
+
+SCHEMA_VERSION = 1
+QUERY_CHUNK = 500  # 每条查询语句携带的参数个数上限（低于 SQLite 的变量数限制）
+
+# 一条待保存的记录：(路径, stat 结果, 元数据, 封面数据)
+StoreRecord = Tuple[str, os.stat_result, Metadata, Optional[bytes]]
+
+
+class MetadataStore:
+    """按 (路径, 大小, 修改时间) 校验的元数据存储
+    
+    连接在多个线程间共享，所有访问都经过同一把锁。
+    """
+    
+    def __init__(self, db_path: str):
+        """打开（必要时创建）数据库
+        
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = os.path.expanduser(db_path)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, mode=0o755, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+    
+    def _create_schema(self) -> None:
+        """创建表（版本不同时重建，缓存的数据可以随时丢弃）"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        with self._conn:
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS tracks")
+                self._conn.execute("DROP TABLE IF EXISTS covers")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tracks (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    title TEXT,
+                    artist TEXT,
+                    album TEXT,
+                    duration REAL NOT NULL,
+                    cover_id TEXT
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS covers (
+                    id TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                )""")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def lookup(self, entries: Sequence[Tuple[str, os.stat_result]]) -> Dict[str, Metadata]:
+        """批量查找仍然有效的元数据
+        
+        Args:
+            entries: (路径, stat 结果) 列表
+        
+        Returns:
+            路径到元数据的字典，只包含大小和修改时间都与保存时一致的文件
+        """
+        stats = {path: stat for path, stat in entries}
+        found: Dict[str, Metadata] = {}
+        paths = list(stats)
+        with self._lock:
+            for start in range(0, len(paths), QUERY_CHUNK):
+                chunk = paths[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns, title, artist, album, duration, cover_id "
+                    f"FROM tracks WHERE path IN ({','.join('?' * len(chunk))})", chunk)
+                for path, size, mtime_ns, title, artist, album, duration, cover_id in rows:
+                    stat = stats[path]
+                    if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                        found[path] = Metadata(title=title, artist=artist, album=album,
+                                               duration=duration, cover_id=cover_id)
+        return found
+    
+    def save(self, records: Iterable[StoreRecord]) -> None:
+        """在一个事务里保存一批元数据
+        
+        Args:
+            records: (路径, stat 结果, 元数据, 封面数据) 列表，元数据的 cover_id 为封面数据的内容哈希
+        """
+        tracks = []
+        covers = {}
+        for path, stat, metadata, cover in records:
+            tracks.append((path, stat.st_size, stat.st_mtime_ns, metadata.title, metadata.artist,
+                           metadata.album, metadata.duration, metadata.cover_id))
+            if metadata.cover_id and cover:
+                covers[metadata.cover_id] = cover
+        if not tracks:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO covers (id, data) VALUES (?, ?)",
+                                   covers.items())
+            self._conn.executemany("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", tracks)
+    
+    def get_covers(self, cover_ids: Iterable[str]) -> Dict[str, bytes]:
+        """批量读取封面数据
+        
+        Args:
+            cover_ids: 封面的内容哈希
+        
+        Returns:
+            哈希到图片数据的字典（不存在的哈希不包含在内）
+        """
+        ids: List[str] = list(set(cover_ids))
+        covers: Dict[str, bytes] = {}
+        with self._lock:
+            for start in range(0, len(ids), QUERY_CHUNK):
+                chunk = ids[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM covers WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                covers.update((cover_id, bytes(data)) for cover_id, data in rows)
+        return covers
+    
+    def get_cover(self, cover_id: str) -> Optional[bytes]:
+        """读取一张封面
+        
+        Args:
+            cover_id: 封面的内容哈希
+        
+        Returns:
+            图片数据，不存在时返回 None
+        """
+        return self.get_covers([cover_id]).get(cover_id)
+    
+    def count(self) -> int:
+        """保存的曲目数
+        
+        Returns:
+            曲目数
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+    
+    def close(self) -> None:
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,282 @@
+"""音频回调健康指标
+
+由音频线程写入（只做整数/浮点累加和列表下标自增，不分配数组），界面线程随时读取快照或导出 JSON。
+读取时不加锁，快照里的数值可能相差一个回调，这对统计没有影响。
+
+- 计数：回调次数、设备报告的欠载/溢出、解码跟不上导致的静音、回调超时
+- 直方图：回调耗时、耗时占预算的比例、解码缓冲区填充率、从解码到输出的延迟
+- 最近的异常事件（带墙上时间，方便和系统日志、负载记录对照）
+"""
+
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import List, Optional, Sequence
+
+# 事件类型
+XRUN_OUTPUT_UNDERFLOW = "output_underflow"  # 设备报告输出欠载（声卡没等到数据）
+XRUN_OUTPUT_OVERFLOW = "output_overflow"  # 设备报告输出溢出
+XRUN_DECODE_UNDERRUN = "decode_underrun"  # 解码缓冲区空了，本块输出了静音
+XRUN_DEADLINE_MISS = "deadline_miss"  # 回调耗时超过块时长
+
+RECENT_EVENTS = 256  # 保留的最近事件数
+
+
+class Histogram:
+    """固定分桶的直方图
+    
+    edges 为各桶的上界（含），最后额外有一个溢出桶。
+    """
+    
+    def __init__(self, edges: Sequence[float]):
+        """初始化直方图
+        
+        Args:
+            edges: 递增的桶上界
+        """
+        self.edges: List[float] = list(edges)
+        self.reset()
+    
+    def reset(self) -> None:
+        """清空"""
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = 0.0
+        self.maximum = 0.0
+    
+    def record(self, value: float) -> None:
+        """记录一个值
+        
+        Args:
+            value: 数值
+        """
+        self.counts[bisect_left(self.edges, value)] += 1
+        if self.count == 0 or value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        self.total += value
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """估计分位数（取所在桶的上界，落在溢出桶时取最大值）
+        
+        Args:
+            q: 分位（0 到 1）
+        
+        Returns:
+            分位数估计，没有数据时返回 None
+        """
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return None
+        target = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= target:
+                if index < len(self.edges):
+                    return min(self.edges[index], self.maximum)
+                break
+        return self.maximum
+    
+    def summary(self) -> dict:
+        """生成摘要
+        
+        Returns:
+            包含次数、平均/最小/最大值、p50/p95/p99 和各桶计数的字典
+        """
+        count = self.count
+        return {
+            "count": count,
+            "mean": self.total / count if count else None,
+            "min": self.minimum if count else None,
+            "max": self.maximum if count else None,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": [{"le": edge, "count": c} for edge, c in zip(self.edges, self.counts)]
+                       + [{"le": "inf", "count": self.counts[-1]}],
+        }
+
+
+class PlaybackMetrics:
+    """播放引擎的回调健康指标"""
+    
+    def __init__(self):
+        """初始化指标"""
+        self.callback_ms = Histogram([0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100])
+        self.callback_load = Histogram([0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 0.8, 1.0, 2.0])
+        self.buffer_fill = Histogram([0.0, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0])
+        self.decode_to_output_ms = Histogram([5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000])
+        self._budget = 0.0
+        self.reset()
+    
+    def reset(self) -> None:
+        """清空所有计数和直方图"""
+        self.started_at = time.time()
+        self._started_cpu = time.process_time()
+        self.callbacks = 0
+        self.output_underflows = 0
+        self.output_overflows = 0
+        self.decode_underruns = 0
+        self.deadline_misses = 0
+        self.buffer_level = 0.0  # 最近一次回调时的解码缓冲区填充率
+        self.decode_to_output = 0.0  # 最近一次回调时从解码到输出的延迟（秒）
+        self.recent_events = deque(maxlen=RECENT_EVENTS)
+        for histogram in (self.callback_ms, self.callback_load, self.buffer_fill, self.decode_to_output_ms):
+            histogram.reset()
+    
+    def configure(self, samplerate: int, blocksize: int) -> None:
+        """设置回调的时间预算（在输出流打开前调用）
+        
+        Args:
+            samplerate: 输出采样率
+            blocksize: 每次回调的帧数
+        """
+        self._budget = blocksize / samplerate
+    
+    def record_callback(self, elapsed: float, frames: int, samplerate: int) -> None:
+        """记录一次回调的耗时（在音频回调中调用）
+        
+        Args:
+            elapsed: 耗时（秒）
+            frames: 本块帧数
+            samplerate: 输出采样率
+        """
+        budget = frames / samplerate if samplerate else self._budget
+        self.callbacks += 1
+        self.callback_ms.record(elapsed * 1000)
+        if budget:
+            self.callback_load.record(elapsed / budget)
+            if elapsed > budget:
+                self.deadline_misses += 1
+                self._event(XRUN_DEADLINE_MISS, elapsed * 1000)
+    
+    def record_status(self, status) -> None:
+        """记录设备报告的状态标志（在音频回调中调用）
+        
+        Args:
+            status: 回调的 status 参数（sounddevice.CallbackFlags）
+        """
+        if getattr(status, "output_underflow", False):
+            self.output_underflows += 1
+            self._event(XRUN_OUTPUT_UNDERFLOW, self.buffer_level)
+        if getattr(status, "output_overflow", False):
+            self.output_overflows += 1
+            self._event(XRUN_OUTPUT_OVERFLOW, self.buffer_level)
+    
+    def record_buffer(self, fill: float, decode_to_output: float) -> None:
+        """记录解码缓冲区的状态（在音频回调中调用）
+        
+        Args:
+            fill: 填充率（0 到 1）
+            decode_to_output: 本块音频从解码完成到从扬声器播出的时间（秒）
+        """
+        self.buffer_level = fill
+        self.decode_to_output = decode_to_output
+        self.buffer_fill.record(fill)
+        self.decode_to_output_ms.record(decode_to_output * 1000)
+    
+    def record_decode_underrun(self) -> None:
+        """记录一次解码欠载（在音频回调中调用）"""
+        self.decode_underruns += 1
+        self._event(XRUN_DECODE_UNDERRUN, self.buffer_level)
+    
+    def callback_summary(self) -> dict:
+        """生成回调耗时的简要统计
+        
+        Returns:
+            包含调用次数、平均/最大耗时（毫秒）、预算（毫秒）、预算占用比例和超时次数的字典
+        """
+        count = self.callback_ms.count
+        mean_ms = self.callback_ms.total / count if count else 0.0
+        budget_ms = self._budget * 1000
+        return {
+            "calls": self.callbacks,
+            "mean_ms": mean_ms,
+            "max_ms": self.callback_ms.maximum,
+            "budget_ms": budget_ms,
+            "load": mean_ms / budget_ms if budget_ms else 0.0,
+            "overruns": self.deadline_misses,
+        }
+    
+    def snapshot(self) -> dict:
+        """生成当前指标的快照
+        
+        Returns:
+            可直接序列化为 JSON 的字典
+        """
+        now = time.time()
+        try:
+            load_average = list(os.getloadavg())
+        except (AttributeError, OSError):  # Windows 没有 getloadavg
+            load_average = None
+        uptime = now - self.started_at
+        cpu = time.process_time() - self._started_cpu
+        return {
+            "timestamp": now,
+            "started_at": self.started_at,
+            "uptime_s": uptime,
+            "budget_ms": self._budget * 1000,
+            "counters": {
+                "callbacks": self.callbacks,
+                "output_underflows": self.output_underflows,
+                "output_overflows": self.output_overflows,
+                "decode_underruns": self.decode_underruns,
+                "deadline_misses": self.deadline_misses,
+            },
+            "gauges": {
+                "buffer_fill": self.buffer_level,
+                "decode_to_output_ms": self.decode_to_output * 1000,
+            },
+            "histograms": {
+                "callback_ms": self.callback_ms.summary(),
+                "callback_load": self.callback_load.summary(),
+                "buffer_fill": self.buffer_fill.summary(),
+                "decode_to_output_ms": self.decode_to_output_ms.summary(),
+            },
+            "recent_events": [
+                {"time": event_time, "type": kind, "value": value}
+                for event_time, kind, value in list(self.recent_events)
+            ],
+            "system": {
+                "load_average": load_average,
+                "process_cpu_s": cpu,
+                "process_cpu_share": cpu / uptime if uptime > 0 else None,
+            },
+        }
+    
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """导出为 JSON 文本
+        
+        Args:
+            indent: 缩进
+        
+        Returns:
+            JSON 文本
+        """
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=indent)
+    
+    def dump(self, file_path: str) -> None:
+        """导出到 JSON 文件
+        
+        Args:
+            file_path: 文件路径
+        """
+        file_path = os.path.expanduser(file_path)
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+        os.replace(tmp_path, file_path)
+    
+    def _event(self, kind: str, value: float) -> None:
+        """记录一条异常事件（deque 满了自动丢弃最旧的）"""
+        self.recent_events.append((time.time(), kind, value))
@@ -0,0 +1,451 @@
+"""解码后 PCM 的磁盘缓存
+
+播放过的曲目解码结果以原始采样（float32 或 int16）存到磁盘，再次播放时用 np.memmap 打开，
+不再解码；读取由操作系统的页缓存负责缓冲，不占用 Python 堆内存。
+
+缓存键由文件路径、修改时间和大小决定，文件变化后旧缓存自然失效。
+每条缓存是一对文件：<key>.pcm（原始采样）和 <key>.json（格式信息）。
+总大小超过预算时，按最近使用时间（.pcm 文件的修改时间）淘汰最旧的条目。
+正在写入的临时文件（<key>.pcm.<进程号>.<线程号>.tmp）也计入预算；写入中断（程序崩溃、
+被强制结束）留下的临时文件在启动和淘汰时删除。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Set, Tuple
+import numpy as np
+
+from ..utils.file_key import file_cache_key
+
+# 支持的存储格式及对应的 soundfile 子类型，解码器据此决定缓冲区的采样格式
+_SUBTYPES = {"float32": "FLOAT", "int16": "PCM_16"}
+
+STALE_TMP_SECONDS = 24 * 3600  # 无法确认写入进程是否还在时，临时文件超过这个时间没有修改就视为中断的写入
+
+# 本进程正在写入的临时文件（所有 PCMCache 实例共用，清理时不会删除）
+_active_tmp: Set[str] = set()
+_active_lock = threading.Lock()
+
+
+def _full_scale(dtype: np.dtype) -> float:
+    """采样格式的满刻度值（浮点为 1）"""
+    if np.issubdtype(dtype, np.integer):
+        return float(np.iinfo(dtype).max + 1)
+    return 1.0
+
+
+def _convert_into(source: np.ndarray, out: np.ndarray) -> None:
+    """按满刻度把采样从一种格式转换到另一种格式
+
+    Args:
+        source: 源采样
+        out: 目标缓冲区（同样形状）
+    """
+    if source.dtype == out.dtype:
+        np.copyto(out, source)
+        return
+    scale = _full_scale(out.dtype) / _full_scale(source.dtype)
+    if np.issubdtype(out.dtype, np.integer):
+        # 转换到整数时先限幅，避免溢出回绕
+        top = (_full_scale(out.dtype) - 1) / scale
+        np.multiply(np.clip(source, -_full_scale(source.dtype), top), scale,
+                    out=out, casting='unsafe')
+    else:
+        np.multiply(source, scale, out=out, casting='unsafe')
+
+
+class CachedPCMReader:
+    """基于 np.memmap 的缓存读取器，接口与解码器使用的 SoundFile 子集一致"""
+    
+    def __init__(self, pcm_path: str, info: dict):
+        """打开缓存文件
+        
+        Args:
+            pcm_path: .pcm 文件路径
+            info: 格式信息（samplerate, channels, frames, dtype）
+        """
+        self.samplerate: int = info["samplerate"]
+        self.channels: int = info["channels"]
+        self.frames: int = info["frames"]
+        self.subtype: str = _SUBTYPES[info["dtype"]]
+        self._data = np.memmap(pcm_path, dtype=info["dtype"], mode='r',
+                               shape=(self.frames, self.channels))
+        self.nbytes: int = self._data.nbytes  # 映射的字节数（由页缓存承担）
+        self._position = 0
+        self.closed = False
+    
+    def seek(self, frame: int) -> int:
+        """移动读取位置
+        
+        Args:
+            frame: 目标帧
+        
+        Returns:
+            新的读取位置
+        """
+        self._position = max(0, min(frame, self.frames))
+        return self._position
+    
+    def read(self, dtype: str = 'float32', always_2d: bool = True,
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """读取到 out 中，按 out 的类型转换采样格式
+        
+        Args:
+            dtype: 输出类型（以 out 的类型为准，保留以兼容 SoundFile.read）
+            always_2d: 保留以兼容 SoundFile.read
+            out: 目标缓冲区，形状为 (帧数, 声道数)
+        
+        Returns:
+            out 中实际写入的部分
+        """
+        count = min(len(out), self.frames - self._position)
+        _convert_into(self._data[self._position:self._position + count], out[:count])
+        self._position += count
+        return out[:count]
+    
+    def close(self) -> None:
+        """关闭映射"""
+        self._data = None
+        self.closed = True
+
+
+class PCMCacheWriter:
+    """把解码线程输出的块写入缓存
+    
+    解码器可能跳转，所以按帧区间记录已写入的范围；只有完整覆盖整首曲目后，
+    关闭时才会正式加入缓存，否则丢弃临时文件。
+    """
+    
+    def __init__(self, cache: "PCMCache", key: str, samplerate: int, channels: int, frames: int):
+        """创建临时缓存文件
+        
+        Args:
+            cache: 所属缓存
+            key: 缓存键
+            samplerate: 采样率
+            channels: 声道数
+            frames: 文件头中的总帧数
+        """
+        self._cache = cache
+        self._key = key
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frames = frames
+        self._dtype = cache.dtype
+        self._tmp_path = cache.pcm_path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with _active_lock:
+            _active_tmp.add(self._tmp_path)
+        try:
+            self._data = np.memmap(self._tmp_path, dtype=self._dtype, mode='w+',
+                                   shape=(max(frames, 1), channels))
+        except OSError:
+            self._release_tmp()
+            _remove(self._tmp_path)
+            raise
+        self._covered: List[Tuple[int, int]] = []
+        self._end: Optional[int] = None  # 实际解码到的末尾（可能与文件头不同）
+    
+    def write(self, frame: int, *blocks: np.ndarray) -> None:
+        """写入从 frame 开始的连续数据
+        
+        Args:
+            frame: 起始帧
+            blocks: 依次相连的数据块（float32 或整数采样）
+        """
+        start = frame
+        for block in blocks:
+            count = min(len(block), self.frames - frame)
+            if count <= 0:
+                break
+            _convert_into(block[:count], self._data[frame:frame + count])
+            frame += count
+        if frame > start:
+            self._add_range(start, frame)
+    
+    def mark_end(self, frame: int) -> None:
+        """记录解码器遇到文件末尾时的位置
+        
+        Args:
+            frame: 末尾帧
+        """
+        self._end = min(frame, self.frames)
+    
+    def is_complete(self) -> bool:
+        """是否已完整覆盖整首曲目
+        
+        Returns:
+            是否完整
+        """
+        if self._end is None or not self._covered:
+            return False
+        first_start, first_end = self._covered[0]
+        return first_start == 0 and first_end >= self._end
+    
+    def close(self) -> None:
+        """关闭写入器：完整则加入缓存，否则丢弃"""
+        if self._data is None:
+            return
+        complete = self.is_complete() and self._end > 0
+        self._data.flush()
+        self._data = None
+        self._release_tmp()
+        if complete:
+            self._cache._commit(self._key, self._tmp_path, {
+                "samplerate": self.samplerate,
+                "channels": self.channels,
+                "frames": self._end,
+                "dtype": self._dtype,
+            })
+        else:
+            _remove(self._tmp_path)
+    
+    def _release_tmp(self) -> None:
+        """取消临时文件的登记（之后提交或删除）"""
+        with _active_lock:
+            _active_tmp.discard(self._tmp_path)
+    
+    def _add_range(self, start: int, end: int) -> None:
+        """合并已写入的帧区间"""
+        merged = []
+        for a, b in self._covered:
+            if b < start or a > end:
+                merged.append((a, b))
+            else:
+                start, end = min(a, start), max(b, end)
+        merged.append((start, end))
+        merged.sort()
+        self._covered = merged
+
+
+class PCMCache:
+    """解码后 PCM 的磁盘缓存（按大小预算做 LRU 淘汰）"""
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 * 1024 * 1024, dtype: str = "float32"):
+        """初始化缓存
+        
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+            dtype: 存储格式，"float32"（无损）或 "int16"（体积减半）
+        """
+        if dtype not in _SUBTYPES:
+            raise ValueError(f"不支持的缓存格式: {dtype}")
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = max_bytes
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, mode=0o755, exist_ok=True)
+        with self._lock:
+            self._remove_stale_tmp()
+    
+    def key_for(self, file_path: str) -> Optional[str]:
+        """根据路径、修改时间和大小计算缓存键
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            缓存键，文件不存在时返回 None
+        """
+        return file_cache_key(file_path)
+    
+    def pcm_path(self, key: str) -> str:
+        """缓存的采样文件路径"""
+        return os.path.join(self.cache_dir, key + ".pcm")
+    
+    def info_path(self, key: str) -> str:
+        """缓存的格式信息文件路径"""
+        return os.path.join(self.cache_dir, key + ".json")
+    
+    def open(self, file_path: str) -> Optional[CachedPCMReader]:
+        """打开曲目的缓存
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            缓存读取器，未命中时返回 None
+        """
+        key = self.key_for(file_path)
+        if key is None:
+            return None
+        try:
+            with open(self.info_path(key), 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            reader = CachedPCMReader(self.pcm_path(key), info)
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        # 更新使用时间，供 LRU 淘汰参考
+        try:
+            os.utime(self.pcm_path(key))
+        except OSError:
+            pass
+        return reader
+    
+    def create_writer(self, file_path: str, samplerate: int, channels: int,
+                      frames: int) -> Optional[PCMCacheWriter]:
+        """为即将解码的曲目创建缓存写入器
+        
+        Args:
+            file_path: 音频文件路径
+            samplerate: 采样率
+            channels: 声道数
+            frames: 总帧数
+        
+        Returns:
+            写入器，曲目超出预算或无法创建时返回 None
+        """
+        key = self.key_for(file_path)
+        if key is None or frames <= 0:
+            return None
+        if frames * channels * np.dtype(self.dtype).itemsize > self.max_bytes:
+            return None
+        try:
+            return PCMCacheWriter(self, key, samplerate, channels, frames)
+        except OSError as e:
+            print(f"⚠️ 无法创建 PCM 缓存: {e}")
+            return None
+    
+    def total_bytes(self) -> int:
+        """缓存当前占用的字节数（包括正在写入的临时文件）
+        
+        Returns:
+            字节数
+        """
+        return sum(size for _, _, size in self._entries()) + sum(size for _, size in self._tmp_files())
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for key, _, _ in self._entries():
+                self._remove_entry(key)
+    
+    def _commit(self, key: str, tmp_path: str, info: dict) -> None:
+        """把写完的临时文件加入缓存，并按预算淘汰旧条目
+        
+        Args:
+            key: 缓存键
+            tmp_path: 临时采样文件
+            info: 格式信息
+        """
+        with self._lock:
+            try:
+                # 实际帧数可能少于文件头记录的帧数，截掉多余部分
+                os.truncate(tmp_path, info["frames"] * info["channels"] * np.dtype(info["dtype"]).itemsize)
+                os.replace(tmp_path, self.pcm_path(key))
+                with open(self.info_path(key), 'w', encoding='utf-8') as f:
+                    json.dump(info, f)
+            except OSError as e:
+                print(f"⚠️ 写入 PCM 缓存失败: {e}")
+                _remove(tmp_path)
+                return
+            self._evict(keep=key)
+    
+    def _tmp_files(self) -> List[Tuple[str, int]]:
+        """列出缓存目录中的临时文件
+        
+        Returns:
+            (路径, 大小) 列表
+        """
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                files.append((path, os.stat(path).st_size))
+            except OSError:
+                continue
+        return files
+    
+    def _is_stale_tmp(self, path: str) -> bool:
+        """临时文件是否是中断的写入留下的（调用方持有锁）
+        
+        Args:
+            path: 临时文件路径（<key>.pcm.<进程号>.<线程号>.tmp）
+        """
+        with _active_lock:
+            if path in _active_tmp:
+                return False
+        try:
+            pid = int(os.path.basename(path).split(".")[-3])
+        except (IndexError, ValueError):
+            pid = None
+        if pid == os.getpid():
+            return True  # 本进程的写入器已经不在了
+        if pid is not None and os.name == "posix":
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except OSError:
+                pass  # 进程存在但属于其他用户
+        try:
+            return time.time() - os.stat(path).st_mtime > STALE_TMP_SECONDS
+        except OSError:
+            return False
+    
+    def _remove_stale_tmp(self) -> int:
+        """删除中断的写入留下的临时文件（调用方持有锁）
+        
+        Returns:
+            删除的字节数
+        """
+        removed = 0
+        for path, size in self._tmp_files():
+            if self._is_stale_tmp(path):
+                _remove(path)
+                removed += size
+        if removed:
+            print(f"🧹 已清理中断写入的 PCM 缓存临时文件: {removed / 1024 / 1024:.1f} MB")
+        return removed
+    
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """列出缓存条目
+        
+        Returns:
+            (缓存键, 最近使用时间, 大小) 列表
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pcm"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((name[:-4], stat.st_mtime, stat.st_size))
+        return entries
+    
+    def _evict(self, keep: str) -> None:
+        """删除中断写入的临时文件，再淘汰最久未使用的条目，直到总大小（含正在写入的临时文件）不超过预算
+        
+        Args:
+            keep: 不淘汰的缓存键（刚写入的条目）
+        """
+        self._remove_stale_tmp()
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries) + sum(size for _, size in self._tmp_files())
+        for key, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove_entry(key)
+            total -= size
+    
+    def _remove_entry(self, key: str) -> None:
+        """删除一条缓存"""
+        _remove(self.pcm_path(key))
+        _remove(self.info_path(key))
+
+
+def _remove(path: str) -> None:
+    """删除文件（不存在时忽略）"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,37 +1,84 @@
 """播放引擎"""
 
 import os
+import queue
 import threading
+import time
 import numpy as np
-from typing import Optional, List
-from PySide6.QtCore import QObject, Signal, QTimer
-import soundfile as sf
-import sounddevice as sd
+from dataclasses import dataclass
+from typing import Callable, Optional, List, Tuple, Union
+from PySide6.QtCore import QObject, Signal, Qt
+
+from .audio_decoder import StreamingDecoder
+from .audio_output import OutputBackend, create_default_backend
+from .pcm_cache import PCMCache
+from .equalizer import Equalizer
+from .visualizer import AudioTap
+from .metrics import PlaybackMetrics
+
+# 音频线程投递给界面线程的事件（预先创建，回调中投递时不分配对象）
+EVENT_FINISHED = "finished"  # 曲目播放完毕
+EVENT_ADVANCED = "advanced"  # 无缝切换到下一首
+EVENT_FADED = "faded"  # 交叉淡化结束，上一首可以释放
+EVENT_UNDERRUN = "underrun"  # 解码跟不上，输出了静音
+EVENT_XRUN = "xrun"  # 设备报告欠载或溢出
+EVENT_POSITION = "position"  # 播放位置更新
+EVENT_QUIT = "quit"  # 结束事件分发线程
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """输出延迟档位：回调块大小、设备延迟、解码预读和界面刷新一起调整"""
+    name: str
+    blocksize: int  # 每次回调的帧数
+    latency: Union[str, float]  # 建议的设备延迟（PortAudio 的 'low' / 'high' 或秒数）
+    read_ahead: float  # 解码缓冲区的容量（秒）
+    decode_frames: int  # 解码线程每次读取的帧数
+    position_interval: float  # 位置事件的间隔（秒）
+
+
+LATENCY_PROFILES = {
+    # 低延迟：跳转和拖动进度条时尽快听到新位置，回调更频繁
+    "low_latency": LatencyProfile("low_latency", 256, "low", 0.5, 1024, 1 / 60),
+    # 均衡：原来的默认设置
+    "balanced": LatencyProfile("balanced", 2048, "high", 1.5, 4096, 0.1),
+    # 省电：大缓冲区，回调和解码线程很少被唤醒，适合长时间后台播放
+    "power_saving": LatencyProfile("power_saving", 8192, 0.5, 10.0, 32768, 0.5),
+}
+DEFAULT_LATENCY_PROFILE = "balanced"
 
 
 class PlaybackEngine(QObject):
-    """音频播放引擎"""
+    """音频播放引擎
+    
+    引擎持有一个长期存在的输出流，按 (设备, 采样率, 声道数, 延迟档位) 复用；
+    曲目只是挂到这个流上的音源，切歌时只替换音源，格式真正变化时才重新打开流。
+    """
     
     # 信号
     track_finished = Signal()  # 曲目播放完成
+    track_advanced = Signal(str)  # 无缝切换到预加载的下一首（文件路径）
     position_changed = Signal(float)  # 播放位置变化
     state_changed = Signal(str)  # 播放状态变化
+    underrun = Signal()  # 缓冲区欠载
+    
+    # 内部信号：事件分发线程 -> 界面线程
+    _audio_event = Signal(str)
     
-    def __init__(self):
-        """初始化播放引擎"""
+    def __init__(self, backend: Optional[OutputBackend] = None):
+        """初始化播放引擎
+        
+        Args:
+            backend: 音频输出后端，None 表示使用声卡（不可用时退回空输出）
+        """
         super().__init__()
         
-        try:
-            # 检查音频设备
-            devices = sd.query_devices()
-            print(f"✓ SoundDevice 音频引擎初始化成功")
-            print(f"ℹ️ 找到 {len(devices)} 个音频设备")
-        except Exception as e:
-            print(f"❌ SoundDevice 初始化失败: {e}")
-            raise
+        self._backend = backend if backend is not None else create_default_backend()
         
         self._current_file: Optional[str] = None
-        self._audio_data: Optional[np.ndarray] = None
+        self._decoder: Optional[StreamingDecoder] = None
+        self._pcm_cache: Optional[PCMCache] = None
+        self._compact_samples = True  # 16 位音频按 int16 存放
         self._sample_rate: int = 44100
         self._is_playing = False
         self._is_paused = False
@@ -40,22 +87,54 @@ class PlaybackEngine(QObject):
         
         # 播放控制
         self._stream = None
-        self._play_thread = None
-        self._stop_event = threading.Event()
-        self._pause_event = threading.Event()
-        self._volume = 1.0
+        self._stream_format: Optional[Tuple[Optional[int], int, int, str]] = None
+        self._device: Optional[int] = None
+        self._output_samplerate: Optional[int] = None  # 配置的输出采样率，None 表示设备默认
+        self._device_samplerate: Optional[int] = None  # 查询到的设备默认采样率
+        self._volume = 1.0  # 实际乘到音频上的倍数：用户音量 × 当前曲目的响度增益
+        self._user_volume = 1.0
+        self._gain_provider: Optional[Callable[[str], float]] = None
+        self._latency_profile = LATENCY_PROFILES[DEFAULT_LATENCY_PROFILE]
+        self._blocksize = self._latency_profile.blocksize  # 每次回调的帧数
+        self._measured_latency: Optional[float] = None  # 回调时间信息测得的输出延迟（秒）
+        self._equalizer = Equalizer()
+        self._tap = AudioTap()  # 可视化分流点，没有可视化时关闭
+        self._metrics = PlaybackMetrics()  # 回调健康指标，由音频线程写入
         self._current_frame = 0
+        self._finished = False  # 回调检测到曲目播放完毕
+        
+        # 音频时钟锚点：回调记录 (本块末尾的曲目位置, 本块播放完毕时的流时间, 位置下限)，
+        # 读取位置时按输出流的时钟插值，得到的是此刻实际听到的位置，而不是解码缓冲区的读取位置
+        self._clock_anchor: Optional[Tuple[float, float, float]] = None
+        self._position_floor = 0.0  # 跳转或切歌后的起点，设备缓冲区里的旧音频播完前位置不低于它
+        
+        # 无缝播放：预解码的下一首，回调在采样边界上接续
+        self._next_decoder: Optional[StreamingDecoder] = None
+        self._retired_decoder: Optional[StreamingDecoder] = None
+        self._source_lock = threading.Lock()
+        
+        # 交叉淡化：曲目结束前 N 秒切换到下一首，上一首作为淡出音源继续混入
+        self._crossfade_seconds = 0.0
+        self._fade_curves: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (淡入, 淡出) 等功率增益曲线
+        self._fade_scratch: Optional[np.ndarray] = None  # 淡出音源的读取缓冲区
+        self._fading_decoder: Optional[StreamingDecoder] = None
+        self._fade_pos = 0  # 当前在增益曲线上的位置（帧）
         
-        # 创建定时器检测播放结束
-        self._check_timer = QTimer()
-        self._check_timer.timeout.connect(self._check_playback_finished)
-        self._check_timer.start(100)  # 每100ms检查一次
+        # 音频线程通过事件队列通知界面线程，分发线程空闲时阻塞等待，不需要轮询定时器
+        self._events: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._position_interval = self._latency_profile.position_interval  # 位置事件的间隔（秒）
+        self._frames_since_position = 0
+        self._audio_event.connect(self._on_audio_event, Qt.ConnectionType.QueuedConnection)
+        self._event_thread = threading.Thread(target=self._dispatch_events, daemon=True)
+        self._event_thread.start()
     
-    def load_track(self, file_path: str) -> bool:
+    def load_track(self, file_path: str, probe_device: bool = True) -> bool:
         """加载音轨
         
         Args:
             file_path: 音频文件路径
+            probe_device: 是否查询输出设备的采样率；为 False 且设备尚未枚举时先按曲目采样率加载，
+                第一次播放前再按设备采样率重建解码器（启动恢复曲目时不必等待音频设备）
             
         Returns:
             是否加载成功
@@ -63,19 +142,25 @@ class PlaybackEngine(QObject):
         try:
             print(f"🎵 尝试加载: {os.path.basename(file_path)}")
             
-            # 停止当前播放
-            if self._is_playing:
-                self.stop()
+            # 使用 soundfile 流式解码（支持 FLAC, WAV, OGG, MP3 等），这里只读取文件头
+            decoder = self._create_decoder(file_path, probe_device)
             
-            # 使用 soundfile 加载音频（支持 FLAC, WAV, OGG, MP3 等）
-            self._audio_data, self._sample_rate = sf.read(file_path, dtype='float32')
+            # 从输出流上摘下当前音源（输出流保持打开）
+            self._detach_source()
             
+            self._decoder = decoder
+            self._update_volume()
+            self._sample_rate = decoder.samplerate
             self._current_file = file_path
-            self._duration = len(self._audio_data) / self._sample_rate
+            self._duration = decoder.duration
             self._position = 0.0
             self._current_frame = 0
+            self._reset_clock(0.0)
             
-            print(f"✓ 加载成功: {os.path.basename(file_path)} (时长: {self._duration:.2f}秒, 采样率: {self._sample_rate}Hz)")
+            source = "缓存" if decoder.from_cache else "解码"
+            usage = decoder.memory_usage()
+            print(f"✓ 加载成功: {os.path.basename(file_path)} (时长: {self._duration:.2f}秒, 采样率: {self._sample_rate}Hz, 来源: {source}, "
+                  f"缓冲区: {usage['buffer_bytes'] // 1024}KB {usage['sample_dtype']})")
             return True
             
         except Exception as e:
@@ -84,103 +169,146 @@ class PlaybackEngine(QObject):
     
     def play(self) -> None:
         """播放"""
-        if self._audio_data is None:
+        if self._decoder is None:
             return
         
         if self._is_paused:
             # 从暂停恢复
-            self._pause_event.clear()
             self._is_paused = False
             self._is_playing = True
             self.state_changed.emit("playing")
-        else:
-            # 开始新的播放（从当前位置）
-            self._stop_event.clear()
-            self._pause_event.clear()
-            self._is_playing = True
-            self._is_paused = False
-            
-            # 在新线程中播放
-            self._play_thread = threading.Thread(target=self._play_audio, daemon=True)
-            self._play_thread.start()
-            
-            self.state_changed.emit("playing")
+            return
+        
+        if self._is_playing:
+            return
+        
+        try:
+            # 复用已有输出流，格式不同时才重新打开
+            self._match_output_samplerate()
+            self._ensure_stream(self._decoder.output_samplerate, self._decoder.channels)
+        except Exception as e:
+            print(f"❌ 打开音频流失败: {e}")
+            return
+        
+        # 开始新的播放（从当前位置），解码线程开始向缓冲区填充数据
+        self._finished = False
+        self._decoder.start(self._current_frame)
+        self._is_paused = False
+        self._is_playing = True
+        
+        self.state_changed.emit("playing")
     
     def pause(self) -> None:
         """暂停"""
         if self._is_playing and not self._is_paused:
-            self._pause_event.set()
+            self._position = self.get_position()  # 停在实际听到的位置
             self._is_paused = True
             self.state_changed.emit("paused")
     
     def stop(self) -> None:
         """停止"""
-        self._stop_event.set()
-        self._pause_event.clear()
         self._is_playing = False
         self._is_paused = False
+        self._finished = False
         self._position = 0.0
         self._current_frame = 0
+        self._reset_clock(0.0)
         
-        # 停止音频流
-        if self._stream is not None:
+        # 停止解码；输出流保持打开，只是暂停回调，空闲时不再占用 CPU
+        self._cancel_crossfade()
+        if self._decoder is not None:
+            self._decoder.stop()
+        if self._stream is not None and self._stream.active:
             try:
-                self._stream.stop()
-                self._stream.close()
-            except:
+                self._stream.abort()
+            except Exception:
                 pass
-            self._stream = None
-        
-        # 等待播放线程结束
-        if self._play_thread and self._play_thread.is_alive():
-            self._play_thread.join(timeout=1.0)
         
         self.state_changed.emit("stopped")
     
-    def seek(self, position: float) -> None:
-        """跳转到指定位置
+    def queue_next_track(self, file_path: str) -> bool:
+        """预加载下一首，当前曲目结束时在采样边界上无缝接续
+        
+        不同采样率的曲目会被重采样到同一输出采样率，只有声道数不同时才无法接续，此时返回 False，
+        由控制器在曲目结束后按普通方式切歌。
         
         Args:
-            position: 位置（秒）
+            file_path: 音频文件路径
+            
+        Returns:
+            是否已预加载
         """
-        if self._audio_data is None or position < 0 or position > self._duration:
-            return
+        self.clear_next_track()
+        if self._decoder is None:
+            return False
         
-        was_playing = self._is_playing and not self._is_paused
+        try:
+            decoder = self._create_decoder(file_path)
+        except Exception as e:
+            print(f"❌ 预加载下一首失败: {e} - {os.path.basename(file_path)}")
+            return False
         
-        # 停止当前播放（不触发信号）
-        self._stop_event.set()
-        self._pause_event.clear()
+        if ((decoder.output_samplerate, decoder.channels)
+                != (self._decoder.output_samplerate, self._decoder.channels)):
+            decoder.close()
+            return False
         
-        # 停止音频流
-        if self._stream is not None:
-            try:
-                self._stream.stop()
-                self._stream.close()
-            except:
-                pass
-            self._stream = None
+        # 在后台先解码开头部分，填满缓冲区
+        decoder.start(0)
+        with self._source_lock:
+            self._next_decoder = decoder
+        print(f"⏭ 已预加载下一首: {os.path.basename(file_path)}")
+        return True
+    
+    def get_next_track(self) -> Optional[str]:
+        """获取已预加载的下一首
         
-        # 等待播放线程结束
-        if self._play_thread and self._play_thread.is_alive():
-            self._play_thread.join(timeout=0.5)
+        Returns:
+            文件路径，没有预加载时返回 None
+        """
+        decoder = self._next_decoder
+        return decoder.file_path if decoder is not None else None
+    
+    def clear_next_track(self) -> None:
+        """取消预加载的下一首"""
+        with self._source_lock:
+            decoder = self._next_decoder
+            self._next_decoder = None
+        if decoder is not None:
+            decoder.close()
+    
+    def shutdown(self) -> None:
+        """关闭输出流并释放音源，结束事件分发线程（应用退出时调用）"""
+        self._detach_source()
+        self._decoder = None
+        self._close_stream()
+        self._events.put(EVENT_QUIT)
+        if self._event_thread.is_alive() and self._event_thread is not threading.current_thread():
+            self._event_thread.join(timeout=1.0)
+    
+    def seek(self, position: float) -> None:
+        """跳转到指定位置
+        
+        播放中跳转不会重建播放线程和音频流：跳转作为命令交给解码器，
+        回调在下一个块边界移动读取位置。
+        
+        Args:
+            position: 位置（秒）
+        """
+        if self._decoder is None or position < 0 or position > self._duration:
+            return
         
         # 设置新位置
         self._position = position
         self._current_frame = int(position * self._sample_rate)
+        self._reset_clock(position)
         
-        # 重置标志
-        self._stop_event.clear()
+        if self._is_playing:
+            # 播放或暂停中：解码器立即开始从新位置填充，正在淡出的上一首直接停止
+            self._cancel_crossfade()
+            self._decoder.seek(self._current_frame)
         
-        # 如果之前在播放，继续播放
-        if was_playing:
-            self._is_playing = False  # 重置状态
-            self._is_paused = False
-            self.play()
-        else:
-            # 如果之前是暂停状态，保持暂停
-            self._is_playing = False
-            self._is_paused = False
+        self.position_changed.emit(self._position)
     
     def load_and_set_position(self, file_path: str, position: float = 0.0) -> bool:
         """加载音轨并设置到指定位置（准备播放状态）
@@ -192,10 +320,11 @@ class PlaybackEngine(QObject):
         Returns:
             是否加载成功
         """
-        if self.load_track(file_path):
+        if self.load_track(file_path, probe_device=False):
             # 设置位置
             self._position = min(position, self._duration)
             self._current_frame = int(self._position * self._sample_rate)
+            self._reset_clock(self._position)
             
             # 不设置播放状态，保持加载状态
             # 这样点击播放时会从当前位置开始
@@ -204,13 +333,34 @@ class PlaybackEngine(QObject):
             return True
         return False
     
+    def is_loaded(self) -> bool:
+        """是否已加载曲目
+        
+        Returns:
+            是否已加载
+        """
+        return self._decoder is not None
+    
     def get_position(self) -> float:
         """获取当前播放位置
         
+        播放中按最近一次回调发布的锚点和输出流的时钟插值，可以按任意频率调用，
+        结果与设备此刻实际输出的音频对应（已扣除设备缓冲区的延迟）。
+        
         Returns:
             当前位置（秒）
         """
-        return self._position
+        anchor = self._clock_anchor
+        stream = self._stream
+        if anchor is None or stream is None or not self.is_playing():
+            return self._position
+        try:
+            now = stream.time
+        except Exception:
+            return self._position
+        end_position, end_time, floor = anchor
+        position = end_position - max(0.0, end_time - now)
+        return min(max(position, floor), self._duration)
     
     def get_duration(self) -> float:
         """获取当前曲目时长
@@ -235,7 +385,89 @@ class PlaybackEngine(QObject):
         Args:
             volume: 音量（0.0 到 1.0）
         """
-        self._volume = max(0.0, min(1.0, volume))
+        self._user_volume = max(0.0, min(1.0, volume))
+        self._update_volume()
+    
+    def set_crossfade(self, seconds: float) -> None:
+        """设置交叉淡化时长
+        
+        启用后，引擎在当前曲目结束前 seconds 秒切换到预加载的下一首，两首在回调中按等功率曲线混合；
+        曲目短于两倍淡化时长时仍按无缝方式接续。
+        
+        Args:
+            seconds: 淡化时长（秒），0 表示不淡化（无缝接续）
+        """
+        self._crossfade_seconds = max(0.0, float(seconds))
+        if self._stream_format is not None:
+            _, samplerate, channels, _ = self._stream_format
+            self._configure_crossfade(samplerate, channels)
+    
+    def set_latency_profile(self, name: str) -> None:
+        """切换输出延迟档位
+        
+        块大小和设备延迟立即生效（正在播放时重新打开输出流），解码预读从下一首曲目开始生效。
+        
+        Args:
+            name: 档位名称，见 LATENCY_PROFILES
+        """
+        profile = LATENCY_PROFILES.get(name)
+        if profile is None:
+            print(f"⚠️ 未知的延迟档位: {name}，使用 {DEFAULT_LATENCY_PROFILE}")
+            profile = LATENCY_PROFILES[DEFAULT_LATENCY_PROFILE]
+        if profile == self._latency_profile:
+            return
+        
+        # 先关闭旧的流，回调不会再用旧的块大小访问预分配的缓冲区
+        stream_format = self._stream_format
+        was_active = self._stream is not None and self._stream.active
+        self._close_stream()
+        self._latency_profile = profile
+        self._blocksize = profile.blocksize
+        self._position_interval = profile.position_interval
+        self._measured_latency = None
+        print(f"⏱ 延迟档位: {profile.name} (块 {profile.blocksize} 帧, 预读 {profile.read_ahead:g} 秒)")
+        
+        if was_active and stream_format is not None:
+            try:
+                self._ensure_stream(stream_format[1], stream_format[2])
+            except Exception as e:
+                print(f"❌ 重新打开音频流失败: {e}")
+    
+    def get_latency_report(self) -> dict:
+        """获取当前延迟档位和实测的输出延迟
+        
+        Returns:
+            包含档位名称、块大小、建议延迟、每块时长、设备报告的输出延迟和回调实测延迟（毫秒）的字典，
+            输出流未打开时延迟为 None
+        """
+        profile = self._latency_profile
+        samplerate = self._stream_format[1] if self._stream_format is not None else None
+        reported = None
+        if self._stream is not None:
+            try:
+                reported = float(self._stream.latency) * 1000
+            except Exception:
+                pass
+        measured = self._measured_latency
+        return {
+            "profile": profile.name,
+            "blocksize": profile.blocksize,
+            "requested_latency": profile.latency,
+            "block_ms": profile.blocksize / samplerate * 1000 if samplerate else None,
+            "output_latency_ms": reported,
+            "measured_latency_ms": measured * 1000 if measured is not None else None,
+            "read_ahead_ms": profile.read_ahead * 1000,
+        }
+    
+    def set_gain_provider(self, provider: Optional[Callable[[str], float]]) -> None:
+        """设置响度增益的来源（之后加载的曲目生效）
+        
+        增益并入回调里已有的音量乘法，不增加每块的计算量。
+        
+        Args:
+            provider: 根据文件路径返回线性增益的函数，None 表示不做响度均衡
+        """
+        self._gain_provider = provider
     
     def is_playing(self) -> bool:
         """是否正在播放
@@ -261,114 +493,498 @@ class PlaybackEngine(QObject):
         """
         return self._is_playing
     
+    def set_pcm_cache(self, cache: Optional[PCMCache]) -> None:
+        """设置解码后 PCM 的磁盘缓存（之后加载的曲目生效）
+        
+        Args:
+            cache: PCM 缓存，None 表示不使用缓存
+        """
+        self._pcm_cache = cache
+    
+    def set_output_samplerate(self, samplerate: Optional[int]) -> None:
+        """设置输出流的采样率（之后加载的曲目生效）
+        
+        所有曲目都重采样到这个采样率，输出流在不同采样率的曲目之间不必重新打开。
+        
+        Args:
+            samplerate: 采样率，None 表示使用设备的默认采样率（后端无法提供时跟随曲目）
+        """
+        self._output_samplerate = samplerate
+    
+    def set_compact_samples(self, enabled: bool) -> None:
+        """设置是否按原始位宽存放采样（之后加载的曲目生效）
+        
+        Args:
+            enabled: 是否启用
+        """
+        self._compact_samples = enabled
+    
+    def memory_report(self) -> List[dict]:
+        """统计每个已加载曲目占用的内存
+        
+        Returns:
+            每个解码器一项，见 StreamingDecoder.memory_usage，另加 role 字段（current/next/fading/retired）
+        """
+        report = []
+        for role, decoder in (("current", self._decoder),
+                              ("next", self._next_decoder),
+                              ("fading", self._fading_decoder),
+                              ("retired", self._retired_decoder)):
+            if decoder is not None:
+                usage = decoder.memory_usage()
+                usage["role"] = role
+                report.append(usage)
+        return report
+    
+    def get_backend(self) -> OutputBackend:
+        """获取音频输出后端
+        
+        Returns:
+            输出后端
+        """
+        return self._backend
+    
+    def get_callback_stats(self) -> dict:
+        """获取回调耗时统计（自上次 reset_metrics() 起）
+        
+        Returns:
+            统计摘要，见 PlaybackMetrics.callback_summary
+        """
+        return self._metrics.callback_summary()
+    
+    def get_metrics(self) -> dict:
+        """获取回调健康指标的快照
+        
+        Returns:
+            欠载/溢出计数、回调耗时、缓冲区填充率和解码到输出延迟的统计，见 PlaybackMetrics.snapshot
+        """
+        return self._metrics.snapshot()
+    
+    def reset_metrics(self) -> None:
+        """清空回调健康指标"""
+        self._metrics.reset()
+    
+    def dump_metrics(self, file_path: str) -> None:
+        """把回调健康指标导出为 JSON 文件
+        
+        Args:
+            file_path: 文件路径
+        """
+        self._metrics.dump(file_path)
+    
     def set_equalizer(self, bands: List[float]) -> None:
-        """设置均衡器
+        """设置均衡器（播放中修改会在下一个块平滑切换）
         
         Args:
-            bands: 频段增益列表
+            bands: 频段增益列表（dB），全部为 0 时均衡器直通
         """
-        pass
+        self._equalizer.set_bands(bands)
     
-    def _play_audio(self) -> None:
-        """在后台线程中播放音频"""
-        playback_completed = False  # 标记是否正常播放完成
+    def get_audio_tap(self) -> AudioTap:
+        """获取输出音频的可视化分流点
         
-        try:
-            # 从当前帧开始播放
-            start_frame = self._current_frame
-            total_frames = len(self._audio_data)
-            
-            # 不在这里应用音量，而是在回调函数中实时应用
-            audio_to_play = self._audio_data[start_frame:].copy()
-            
-            # 确保是2D数组（即使是单声道）
-            if len(audio_to_play.shape) == 1:
-                audio_to_play = audio_to_play.reshape(-1, 1)
-            
-            # 当前播放位置
-            current_pos = [0]
-            
-            def callback(outdata, frames, time_info, status):
-                """音频回调函数"""
-                if status:
-                    print(f"⚠️ 播放状态: {status}")
-                
-                # 检查停止标志
-                if self._stop_event.is_set():
-                    raise sd.CallbackStop()
-                
-                # 检查暂停标志
-                if self._pause_event.is_set():
-                    outdata.fill(0)  # 静音
-                    return
-                
-                # 计算剩余帧数
-                remaining_frames = len(audio_to_play) - current_pos[0]
-                
-                if remaining_frames <= 0:
-                    # 播放完毕
-                    outdata.fill(0)
-                    raise sd.CallbackStop()
-                
-                # 复制音频数据并实时应用音量
-                frames_to_copy = min(frames, remaining_frames)
-                outdata[:frames_to_copy] = audio_to_play[current_pos[0]:current_pos[0] + frames_to_copy] * self._volume
-                
-                if frames_to_copy < frames:
-                    outdata[frames_to_copy:].fill(0)
-                
-                # 更新位置
-                current_pos[0] += frames_to_copy
-                self._current_frame = start_frame + current_pos[0]
-                self._position = self._current_frame / self._sample_rate
-            
-            # 创建并启动音频流
-            channels = audio_to_play.shape[1]
-            
-            with sd.OutputStream(
-                samplerate=self._sample_rate,
-                channels=channels,
-                callback=callback,
-                blocksize=2048,  # 增加缓冲区大小
-                dtype='float32'
-            ) as stream:
-                # 等待播放完成或被停止
-                while stream.active and not self._stop_event.is_set():
-                    sd.sleep(100)
+        Returns:
+            分流点（音频经过音量、淡化和均衡器之后的样子）
+        """
+        return self._tap
+    
+    def warm_up_output(self) -> None:
+        """初始化音频设备并查询默认采样率（耗时，在后台线程调用）
+        
+        启动时不枚举音频设备，界面显示后再在后台完成，第一次播放时不必再等。
+        """
+        self._backend.warm_up()
+        self._target_samplerate()
+    
+    def _create_decoder(self, file_path: str, probe_device: bool = True) -> StreamingDecoder:
+        """按当前设置创建解码器
+        
+        Args:
+            file_path: 音频文件路径
+            probe_device: 设备采样率未知时是否查询，见 load_track
             
-            # 如果正常播放完毕（不是被停止）
-            if not self._stop_event.is_set() and current_pos[0] >= len(audio_to_play):
-                playback_completed = True
+        Returns:
+            解码器
+        """
+        profile = self._latency_profile
+        samplerate = self._target_samplerate(probe_device)
+        decoder = StreamingDecoder(file_path, block_frames=profile.decode_frames,
+                                   buffer_frames=int(profile.read_ahead * (samplerate or 48000)),
+                                   cache=self._pcm_cache, compact=self._compact_samples,
+                                   output_samplerate=samplerate)
+        if self._gain_provider is not None:
+            decoder.gain = self._gain_provider(file_path)
+        return decoder
+    
+    def _target_samplerate(self, probe_device: bool = True) -> Optional[int]:
+        """输出流使用的采样率
+        
+        Args:
+            probe_device: 设备采样率未知时是否查询（第一次查询会初始化音频设备）
+        
+        Returns:
+            配置的采样率或设备默认采样率，都没有时返回 None（跟随曲目）
+        """
+        if self._output_samplerate:
+            return self._output_samplerate
+        if self._device_samplerate is None:
+            if not probe_device:
+                return None
+            self._device_samplerate = self._backend.default_samplerate(self._device) or 0
+        return self._device_samplerate or None
+    
+    def _match_output_samplerate(self) -> None:
+        """开始播放前确认解码器的输出采样率与输出流一致，不一致时重建解码器
+        
+        启动时恢复的曲目是在枚举音频设备之前加载的，第一次播放时在这里改用设备采样率。
+        """
+        decoder = self._decoder
+        samplerate = self._target_samplerate()
+        if samplerate is None or decoder.output_samplerate == samplerate:
+            return
+        replacement = self._create_decoder(self._current_file)
+        self._decoder = replacement
+        decoder.close()
+    
+    def _reset_clock(self, position: float) -> None:
+        """跳转、切歌或停止后作废旧锚点
+        
+        Args:
+            position: 新的起始位置（秒）
+        """
+        self._clock_anchor = None
+        self._position_floor = position
+    
+    def _publish_clock(self, time_info, frames: int, samplerate: int) -> None:
+        """在回调末尾发布时钟锚点
+        
+        Args:
+            time_info: 回调的时间信息
+            frames: 本块帧数
+            samplerate: 输出采样率
+        """
+        dac_time = time_info.outputBufferDacTime or time_info.currentTime
+        if not dac_time:
+            # 部分宿主 API 不提供时间信息，只能退回解码缓冲区的读取位置
+            self._clock_anchor = None
+            return
+        if time_info.outputBufferDacTime and time_info.currentTime:
+            self._measured_latency = max(0.0, time_info.outputBufferDacTime - time_info.currentTime)
+        self._clock_anchor = (self._position, dac_time + frames / samplerate, self._position_floor)
+    
+    def _update_volume(self) -> None:
+        """根据用户音量和当前曲目的增益更新实际音量"""
+        decoder = self._decoder
+        self._volume = self._user_volume * (decoder.gain if decoder is not None else 1.0)
+    
+    def _ensure_stream(self, samplerate: int, channels: int) -> None:
+        """确保输出流以指定格式运行
+        
+        Args:
+            samplerate: 采样率
+            channels: 声道数
+        """
+        stream_format = (self._device, samplerate, channels, self._latency_profile.name)
+        if self._stream is not None and self._stream_format == stream_format:
+            if not self._stream.active:
+                self._stream.start()
+            return
+        
+        self._close_stream()
+        
+        profile = self._latency_profile
+        self._equalizer.configure(samplerate, channels, self._blocksize)
+        self._tap.configure(samplerate, channels)
+        self._metrics.configure(samplerate, self._blocksize)
+        self._configure_crossfade(samplerate, channels)
+        self._stream = self._backend.open_stream(
+            self._device,
+            samplerate,
+            channels,
+            self._blocksize,
+            self._audio_callback,
+            latency=profile.latency
+        )
+        self._stream.start()
+        self._stream_format = stream_format
+        print(f"🔊 打开音频流: {samplerate}Hz, {channels} 声道, 延迟档位 {profile.name} "
+              f"(块 {self._blocksize} 帧, 输出延迟 {float(self._stream.latency) * 1000:.1f} ms)")
+    
+    def _configure_crossfade(self, samplerate: int, channels: int) -> None:
+        """按输出格式预先计算淡化曲线和读取缓冲区（回调中只做查表和乘加）
+        
+        Args:
+            samplerate: 输出采样率
+            channels: 声道数
+        """
+        frames = int(self._crossfade_seconds * samplerate)
+        if frames <= 0:
+            self._fade_curves = None
+            return
+        
+        # 等功率曲线：sin² + cos² = 1，不相关的两首歌混合时总响度保持不变
+        # 曲线按声道展开成和输出相同的形状：广播的就地乘法会让 numpy 分配临时数组
+        angle = (np.arange(frames, dtype=np.float64) + 0.5) / frames * (np.pi / 2)
+        fade_in = np.repeat(np.sin(angle).astype(np.float32)[:, np.newaxis], channels, axis=1)
+        fade_out = np.repeat(np.cos(angle).astype(np.float32)[:, np.newaxis], channels, axis=1)
+        if self._fade_scratch is None or self._fade_scratch.shape != (self._blocksize, channels):
+            self._fade_scratch = np.zeros((self._blocksize, channels), dtype=np.float32)
+        self._fade_curves = (fade_in, fade_out)
+    
+    def _cancel_crossfade(self) -> None:
+        """立即停止正在淡出的上一首"""
+        with self._source_lock:
+            decoder = self._fading_decoder
+            self._fading_decoder = None
+        if decoder is not None:
+            decoder.close()
+    
+    def _close_stream(self) -> None:
+        """关闭输出流"""
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+            self._stream_format = None
+    
+    def _detach_source(self) -> None:
+        """停止并释放当前音源（不影响输出流）"""
+        self._is_playing = False
+        self._is_paused = False
+        self._finished = False
+        self.clear_next_track()
+        self._cancel_crossfade()
+        
+        with self._source_lock:
+            decoder = self._decoder
+            self._decoder = None
+        if decoder is not None:
+            decoder.close()
+    
+    def _audio_callback(self, outdata, frames, time_info, status) -> None:
+        """音频回调函数：生成本块音频并记录健康指标"""
+        start = time.perf_counter()
+        if status:
+            self._metrics.record_status(status)
+            self._events.put(EVENT_XRUN)
+        self._render(outdata, frames, time_info)
+        stream_format = self._stream_format
+        self._metrics.record_callback(time.perf_counter() - start, frames,
+                                      stream_format[1] if stream_format else 0)
+    
+    def _render(self, outdata, frames, time_info) -> None:
+        """生成本块音频（不分配内存：音量直接乘到设备缓冲区中）"""
+        decoder = self._decoder
+        if decoder is None or not self._is_playing or self._is_paused or self._finished:
+            outdata.fill(0)  # 静音
+            if self._equalizer.is_active():
+                self._equalizer.process(outdata)  # 让滤波器的尾音自然衰减
+            return
+        
+        # 淡化在本块内开始时，先输出当前曲目到起点，再切换到下一首，上一首转为淡出音源
+        offset = 0
+        curves = self._fade_curves
+        if curves is not None and self._fading_decoder is None and self._next_decoder is not None:
+            lead = self._frames_before_crossfade(decoder, len(curves[0]))
+            if lead is not None and lead < frames:
+                if lead > 0:
+                    offset = decoder.read_into(outdata[:lead], self._volume)
+                if self._advance_to_next(fade_frames=len(curves[0])):
+                    decoder = self._decoder
+        
+        # 从解码缓冲区读取并实时应用音量
+        written = offset + decoder.read_into(outdata[offset:], self._volume)
+        if written < frames:
+            outdata[written:].fill(0)
+        
+        # 更新位置，按固定间隔通知界面
+        self._current_frame = decoder.position
+        self._position = self._current_frame / self._sample_rate
+        self._frames_since_position += frames
+        if self._frames_since_position >= self._position_interval * decoder.output_samplerate:
+            self._frames_since_position = 0
+            self._events.put(EVENT_POSITION)
+        
+        if written < frames and decoder.is_exhausted():
+            if self._next_decoder is not None:
+                # 无缝接续：用下一首填满本块剩余部分（拿不到锁时本块余下部分静音，下一块再接续）
+                if self._advance_to_next():
+                    decoder = self._decoder
+                    written += decoder.read_into(outdata[written:], self._volume)
+                    if written < frames:
+                        outdata[written:].fill(0)
+                    self._current_frame = decoder.position
+                    self._position = self._current_frame / self._sample_rate
+            else:
+                # 播放完毕
                 self._position = self._duration
-                print("🎵 播放线程：音频播放完成")
-                
-        except sd.CallbackStop:
-            pass
-        except Exception as e:
-            print(f"❌ 播放错误: {e}")
-            import traceback
-            traceback.print_exc()
+                self._finished = True
+                self._events.put(EVENT_FINISHED)
+        elif written < frames and decoder.is_primed():
+            self._metrics.record_decode_underrun()
+            self._events.put(EVENT_UNDERRUN)
+        
+        fading = self._fading_decoder
+        if fading is not None:
+            self._mix_fading(outdata[offset:], fading, curves)
+        
+        self._publish_clock(time_info, frames, decoder.output_samplerate)
+        
+        # 缓冲区里排在本块之后的音频要先播完，加上设备延迟，就是刚解码的音频还要多久才能听到
+        ring = decoder.ring
+        latency = self._measured_latency or 0.0
+        self._metrics.record_buffer(ring.fill_level(),
+                                    ring.available_read() / decoder.output_samplerate + latency)
+        
+        if self._equalizer.is_active():
+            self._equalizer.process(outdata)
+        
+        self._tap.push(outdata)  # 暂停时不推送，可视化自然回落
+    
+    def _frames_before_crossfade(self, decoder: StreamingDecoder, fade_frames: int) -> Optional[int]:
+        """距离淡化起点还有多少输出帧
+        
+        Args:
+            decoder: 当前解码器
+            fade_frames: 淡化时长（输出帧）
+        
+        Returns:
+            帧数（已进入淡化区间时为 0），曲目已结束或短于两倍淡化时长时返回 None
+        """
+        if decoder.samplerate <= 0:
+            return None
+        scale = decoder.output_samplerate / decoder.samplerate
+        remaining = int((decoder.frames - decoder.position) * scale)
+        if remaining <= 0 or decoder.frames * scale < 2 * fade_frames:
+            return None
+        return max(0, remaining - fade_frames)
+    
+    def _mix_fading(self, outdata: np.ndarray, fading: StreamingDecoder,
+                    curves: Optional[Tuple[np.ndarray, np.ndarray]]) -> None:
+        """把淡出音源按增益曲线混入输出（就地运算，不分配内存）
+        
+        Args:
+            outdata: 已写入淡入音源的输出缓冲区
+            fading: 淡出音源
+            curves: (淡入, 淡出) 增益曲线，None 表示淡化已被关闭
+        """
+        pos = self._fade_pos
+        count = 0
+        if curves is not None:
+            fade_in, fade_out = curves
+            count = max(0, min(len(outdata), len(self._fade_scratch), len(fade_in) - pos))
+        if count > 0:
+            np.multiply(outdata[:count], fade_in[pos:pos + count], out=outdata[:count])
+            scratch = self._fade_scratch[:count]
+            read = fading.read_into(scratch, self._user_volume * fading.gain)
+            np.multiply(scratch[:read], fade_out[pos:pos + read], out=scratch[:read])
+            np.add(outdata[:read], scratch[:read], out=outdata[:read])
+            self._fade_pos = pos + count
+        
+        if count == 0 or self._fade_pos >= len(curves[0]) or fading.is_exhausted():
+            # 淡化结束，上一首交给界面线程释放
+            if self._source_lock.acquire(blocking=False):
+                try:
+                    if self._fading_decoder is fading:
+                        self._fading_decoder = None
+                        self._retired_decoder = fading
+                        self._events.put(EVENT_FADED)
+                finally:
+                    self._source_lock.release()
+    
+    def _advance_to_next(self, fade_frames: int = 0) -> bool:
+        """在回调中切换到预加载的下一首（拿不到锁时放弃，下一块再试）
+        
+        Args:
+            fade_frames: 淡化时长（输出帧），大于 0 时保留上一首作为淡出音源，否则上一首已播放完毕，直接退役
+        
+        Returns:
+            是否已切换
+        """
+        if not self._source_lock.acquire(blocking=False):
+            return False
+        try:
+            decoder = self._next_decoder
+            if decoder is None:
+                return False
+            if fade_frames > 0:
+                # 上一首可能在淡化结束前就已解码完毕，淡化曲线从剩余时长对应的位置开始，两者同时结束
+                previous = self._decoder
+                scale = previous.output_samplerate / previous.samplerate
+                remaining = int((previous.frames - previous.position) * scale)
+                self._fade_pos = max(0, fade_frames - remaining)
+                self._fading_decoder = previous
+            else:
+                self._retired_decoder = self._decoder
+            self._decoder = decoder
+            self._update_volume()
+            self._next_decoder = None
+            self._current_file = decoder.file_path
+            self._sample_rate = decoder.samplerate
+            self._duration = decoder.duration
+            self._position_floor = 0.0
+            self._events.put(EVENT_ADVANCED)
+            return True
         finally:
-            # 线程结束时，如果是正常播放完成，触发信号
-            if playback_completed:
-                print("🎵 播放线程：准备触发 track_finished 信号")
-                # 注意：不要在这里设置 _is_playing = False
-                # 让 _check_playback_finished 来处理
-    
-    def _check_playback_finished(self) -> None:
-        """检查播放是否结束"""
-        # 检查播放线程是否结束
-        if self._play_thread and not self._play_thread.is_alive():
-            # 线程已结束
-            if self._is_playing:  # 之前是播放状态
-                if not self._stop_event.is_set():  # 自然结束，不是被停止
-                    print("🎵 检测到播放完成，触发 track_finished 信号")
-                    self._is_playing = False
-                    self._is_paused = False
-                    self.state_changed.emit("stopped")
-                    self.track_finished.emit()
-                else:
-                    # 被手动停止
-                    print("⏹ 检测到手动停止")
-                    self._is_playing = False
-                    self._is_paused = False
+            self._source_lock.release()
+    
+    def _dispatch_events(self) -> None:
+        """事件分发线程：阻塞等待音频线程的事件，转发到界面线程"""
+        while True:
+            event = self._events.get()
+            if event == EVENT_QUIT:
+                break
+            self._audio_event.emit(event)
+    
+    def _on_audio_event(self, event: str) -> None:
+        """在界面线程处理音频线程的事件
+        
+        Args:
+            event: 事件类型
+        """
+        if event == EVENT_POSITION:
+            if self._is_playing:
+                self.position_changed.emit(self.get_position())
+        
+        elif event == EVENT_ADVANCED:
+            # 回调已无缝切换到下一首，在这里释放上一首的解码器
+            retired = self._retired_decoder
+            self._retired_decoder = None
+            if retired is not None:
+                retired.close()
+            if self._fading_decoder is not None:
+                print(f"🎵 交叉淡化到: {os.path.basename(self._current_file)}")
+            else:
+                print(f"🎵 无缝切换到: {os.path.basename(self._current_file)}")
+            self.track_advanced.emit(self._current_file)
+        
+        elif event == EVENT_FADED:
+            # 淡出结束，释放上一首的解码器
+            retired = self._retired_decoder
+            self._retired_decoder = None
+            if retired is not None:
+                retired.close()
+        
+        elif event == EVENT_XRUN:
+            events = self._metrics.recent_events
+            if events:
+                print(f"⚠️ 播放状态: {events[-1][1]}")
+        
+        elif event == EVENT_UNDERRUN:
+            print("⚠️ 缓冲区欠载：解码速度跟不上播放")
+            self.underrun.emit()
+        
+        elif event == EVENT_FINISHED:
+            if self._finished and self._is_playing:
+                print("🎵 检测到播放完成，触发 track_finished 信号")
+                self._finished = False
+                self._is_playing = False
+                self._is_paused = False
+                if self._decoder is not None:
+                    self._decoder.stop()
+                self.position_changed.emit(self._position)
+                self.state_changed.emit("stopped")
+                self.track_finished.emit()
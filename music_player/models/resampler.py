@@ -0,0 +1,126 @@
+"""多相加窗 sinc 重采样器
+
+把任意采样率转换到输出设备的固定采样率，输出流因此不必随曲目的采样率重新打开，
+也不依赖系统层面较慢（或不支持 88.2/176.4kHz）的重采样。
+
+输入/输出采样率化为最简比 up/down。第 n 个输出采样对应输入位置 n * down / up，
+用以该位置为中心、Kaiser 窗截断的 sinc 插值；小数部分量化为有限个相位，
+各相位的系数预先算好。按块流式处理，块之间保留滤波所需的历史输入。
+"""
+
+from functools import lru_cache
+from math import gcd
+import numpy as np
+
+HALF_TAPS = 32  # 插值核单侧的长度（输入采样）
+MAX_PHASES = 1024  # 相位数上限（up 超过时对小数位置量化）
+KAISER_BETA = 9.0
+PASSBAND = 0.94  # 截止频率相对于（较低一侧）奈奎斯特频率的比例
+
+
+@lru_cache(maxsize=16)
+def _phase_table(up: int, down: int) -> np.ndarray:
+    """计算各相位的插值系数
+    
+    Args:
+        up: 上采样因子
+        down: 下采样因子
+    
+    Returns:
+        形状为 (相位数, 2 * HALF_TAPS) 的 float32 只读数组
+    """
+    phases = min(up, MAX_PHASES)
+    cutoff = min(1.0, up / down) * PASSBAND  # 下采样时降低截止频率以抗混叠
+    offsets = np.arange(-HALF_TAPS + 1, HALF_TAPS + 1)
+    fraction = np.arange(phases).reshape(-1, 1) / phases
+    x = offsets - fraction
+    window = np.i0(KAISER_BETA * np.sqrt(np.clip(1 - (x / HALF_TAPS) ** 2, 0, None))) / np.i0(KAISER_BETA)
+    table = cutoff * np.sinc(cutoff * x) * window
+    table /= table.sum(axis=1, keepdims=True)  # 每个相位的直流增益为 1
+    table = table.astype(np.float32)
+    table.setflags(write=False)
+    return table
+
+
+class Resampler:
+    """流式重采样器（在解码线程中使用）"""
+    
+    def __init__(self, in_rate: int, out_rate: int, channels: int):
+        """初始化重采样器
+        
+        Args:
+            in_rate: 输入采样率
+            out_rate: 输出采样率
+            channels: 声道数
+        """
+        divisor = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self._up = out_rate // divisor
+        self._down = in_rate // divisor
+        self._phases = min(self._up, MAX_PHASES)
+        self._table = _phase_table(self._up, self._down)
+        self.reset()
+    
+    def max_output(self, frames: int) -> int:
+        """处理 frames 帧输入（含结束时的冲刷）最多产生的输出帧数
+        
+        Args:
+            frames: 输入帧数
+        
+        Returns:
+            输出帧数上限
+        """
+        return -(-(frames + HALF_TAPS) * self._up // self._down) + 1
+    
+    def reset(self) -> None:
+        """清空历史（跳转后调用），下一个输出对应新的输入起点"""
+        # 缓冲区第一帧的绝对输入序号；开头补 HALF_TAPS - 1 帧静音，使第 0 个输出以第 0 帧为中心
+        self._buffer = np.zeros((HALF_TAPS - 1, self.channels), dtype=np.float32)
+        self._buffer_start = -(HALF_TAPS - 1)
+        self._received = 0
+        self._out_index = 0
+    
+    def process(self, data: np.ndarray, final: bool = False) -> np.ndarray:
+        """处理一块输入
+        
+        Args:
+            data: 形状为 (帧数, 声道数) 的 float32 输入
+            final: 是否为最后一块（冲刷剩余输出）
+        
+        Returns:
+            形状为 (帧数, 声道数) 的 float32 输出
+        """
+        pieces = [self._buffer, data]
+        if final:
+            pieces.append(np.zeros((HALF_TAPS, self.channels), dtype=np.float32))
+        self._buffer = np.concatenate(pieces)
+        self._received += len(data)
+        
+        # 第 n 个输出需要输入到 base + HALF_TAPS（base = n * down // up）
+        available_end = self._buffer_start + len(self._buffer)
+        max_base = available_end - HALF_TAPS - 1
+        end = -(-(max_base + 1) * self._up // self._down)
+        if final:
+            end = min(end, -(-self._received * self._up // self._down))
+        if end <= self._out_index:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        
+        n = np.arange(self._out_index, end, dtype=np.int64)
+        position = n * self._down
+        base = position // self._up
+        phase = (position % self._up) * self._phases // self._up
+        
+        windows = np.lib.stride_tricks.sliding_window_view(self._buffer, 2 * HALF_TAPS, axis=0)
+        gathered = windows[base - self._buffer_start - HALF_TAPS + 1]  # (输出帧, 声道, 2 * HALF_TAPS)
+        output = np.matmul(gathered, self._table[phase][:, :, np.newaxis])[:, :, 0]
+        
+        # 丢弃之后不再需要的历史
+        self._out_index = end
+        next_base = end * self._down // self._up
+        drop = next_base - HALF_TAPS + 1 - self._buffer_start
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_start += drop
+        return output
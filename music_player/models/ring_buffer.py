@@ -0,0 +1,169 @@
+"""单生产者/单消费者环形缓冲区"""
+
+from typing import Tuple
+import numpy as np
+
+
+class RingBuffer:
+    """预分配的 SPSC 环形缓冲区，按帧存放音频
+    
+    读写位置都是单调递增的整数：写位置只由生产者（解码线程）修改，
+    读位置只由消费者（音频回调）修改。整数赋值在 GIL 下是原子的，
+    生产者总是先写入数据、再发布写位置，因此两端都不需要加锁。
+    
+    缓冲区可以按整数格式（int16/int32）存放采样，读取时逐块转换为 float32，
+    16 位音频占用的内存因此减半。
+    """
+    
+    def __init__(self, capacity: int, channels: int, dtype=np.float32):
+        """初始化环形缓冲区
+        
+        Args:
+            capacity: 容量（帧）
+            channels: 声道数
+            dtype: 采样数据类型（float32、int16 或 int32）
+        """
+        self.capacity = capacity
+        self.channels = channels
+        self._buffer = np.zeros((capacity, channels), dtype=dtype)
+        
+        # 整数采样转换为 [-1, 1) 浮点的比例（与 soundfile 的约定一致）
+        if np.issubdtype(self._buffer.dtype, np.integer):
+            self._scale = 1.0 / (np.iinfo(self._buffer.dtype).max + 1)
+        else:
+            self._scale = 1.0
+        self._write_index = 0
+        self._read_index = 0
+        
+        # 统计（各自只由一端写入）
+        self.underruns = 0  # 消费者读取时数据不足的次数（流结束后不计）
+        self.min_fill = capacity  # 消费者读取前观察到的最低填充量（帧）
+        self.end_of_stream = False  # 生产者已写完当前流
+    
+    @property
+    def dtype(self) -> np.dtype:
+        """采样数据类型"""
+        return self._buffer.dtype
+    
+    @property
+    def nbytes(self) -> int:
+        """缓冲区占用的字节数"""
+        return self._buffer.nbytes
+    
+    @property
+    def write_index(self) -> int:
+        """已写入的总帧数"""
+        return self._write_index
+    
+    @property
+    def read_index(self) -> int:
+        """已读取的总帧数"""
+        return self._read_index
+    
+    def available_read(self) -> int:
+        """可读取的帧数"""
+        return self._write_index - self._read_index
+    
+    def available_write(self) -> int:
+        """可写入的帧数"""
+        return self.capacity - (self._write_index - self._read_index)
+    
+    def fill_level(self) -> float:
+        """填充比例（0.0 到 1.0）"""
+        return self.available_read() / self.capacity
+    
+    def reset_stats(self) -> None:
+        """重置统计"""
+        self.underruns = 0
+        self.min_fill = self.capacity
+    
+    def write_regions(self, frames: int) -> Tuple[np.ndarray, np.ndarray]:
+        """获取可直接写入的区域（零拷贝，解码器可直接读入这些视图）
+        
+        Args:
+            frames: 希望写入的帧数（超出可写空间的部分会被截掉）
+        
+        Returns:
+            (第一段, 第二段) 两个视图，第二段在回绕时才非空
+        """
+        frames = min(frames, self.available_write())
+        start = self._write_index % self.capacity
+        first = min(frames, self.capacity - start)
+        return self._buffer[start:start + first], self._buffer[0:frames - first]
+    
+    def commit_write(self, frames: int) -> None:
+        """发布已写入 write_regions 的帧
+        
+        Args:
+            frames: 帧数
+        """
+        self._write_index += frames
+    
+    def write(self, data: np.ndarray) -> int:
+        """复制写入数据
+        
+        Args:
+            data: 形状为 (帧数, 声道数) 的数组
+        
+        Returns:
+            实际写入的帧数
+        """
+        first, second = self.write_regions(len(data))
+        count = len(first) + len(second)
+        first[:] = data[:len(first)]
+        if len(second):
+            second[:] = data[len(first):count]
+        self.commit_write(count)
+        return count
+    
+    def read_into(self, out: np.ndarray, gain: float) -> int:
+        """把数据乘以增益后写入 out（不分配内存）
+        
+        Args:
+            out: 目标缓冲区，形状为 (帧数, 声道数)
+            gain: 增益
+        
+        Returns:
+            实际读取的帧数
+        """
+        available = self._write_index - self._read_index
+        if available < self.min_fill:
+            self.min_fill = available
+        
+        frames = min(len(out), available)
+        if frames < len(out) and not self.end_of_stream:
+            self.underruns += 1
+        if frames == 0:
+            return 0
+        
+        start = self._read_index % self.capacity
+        first = min(frames, self.capacity - start)
+        self._convert(self._buffer[start:start + first], out[:first], gain)
+        if first < frames:
+            self._convert(self._buffer[:frames - first], out[first:frames], gain)
+        
+        self._read_index += frames
+        return frames
+    
+    def _convert(self, source: np.ndarray, out: np.ndarray, gain: float) -> None:
+        """把一段采样转换为 float32 并乘以增益（不分配内存）
+        
+        Args:
+            source: 缓冲区中的一段
+            out: 目标缓冲区（同样长度）
+            gain: 增益
+        """
+        if self._scale == 1.0:
+            np.multiply(source, gain, out=out)
+        else:
+            # 先原地转换类型，再原地缩放，避免 ufunc 内部为类型转换分配缓冲
+            np.copyto(out, source, casting='unsafe')
+            np.multiply(out, gain * self._scale, out=out)
+    
+    def skip_to(self, index: int) -> None:
+        """把读位置移动到指定的写入序号（用于丢弃跳转前的旧数据）
+        
+        Args:
+            index: 目标读位置，不超过当前写位置
+        """
+        self._read_index = max(self._read_index, min(index, self._write_index))
@@ -3,7 +3,6 @@
 import os
 from dataclasses import dataclass
 from typing import Optional
-from PySide6.QtGui import QPixmap
 
 
 @dataclass
@@ -13,7 +12,7 @@ class Metadata:
     artist: Optional[str] = None
     album: Optional[str] = None
     duration: float = 0.0
-    cover_art: Optional[QPixmap] = None
+    cover_id: Optional[str] = None  # 封面图片数据的内容哈希（SHA-1），没有封面时为 None
 
 
 @dataclass
@@ -24,7 +23,7 @@ class Track:
     artist: str
     album: str
     duration: float  # in seconds
-    cover_art: Optional[QPixmap] = None
+    cover_id: Optional[str] = None  # 封面的内容哈希，图片在 CoverStore 中，显示时才解码
     
     def get_display_name(self) -> str:
         """返回用于显示的名称"""
@@ -0,0 +1,203 @@
+"""频谱和电平表
+
+音频回调把输出块复制进 AudioTap 的环形缓冲区（不加锁、不分配内存，满了就丢弃），
+Visualizer 的工作线程按固定帧率取最近的一段音频，计算对数频段的频谱和每个声道的 RMS/峰值电平，
+通过 Qt 信号交给界面。没有可见的视图时工作线程退出，回调里只剩一次属性判断。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+from .ring_buffer import RingBuffer
+
+FFT_SIZE = 2048
+TAP_FRAMES = 16384  # 分流缓冲区容量（帧），工作线程短暂落后时不丢数据
+MIN_FREQUENCY = 40.0
+MAX_FREQUENCY = 16000.0
+FLOOR_DB = -80.0
+DECAY_DB_PER_SECOND = 40.0  # 频谱和电平回落的速度
+
+
+class AudioTap:
+    """音频回调到可视化线程的分流点（单生产者单消费者）"""
+    
+    def __init__(self):
+        """初始化分流点（默认关闭）"""
+        self.active = False
+        self.samplerate = 44100
+        self._ring: Optional[RingBuffer] = None
+    
+    @property
+    def ring(self) -> Optional[RingBuffer]:
+        """当前的环形缓冲区（输出流格式确定前为 None）"""
+        return self._ring
+    
+    def configure(self, samplerate: int, channels: int) -> None:
+        """按输出流的格式重建缓冲区（在输出流打开前调用）
+        
+        Args:
+            samplerate: 采样率
+            channels: 声道数
+        """
+        self.samplerate = samplerate
+        if self._ring is None or self._ring.channels != channels:
+            self._ring = RingBuffer(TAP_FRAMES, channels)
+    
+    def push(self, block: np.ndarray) -> None:
+        """复制一块输出音频（在音频回调中调用，不阻塞、不分配内存）
+        
+        Args:
+            block: 形状为 (帧数, 声道数) 的 float32 音频
+        """
+        ring = self._ring
+        if not self.active or ring is None:
+            return
+        if ring.available_write() >= len(block):
+            ring.write(block)
+
+
+@dataclass
+class VisualFrame:
+    """一帧可视化数据（单位均为 dBFS）"""
+    bands: np.ndarray  # 各频段的电平，从低频到高频
+    rms: np.ndarray  # 每个声道的 RMS 电平
+    peak: np.ndarray  # 每个声道的峰值电平
+
+
+class Visualizer(QObject):
+    """在工作线程中按固定帧率计算频谱和电平"""
+    
+    frame_ready = Signal(object)  # VisualFrame
+    
+    def __init__(self, tap: AudioTap, fps: float = 30.0, bands: int = 32):
+        """初始化
+        
+        Args:
+            tap: 音频分流点
+            fps: 帧率上限
+            bands: 频段数
+        """
+        super().__init__()
+        self._tap = tap
+        self.fps = fps
+        self.bands = bands
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+    
+    def is_running(self) -> bool:
+        """工作线程是否在运行
+        
+        Returns:
+            是否在运行
+        """
+        return self._thread is not None and self._thread.is_alive()
+    
+    def set_running(self, running: bool) -> None:
+        """启动或停止（停止后分流点关闭，回调不再复制音频）
+        
+        Args:
+            running: 是否运行
+        """
+        if running == self.is_running():
+            return
+        if running:
+            self._stop_event.clear()
+            ring = self._tap.ring
+            if ring is not None:
+                ring.skip_to(ring.write_index)  # 丢掉上次停止前的旧数据
+            self._tap.active = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        else:
+            self._tap.active = False
+            self._stop_event.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+    
+    def _run(self) -> None:
+        """工作线程：按帧率取最新的音频并计算"""
+        window = np.hanning(FFT_SIZE).astype(np.float32)
+        # 满刻度正弦波加汉宁窗后的峰值为 FFT_SIZE / 4，能量分布在约 1.5 个频点上，归一化到 0 dB
+        reference = (FFT_SIZE / 4) ** 2 * 1.5
+        history: Optional[np.ndarray] = None  # 最近 FFT_SIZE 帧
+        edges = None
+        edges_key = None
+        bands = np.full(self.bands, FLOOR_DB)
+        rms = peak = None
+        last = time.perf_counter()
+        
+        while not self._stop_event.wait(1.0 / self.fps):
+            ring = self._tap.ring
+            if ring is None:
+                continue
+            channels = ring.channels
+            if history is None or history.shape[1] != channels:
+                history = np.zeros((FFT_SIZE, channels), dtype=np.float32)
+                rms = np.full(channels, FLOOR_DB)
+                peak = np.full(channels, FLOOR_DB)
+            
+            # 只取最近的 FFT_SIZE 帧，更早的直接跳过
+            available = ring.available_read()
+            if available > FFT_SIZE:
+                ring.skip_to(ring.write_index - FFT_SIZE)
+                available = FFT_SIZE
+            if available:
+                history[:-available] = history[available:]
+                ring.read_into(history[-available:], 1.0)
+            fresh = history[-available:] if available else None
+            
+            now = time.perf_counter()
+            decay = DECAY_DB_PER_SECOND * (now - last)
+            last = now
+            
+            samplerate = self._tap.samplerate
+            if edges_key != (samplerate, self.bands):
+                edges = _band_edges(samplerate, self.bands)
+                edges_key = (samplerate, self.bands)
+            
+            # 没有新数据（停止或暂停）时不再计算，频谱和电平按速度回落
+            current_bands = np.full(self.bands, FLOOR_DB)
+            current_rms = current_peak = np.full(channels, FLOOR_DB)
+            if fresh is not None:
+                # 频谱：声道平均后加窗做 FFT，按对数频段累加功率
+                spectrum = np.fft.rfft(history.mean(axis=1) * window)
+                power = spectrum.real[:edges[-1]] ** 2 + spectrum.imag[:edges[-1]] ** 2
+                power = np.add.reduceat(power, edges[:-1])
+                current_bands = _to_db(power / reference)
+                # 电平：只统计本帧新到的音频
+                current_rms = _to_db(np.mean(np.square(fresh, dtype=np.float64), axis=0))
+                current_peak = _to_db(np.max(np.abs(fresh), axis=0).astype(np.float64) ** 2)
+            bands = np.maximum(current_bands, bands - decay)
+            rms = np.maximum(current_rms, rms - decay)
+            peak = np.maximum(current_peak, peak - decay)
+            
+            if fresh is None and bands.max() <= FLOOR_DB and peak.max() <= FLOOR_DB:
+                continue  # 静止状态，不再打扰界面
+            self.frame_ready.emit(VisualFrame(bands.copy(), rms.copy(), peak.copy()))
+
+
+def _band_edges(samplerate: int, bands: int) -> np.ndarray:
+    """对数间隔的频段边界（FFT 频点序号），每个频段至少包含一个频点
+    
+    Args:
+        samplerate: 采样率
+        bands: 频段数
+    
+    Returns:
+        长度为 bands + 1 的严格递增整数数组
+    """
+    top = min(MAX_FREQUENCY, samplerate / 2)
+    frequencies = np.geomspace(MIN_FREQUENCY, top, bands + 1)
+    edges = np.round(frequencies * FFT_SIZE / samplerate).astype(np.intp)
+    # 低频段比频点还窄时逐个向后推，保证严格递增
+    steps = np.arange(bands + 1)
+    return np.maximum.accumulate(np.maximum(edges, 1) - steps) + steps
+
+
+def _to_db(power: np.ndarray) -> np.ndarray:
+    """功率比转换为 dB（不低于 FLOOR_DB）"""
+    return np.maximum(10 * np.log10(np.maximum(power, 1e-12)), FLOOR_DB)
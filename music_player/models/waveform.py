@@ -0,0 +1,246 @@
+"""波形峰值金字塔
+
+每首曲目只流式读取一遍，把音频分成固定数量的桶，按块向量化地求出每个桶的最小值、最大值和 RMS，
+作为金字塔的底层；上面各层两两合并，层层减半。进度条按自身宽度选择刚好够用的一层再合并到像素列，
+任何宽度下绘制都不需要再读取音频。
+
+磁盘上只保存底层，每个值量化为一个字节（最小/最大值为 int8，RMS 为 uint8），
+每首曲目约 3KB；上层在加载时由底层重建。缓存键与 PCM 缓存相同（路径 + 修改时间 + 大小）。
+"""
+
+import os
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+import soundfile as sf
+
+from ..utils.file_key import file_cache_key
+
+BUCKETS = 1024  # 底层的桶数
+READ_FRAMES = 262144  # 每次读取的帧数上限
+
+
+class WaveformPeaks:
+    """一首曲目的波形峰值金字塔"""
+    
+    def __init__(self, minimum: np.ndarray, maximum: np.ndarray, rms: np.ndarray, duration: float):
+        """由底层构建金字塔
+        
+        Args:
+            minimum: 每个桶的最小值（-1 到 1）
+            maximum: 每个桶的最大值（-1 到 1）
+            rms: 每个桶的 RMS（0 到 1）
+            duration: 曲目时长（秒）
+        """
+        self.duration = duration
+        self.levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = [
+            (minimum.astype(np.float32), maximum.astype(np.float32), rms.astype(np.float32))]
+        while len(self.levels[-1][0]) > 1:
+            low, high, level_rms = self.levels[-1]
+            count = len(low) // 2 * 2
+            if count == 0:
+                break
+            self.levels.append((
+                np.minimum(low[0:count:2], low[1:count:2]),
+                np.maximum(high[0:count:2], high[1:count:2]),
+                np.sqrt((level_rms[0:count:2] ** 2 + level_rms[1:count:2] ** 2) / 2),
+            ))
+    
+    def columns(self, width: int, start: float = 0.0, end: float = 1.0
+                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """把可见范围合并到指定数量的像素列
+        
+        Args:
+            width: 像素列数
+            start: 可见范围的起点（占曲目长度的比例）
+            end: 可见范围的终点（占曲目长度的比例）
+        
+        Returns:
+            (最小值, 最大值, RMS)，每个长度为 width
+        """
+        width = max(1, int(width))
+        start = min(max(start, 0.0), 1.0)
+        end = min(max(end, start), 1.0)
+        
+        # 选择可见部分桶数不少于像素列数的最粗一层
+        level = self.levels[0]
+        for candidate in reversed(self.levels):
+            if len(candidate[0]) * (end - start) >= width:
+                level = candidate
+                break
+        low, high, rms = level
+        count = len(low)
+        
+        # 第 i 列覆盖 [first[i], first[i + 1]) 的桶，用 reduceat 一次合并；
+        # 放大到比桶还细时相邻列的起点相同，reduceat 取该桶本身
+        first = np.minimum((np.linspace(start, end, width, endpoint=False) * count).astype(np.intp), count - 1)
+        stop = min(count, max(int(np.ceil(end * count)), int(first[-1]) + 1))
+        spans = np.maximum(np.diff(np.append(first, stop)), 1)
+        low_columns = np.minimum.reduceat(low[:stop], first)
+        high_columns = np.maximum.reduceat(high[:stop], first)
+        energy = np.add.reduceat(np.square(rms[:stop], dtype=np.float64), first)
+        rms_columns = np.sqrt(energy / spans).astype(np.float32)
+        return low_columns, high_columns, rms_columns
+    
+    def to_bytes(self) -> dict:
+        """量化底层，供保存
+        
+        Returns:
+            可传给 np.savez 的数组字典
+        """
+        low, high, rms = self.levels[0]
+        return {
+            "min": np.floor(np.clip(low, -1, 1) * 127).astype(np.int8),
+            "max": np.ceil(np.clip(high, -1, 1) * 127).astype(np.int8),
+            "rms": np.ceil(np.clip(rms, 0, 1) * 255).astype(np.uint8),
+            "duration": np.array([self.duration]),
+        }
+    
+    @classmethod
+    def from_bytes(cls, data) -> "WaveformPeaks":
+        """从量化数据恢复
+        
+        Args:
+            data: to_bytes 的结果（或 np.load 打开的文件）
+        
+        Returns:
+            波形峰值
+        """
+        return cls(data["min"] / 127.0, data["max"] / 127.0, data["rms"] / 255.0,
+                   float(data["duration"][0]))
+
+
+def compute_peaks(file_path: str, buckets: int = BUCKETS) -> WaveformPeaks:
+    """流式读取曲目一遍，计算波形峰值
+    
+    Args:
+        file_path: 音频文件路径
+        buckets: 底层的桶数
+    
+    Returns:
+        波形峰值
+    """
+    with sf.SoundFile(file_path) as f:
+        frames = f.frames
+        samplerate = f.samplerate
+        bucket_frames = max(1, -(-frames // buckets))
+        # 每次读取整数个桶，块内 reshape 成 (桶, 帧 × 声道) 后一次归约
+        chunk = max(1, READ_FRAMES // bucket_frames) * bucket_frames
+        buffer = np.zeros((chunk, f.channels), dtype=np.float32)
+        
+        minimum = np.zeros(buckets, dtype=np.float32)
+        maximum = np.zeros(buckets, dtype=np.float32)
+        energy = np.zeros(buckets, dtype=np.float64)
+        counts = np.zeros(buckets, dtype=np.int64)
+        bucket = 0
+        while bucket < buckets:
+            data = f.read(chunk, dtype='float32', always_2d=True, out=buffer)
+            count = len(data)
+            if count == 0:
+                break
+            full = count // bucket_frames
+            blocks = data[:full * bucket_frames].reshape(full, bucket_frames * f.channels)
+            end = min(bucket + full, buckets)
+            used = end - bucket
+            if used:
+                minimum[bucket:end] = blocks[:used].min(axis=1)
+                maximum[bucket:end] = blocks[:used].max(axis=1)
+                energy[bucket:end] = np.einsum('ij,ij->i', blocks[:used], blocks[:used], dtype=np.float64)
+                counts[bucket:end] = bucket_frames * f.channels
+                bucket = end
+            if count < chunk:
+                # 文件末尾不足一个桶的部分
+                rest = data[full * bucket_frames:]
+                if len(rest) and bucket < buckets:
+                    minimum[bucket] = rest.min()
+                    maximum[bucket] = rest.max()
+                    energy[bucket] = np.sum(rest.astype(np.float64) ** 2)
+                    counts[bucket] = rest.size
+                    bucket += 1
+                break
+    
+    used = max(bucket, 1)
+    rms = np.sqrt(energy[:used] / np.maximum(counts[:used], 1))
+    duration = frames / samplerate if samplerate else 0.0
+    return WaveformPeaks(minimum[:used], maximum[:used], rms, duration)
+
+
+class WaveformStore:
+    """波形峰值的磁盘缓存"""
+    
+    def __init__(self, cache_dir: str):
+        """初始化缓存
+        
+        Args:
+            cache_dir: 缓存目录
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, mode=0o755, exist_ok=True)
+    
+    def key_for(self, file_path: str) -> Optional[str]:
+        """根据路径、修改时间和大小计算缓存键
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            缓存键，文件不存在时返回 None
+        """
+        return file_cache_key(file_path)
+    
+    def load(self, file_path: str) -> Optional[WaveformPeaks]:
+        """读取缓存的波形
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            波形峰值，未缓存时返回 None
+        """
+        key = self.key_for(file_path)
+        if key is None:
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                return WaveformPeaks.from_bytes(data)
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def get(self, file_path: str) -> Optional[WaveformPeaks]:
+        """读取缓存的波形，没有时计算并保存（耗时，在后台线程调用）
+        
+        Args:
+            file_path: 音频文件路径
+        
+        Returns:
+            波形峰值，文件无法读取时返回 None
+        """
+        peaks = self.load(file_path)
+        if peaks is not None:
+            return peaks
+        
+        key = self.key_for(file_path)
+        if key is None:
+            return None
+        try:
+            peaks = compute_peaks(file_path)
+        except Exception as e:
+            print(f"⚠️ 波形计算失败: {e} - {os.path.basename(file_path)}")
+            return None
+        
+        # 保存量化后的数据，读回的结果与下次从缓存加载时完全一致
+        data = peaks.to_bytes()
+        with self._lock:
+            tmp_path = self._path(key) + ".tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, **data)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                print(f"⚠️ 保存波形缓存失败: {e}")
+        return WaveformPeaks.from_bytes(data)
+    
+    def _path(self, key: str) -> str:
+        """缓存文件路径"""
+        return os.path.join(self.cache_dir, key + ".npz")
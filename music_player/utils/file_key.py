@@ -0,0 +1,26 @@
+"""按文件内容版本计算缓存键
+
+PCM 缓存和波形缓存都用路径、修改时间和大小标识一首曲目的某个版本：文件被替换或修改后键随之改变，
+旧缓存自然失效。
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+
+def file_cache_key(file_path: str) -> Optional[str]:
+    """根据路径、修改时间和大小计算缓存键
+    
+    Args:
+        file_path: 音频文件路径
+    
+    Returns:
+        SHA-1 十六进制字符串，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    ident = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(ident.encode('utf-8')).hexdigest()
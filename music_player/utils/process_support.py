@@ -0,0 +1,31 @@
+"""工作进程支持
+
+响度分析等用 spawn 启动的进程池会在工作进程里重新运行入口脚本。PyInstaller 打包后的
+程序必须在入口最先调用 multiprocessing.freeze_support()，否则每个工作进程都会再打开一个
+播放器窗口。入口调用 enable_freeze_support() 后，process_pool_available() 才允许打包后的
+程序使用进程池；没有调用时退回在当前进程中计算。
+"""
+
+import multiprocessing
+import sys
+
+_freeze_support_enabled = False
+
+
+def enable_freeze_support() -> None:
+    """调用 multiprocessing.freeze_support()（在入口的 if __name__ == "__main__": 下最先调用）
+    
+    在打包程序的工作进程中，这个调用会直接执行工作进程的任务并退出，不会返回。
+    """
+    global _freeze_support_enabled
+    multiprocessing.freeze_support()
+    _freeze_support_enabled = True
+
+
+def process_pool_available() -> bool:
+    """当前程序能否安全地启动工作进程
+    
+    Returns:
+        未打包，或打包后入口已调用 enable_freeze_support() 时为 True
+    """
+    return not getattr(sys, "frozen", False) or _freeze_support_enabled
@@ -0,0 +1,62 @@
+"""启动耗时统计"""
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupTimer:
+    """按阶段记录启动耗时
+    
+    主线程按顺序调用 mark() 记录关键路径上的各阶段；
+    后台完成的工作用 record() 单独记录，不计入到首次绘制的总耗时。
+    """
+    
+    def __init__(self, start: Optional[float] = None):
+        """初始化计时器
+        
+        Args:
+            start: 起点（time.perf_counter() 的值），None 表示现在
+        """
+        self._start = start if start is not None else time.perf_counter()
+        self._last = self._start
+        self._lock = threading.Lock()
+        self.stages: List[Tuple[str, float]] = []  # 关键路径上的 (阶段, 耗时秒数)
+        self.background: List[Tuple[str, float]] = []  # 后台完成的 (工作, 耗时秒数)
+    
+    def mark(self, stage: str) -> None:
+        """结束一个阶段（从上一次 mark 到现在）
+        
+        Args:
+            stage: 阶段名称
+        """
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+    
+    def record(self, name: str, seconds: float) -> None:
+        """记录一项后台工作的耗时（可以在任意线程调用）
+        
+        Args:
+            name: 工作名称
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            self.background.append((name, seconds))
+    
+    def elapsed(self) -> float:
+        """从起点到最后一次 mark 的总耗时
+        
+        Returns:
+            秒数
+        """
+        return self._last - self._start
+    
+    def summary(self) -> str:
+        """生成一行摘要
+        
+        Returns:
+            例如 "总计 412 ms: 导入模块 180 ms, 创建窗口 95 ms, ..."
+        """
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.stages)
+        return f"总计 {self.elapsed() * 1000:.0f} ms: {stages}"
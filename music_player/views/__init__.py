@@ -5,5 +5,7 @@ from .control_panel import ControlPanel
 from .playlist_view import PlaylistView
 from .mini_window import MiniWindow
 from .system_tray import SystemTray
+from .waveform_slider import WaveformSlider
+from .spectrum_view import SpectrumView
 
-__all__ = ['MainWindow', 'ControlPanel', 'PlaylistView', 'MiniWindow', 'SystemTray']
+__all__ = ['MainWindow', 'ControlPanel', 'PlaylistView', 'MiniWindow', 'SystemTray', 'WaveformSlider', 'SpectrumView']
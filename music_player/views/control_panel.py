@@ -6,6 +6,7 @@ from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QFont
 
 from ..models.track import Track
+from .waveform_slider import WaveformSlider
 
 
 class ControlPanel(QWidget):
@@ -51,7 +52,7 @@ class ControlPanel(QWidget):
         inner_layout.addWidget(self.time_label)
         
         # 进度条
-        self.progress_slider = QSlider(Qt.Orientation.Horizontal)
+        self.progress_slider = WaveformSlider()
         self.progress_slider.setRange(0, 1000)
         self.progress_slider.setValue(0)
         self.progress_slider.sliderPressed.connect(self._on_slider_pressed)
@@ -186,6 +187,14 @@ class ControlPanel(QWidget):
         total_time = Track.format_time(duration)
         self.time_label.setText(f"{current_time} / {total_time}")
     
+    def set_waveform(self, peaks) -> None:
+        """设置进度条上显示的波形
+        
+        Args:
+            peaks: 波形峰值（WaveformPeaks），None 表示不显示
+        """
+        self.progress_slider.set_waveform(peaks)
+    
     def reset_progress(self) -> None:
         """重置进度"""
         self.progress_slider.setValue(0)
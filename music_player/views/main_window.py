@@ -5,10 +5,12 @@ from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                QPushButton, QLabel, QFileDialog, QMessageBox,
                                QButtonGroup, QComboBox, QMenu, QToolButton,
                                QSlider)
-from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QKeySequence, QPixmap, QAction, QShortcut
 
 from .control_panel import ControlPanel
+from .waveform_slider import WaveformSlider
+from .spectrum_view import SpectrumView
 from .playlist_view import PlaylistView
 from ..models.playback_mode import PlaybackMode
 
@@ -16,6 +18,8 @@ from ..models.playback_mode import PlaybackMode
 class MainWindow(QMainWindow):
     """主窗口"""
     
+    COVER_SIZE = 90  # 封面显示的边长（像素）
+    
     # 信号
     add_files_requested = Signal(list)
     add_folder_requested = Signal(str)
@@ -29,6 +33,7 @@ class MainWindow(QMainWindow):
     volume_changed = Signal(float)
     window_closing = Signal()  # 窗口关闭信号
     mini_mode_requested = Signal()  # 切换到迷你模式
+    cancel_scan_requested = Signal()  # 取消正在进行的添加
     
     def __init__(self):
         """初始化主窗口"""
@@ -43,11 +48,6 @@ class MainWindow(QMainWindow):
         
         # 创建界面
         self.init_ui()
-        
-        # 创建定时器用于更新进度
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self._request_progress_update)
-        self.update_timer.start(100)  # 每100ms更新一次
     
     def init_ui(self) -> None:
         """初始化界面"""
@@ -123,13 +123,18 @@ class MainWindow(QMainWindow):
         
         player_layout.addWidget(info_widget)
         
+        # 频谱和电平表
+        self.spectrum_view = SpectrumView()
+        self.spectrum_view.setFixedHeight(60)
+        player_layout.addWidget(self.spectrum_view)
+        
         # 第二行：播放进度条 + 时间
         progress_widget = QWidget()
         progress_layout = QVBoxLayout(progress_widget)
         progress_layout.setSpacing(5)
         
-        # 进度条
-        self.progress_slider = QSlider(Qt.Orientation.Horizontal)
+        # 进度条（加载波形后绘制当前曲目的波形）
+        self.progress_slider = WaveformSlider()
         self.progress_slider.setRange(0, 1000)
         self.progress_slider.setValue(0)
         self.progress_slider.sliderPressed.connect(self._on_slider_pressed)
@@ -336,6 +341,34 @@ class MainWindow(QMainWindow):
         
         header_layout.addStretch()
         
+        # 后台读取元数据的进度（添加大量文件时显示）
+        self.scan_label = QLabel("")
+        self.scan_label.setFont(QFont("SF Pro Display", 11))
+        self.scan_label.setStyleSheet("""
+            color: rgba(255, 255, 255, 0.6);
+            background: transparent;
+        """)
+        self.scan_label.hide()
+        header_layout.addWidget(self.scan_label)
+        
+        self.cancel_scan_btn = QToolButton()
+        self.cancel_scan_btn.setText("✕")
+        self.cancel_scan_btn.setFixedSize(24, 24)
+        self.cancel_scan_btn.setToolTip("取消添加")
+        self.cancel_scan_btn.setStyleSheet("""
+            QToolButton {
+                background: transparent;
+                color: rgba(255, 255, 255, 0.6);
+                border: none;
+            }
+            QToolButton:hover {
+                color: white;
+            }
+        """)
+        self.cancel_scan_btn.clicked.connect(self.cancel_scan_requested.emit)
+        self.cancel_scan_btn.hide()
+        header_layout.addWidget(self.cancel_scan_btn)
+        
         # 菜单按钮
         self.menu_btn = QToolButton()
         self.menu_btn.setText("☰")
@@ -643,6 +676,35 @@ class MainWindow(QMainWindow):
         self.current_time_label.setText(current_time)
         self.total_time_label.setText(total_time)
     
+    def set_waveform(self, peaks) -> None:
+        """设置进度条上显示的波形
+        
+        Args:
+            peaks: 波形峰值（WaveformPeaks），None 表示不显示
+        """
+        self.progress_slider.set_waveform(peaks)
+    
+    def update_spectrum(self, frame) -> None:
+        """更新频谱和电平表
+        
+        Args:
+            frame: 可视化数据（VisualFrame）
+        """
+        self.spectrum_view.set_frame(frame)
+    
+    def set_scan_progress(self, done: int, total: int) -> None:
+        """显示后台读取元数据的进度
+        
+        Args:
+            done: 已读取的文件数
+            total: 文件总数，0 表示没有进行中的读取（隐藏进度）
+        """
+        scanning = total > 0
+        self.scan_label.setVisible(scanning)
+        self.cancel_scan_btn.setVisible(scanning)
+        if scanning:
+            self.scan_label.setText(f"正在读取 {done}/{total}")
+    
     def reset_progress(self) -> None:
         """重置进度"""
         self.progress_slider.setValue(0)
@@ -713,7 +775,7 @@ class MainWindow(QMainWindow):
         self.album_label.setText(album)
         
         if cover and not cover.isNull():
-            scaled_cover = cover.scaled(90, 90, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            scaled_cover = cover.scaled(self.COVER_SIZE, self.COVER_SIZE, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
             self.cover_label.setPixmap(scaled_cover)
         else:
             self.cover_label.clear()
@@ -762,10 +824,6 @@ class MainWindow(QMainWindow):
         self.mode_btn.setText(mode_icons[index])
         self.mode_btn.setToolTip(f"播放模式：{mode_names[index]}")
     
-    def _request_progress_update(self) -> None:
-        """请求进度更新（由外部控制器处理）"""
-        pass
-    
     def _cycle_play_mode(self) -> None:
         """循环切换播放模式"""
         mode_icons = ["▶▶", "🔁", "🔀", "1️⃣"]
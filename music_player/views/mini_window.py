@@ -5,10 +5,14 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PySide6.QtCore import Qt, Signal, QPoint
 from PySide6.QtGui import QFont, QMouseEvent, QPixmap
 
+from .spectrum_view import SpectrumView
+
 
 class MiniWindow(QWidget):
     """迷你播放器窗口 - 紧凑的悬浮窗口"""
     
+    COVER_SIZE = 60  # 封面显示的边长（像素）
+    
     # 信号
     play_pause_clicked = Signal()
     prev_clicked = Signal()
@@ -30,7 +34,7 @@ class MiniWindow(QWidget):
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)  # 透明背景
         
         # 固定尺寸
-        self.setFixedSize(350, 120)
+        self.setFixedSize(350, 150)
         
         # 拖动相关
         self._dragging = False
@@ -166,6 +170,11 @@ class MiniWindow(QWidget):
         
         layout.addLayout(top_layout)
         
+        # 频谱和电平表
+        self.spectrum_view = SpectrumView(meter_width=4)
+        self.spectrum_view.setFixedHeight(26)
+        layout.addWidget(self.spectrum_view)
+        
         # 播放控制按钮
         play_layout = QHBoxLayout()
         play_layout.setSpacing(8)
@@ -292,7 +301,7 @@ class MiniWindow(QWidget):
         
         if cover and not cover.isNull():
             scaled_cover = cover.scaled(
-                60, 60, 
+                self.COVER_SIZE, self.COVER_SIZE, 
                 Qt.AspectRatioMode.KeepAspectRatio, 
                 Qt.TransformationMode.SmoothTransformation
             )
@@ -329,6 +338,23 @@ class MiniWindow(QWidget):
         """
         self.time_label.setText(f"{current} / {total}")
     
+    def set_spectrum_visible(self, visible: bool) -> None:
+        """显示或隐藏频谱（窗口高度随之调整）
+        
+        Args:
+            visible: 是否显示
+        """
+        self.spectrum_view.setVisible(visible)
+        self.setFixedSize(350, 150 if visible else 120)
+    
+    def update_spectrum(self, frame) -> None:
+        """更新频谱和电平表
+        
+        Args:
+            frame: 可视化数据（VisualFrame）
+        """
+        self.spectrum_view.set_frame(frame)
+    
     def set_volume(self, volume: int) -> None:
         """设置音量
         
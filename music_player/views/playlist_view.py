@@ -113,7 +113,18 @@ class PlaylistView(QWidget):
         Args:
             tracks: 曲目列表
         """
+        previous = self._all_tracks
         self._all_tracks = tracks
+        
+        # 只是在末尾追加了曲目（后台分批添加）且没有搜索时，只添加新的列表项
+        if (not self.search_box.text().strip() and len(tracks) >= len(previous)
+                and self.list_widget.count() == len(previous)
+                and all(old is new for old, new in zip(previous, tracks))):
+            appended = tracks[len(previous):]
+            self._filtered_tracks = tracks.copy()
+            self._add_items(appended)
+            self._update_stats()
+            return
         self._apply_filter()
     
     def update_current_track(self, index: int) -> None:
@@ -153,8 +164,15 @@ class PlaylistView(QWidget):
     def _refresh_list(self) -> None:
         """刷新列表显示"""
         self.list_widget.clear()
+        self._add_items(self._filtered_tracks)
+    
+    def _add_items(self, tracks: List[Track]) -> None:
+        """在列表末尾添加曲目
         
-        for track in self._filtered_tracks:
+        Args:
+            tracks: 曲目列表
+        """
+        for track in tracks:
             display_text = f"{track.get_display_name()}  [{track.get_duration_string()}]"
             item = QListWidgetItem(display_text)
             item.setToolTip(
@@ -0,0 +1,124 @@
+"""频谱和电平表视图"""
+
+from typing import Optional
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, Signal, QEvent, QRectF
+from PySide6.QtGui import QPainter, QColor
+
+from ..models.visualizer import VisualFrame
+
+RANGE_DB = 60.0  # 显示的动态范围（0 dBFS 往下）
+
+
+class SpectrumView(QWidget):
+    """频谱柱和左右声道电平表
+    
+    可见状态（包括所在窗口被最小化）变化时发出 visibility_changed，
+    应用据此在没有任何可见视图时停止可视化线程。
+    """
+    
+    visibility_changed = Signal(bool)
+    
+    def __init__(self, meter_width: int = 6, parent=None):
+        """初始化视图
+        
+        Args:
+            meter_width: 每个声道电平表的宽度（像素）
+            parent: 父控件
+        """
+        super().__init__(parent)
+        self._frame: Optional[VisualFrame] = None
+        self._meter_width = meter_width
+        self._watched_window = None
+        self._bar_color = QColor(255, 255, 255, 170)
+        self._meter_color = QColor(255, 255, 255, 200)
+        self._peak_color = QColor(255, 120, 100, 230)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
+    
+    def is_showing(self) -> bool:
+        """是否真正显示在屏幕上（可见且所在窗口没有最小化）
+        
+        Returns:
+            是否显示
+        """
+        return self.isVisible() and not self.window().isMinimized()
+    
+    def set_frame(self, frame: VisualFrame) -> None:
+        """显示一帧数据
+        
+        Args:
+            frame: 可视化数据
+        """
+        self._frame = frame
+        self.update()
+    
+    def clear(self) -> None:
+        """清空显示"""
+        self._frame = None
+        self.update()
+    
+    def showEvent(self, event) -> None:
+        """显示时开始监听所在窗口的最小化状态"""
+        super().showEvent(event)
+        window = self.window()
+        if window is not self._watched_window:
+            window.installEventFilter(self)
+            self._watched_window = window
+        self.visibility_changed.emit(self.is_showing())
+    
+    def hideEvent(self, event) -> None:
+        """隐藏"""
+        super().hideEvent(event)
+        self.visibility_changed.emit(False)
+    
+    def eventFilter(self, watched, event) -> bool:
+        """窗口最小化或还原"""
+        if watched is self._watched_window and event.type() == QEvent.Type.WindowStateChange:
+            self.visibility_changed.emit(self.is_showing())
+        return False
+    
+    def paintEvent(self, event) -> None:
+        """绘制频谱柱和电平表"""
+        frame = self._frame
+        if frame is None:
+            return
+        
+        width = self.width()
+        height = self.height()
+        channels = len(frame.rms)
+        meters_width = (self._meter_width + 2) * channels
+        bars_width = max(0, width - meters_width - 4)
+        
+        painter = QPainter(self)
+        painter.setPen(Qt.PenStyle.NoPen)
+        
+        # 频谱柱
+        levels = _normalize(frame.bands)
+        count = len(levels)
+        if count and bars_width > 0:
+            step = bars_width / count
+            gap = 1.0 if step > 3 else 0.0
+            painter.setBrush(self._bar_color)
+            for index, level in enumerate(levels):
+                bar_height = level * height
+                painter.drawRect(QRectF(index * step, height - bar_height, step - gap, bar_height))
+        
+        # 电平表：RMS 为实心柱，峰值为一条横线
+        rms_levels = _normalize(frame.rms)
+        peak_levels = _normalize(frame.peak)
+        x = width - meters_width
+        for channel in range(channels):
+            painter.setBrush(self._meter_color)
+            rms_height = rms_levels[channel] * height
+            painter.drawRect(QRectF(x, height - rms_height, self._meter_width, rms_height))
+            painter.setBrush(self._peak_color)
+            peak_y = height - peak_levels[channel] * height
+            painter.drawRect(QRectF(x, max(0.0, peak_y - 1), self._meter_width, 2))
+            x += self._meter_width + 2
+        painter.end()
+
+
+def _normalize(db: np.ndarray) -> np.ndarray:
+    """把 dBFS 映射到 0 到 1 的显示高度"""
+    return np.clip((np.asarray(db) + RANGE_DB) / RANGE_DB, 0.0, 1.0)
@@ -0,0 +1,149 @@
+"""波形进度条"""
+
+from typing import Optional
+import numpy as np
+from PySide6.QtWidgets import QSlider, QStyle
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QColor, QPainterPath
+
+from ..models.waveform import WaveformPeaks
+
+
+class WaveformSlider(QSlider):
+    """在进度条上绘制曲目波形的 QSlider
+    
+    接口与普通水平 QSlider 完全相同，没有波形时按原样式绘制。
+    波形按控件宽度从峰值金字塔中取像素列，改变窗口大小不需要重新读取音频。
+    """
+    
+    def __init__(self, parent=None):
+        """初始化进度条
+        
+        Args:
+            parent: 父控件
+        """
+        super().__init__(Qt.Orientation.Horizontal, parent)
+        self._peaks: Optional[WaveformPeaks] = None
+        self._columns = None  # 按 (宽度, 高度) 缓存的包络路径
+        self._played_color = QColor(255, 255, 255, 230)
+        self._remaining_color = QColor(255, 255, 255, 70)
+        self._rms_alpha = 90
+    
+    def set_waveform(self, peaks: Optional[WaveformPeaks]) -> None:
+        """设置要绘制的波形
+        
+        Args:
+            peaks: 波形峰值，None 表示恢复普通进度条
+        """
+        self._peaks = peaks
+        self._columns = None
+        self.setMinimumHeight(36 if peaks is not None else 0)
+        self.update()
+    
+    def mousePressEvent(self, event) -> None:
+        """点击波形任意位置时先把滑块移到该处，随后的拖动与普通滑块一致"""
+        if self._peaks is not None and event.button() == Qt.MouseButton.LeftButton:
+            value = QStyle.sliderValueFromPosition(
+                self.minimum(), self.maximum(), int(event.position().x()), max(1, self.width()))
+            self.setValue(value)
+            self.setSliderDown(True)
+            self.sliderMoved.emit(value)
+            event.accept()
+            return
+        super().mousePressEvent(event)
+    
+    def mouseMoveEvent(self, event) -> None:
+        """拖动"""
+        if self._peaks is not None and self.isSliderDown():
+            value = QStyle.sliderValueFromPosition(
+                self.minimum(), self.maximum(), int(event.position().x()), max(1, self.width()))
+            self.setSliderPosition(value)
+            event.accept()
+            return
+        super().mouseMoveEvent(event)
+    
+    def mouseReleaseEvent(self, event) -> None:
+        """松开"""
+        if self._peaks is not None and self.isSliderDown():
+            self.setSliderDown(False)
+            event.accept()
+            return
+        super().mouseReleaseEvent(event)
+    
+    def paintEvent(self, event) -> None:
+        """绘制波形（没有波形时按普通滑块绘制）"""
+        if self._peaks is None:
+            super().paintEvent(event)
+            return
+        
+        width = max(1, self.width())
+        height = self.height()
+        key = (width, height)
+        if self._columns is None or self._columns[0] != key:
+            self._columns = (key, *self._build_paths(width, height))
+        _, peak_path, rms_path = self._columns
+        
+        span = self.maximum() - self.minimum()
+        fraction = (self.sliderPosition() - self.minimum()) / span if span > 0 else 0.0
+        played = int(round(fraction * width))
+        played = min(max(played, 0), width)
+        
+        painter = QPainter(self)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for first, last, color in ((0, played, self._played_color),
+                                   (played, width, self._remaining_color)):
+            if last <= first:
+                continue
+            # 同一组路径按播放头裁剪成两段，用不同颜色绘制
+            painter.setClipRect(QRectF(first, 0, last - first, height))
+            painter.setBrush(color)
+            painter.drawPath(peak_path)
+            solid = QColor(color)
+            solid.setAlpha(min(255, color.alpha() + self._rms_alpha))  # RMS 包络画得更实，便于区分响度
+            painter.setBrush(solid)
+            painter.drawPath(rms_path)
+        
+        # 播放头
+        painter.setClipping(False)
+        painter.setBrush(QColor(255, 255, 255))
+        painter.drawRect(QRectF(played - 1, 0, 2, height))
+        painter.end()
+    
+    def _build_paths(self, width: int, height: int):
+        """按当前尺寸生成峰值和 RMS 包络路径
+        
+        Args:
+            width: 宽度（像素列数）
+            height: 高度
+        
+        Returns:
+            (峰值路径, RMS 路径)
+        """
+        low, high, rms = self._peaks.columns(width)
+        # 竖直方向：0 在中线，±1 占满高度
+        middle = height / 2
+        scale = (height - 2) / 2
+        x = np.arange(width, dtype=np.float64) + 0.5
+        return (_envelope(x, middle - high * scale, middle - low * scale),
+                _envelope(x, middle - rms * scale, middle + rms * scale))
+
+
+def _envelope(x: np.ndarray, top: np.ndarray, bottom: np.ndarray) -> QPainterPath:
+    """由上下边界构造封闭的包络路径
+    
+    Args:
+        x: 每列的横坐标
+        top: 上边界
+        bottom: 下边界
+    
+    Returns:
+        路径
+    """
+    path = QPainterPath()
+    path.moveTo(x[0] - 0.5, top[0])
+    for px, py in zip(x, top):
+        path.lineTo(px, py)
+    for px, py in zip(x[::-1], bottom[::-1]):
+        path.lineTo(px, py)
+    path.closeSubpath()
+    return path
@@ -4,7 +4,10 @@
 使用模块化架构
 """
 
-from music_player.main import main
+from music_player.utils.process_support import enable_freeze_support
 
 if __name__ == "__main__":
+    # 必须最先调用：打包后的程序中，响度分析的工作进程会从这里启动，不能再打开窗口
+    enable_freeze_support()
+    from music_player.main import main
     main()
@@ -0,0 +1,73 @@
+"""播放列表变化时，下一首没有变就不重新预加载"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+FILES = 5
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """使用临时配置目录的播放器"""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    from music_player.main import MusicPlayerApp
+    player = MusicPlayerApp()
+    yield player
+    player._quit_application()
+
+
+def _make_files(directory) -> list:
+    """生成 FILES 个 5 秒的 WAV 文件"""
+    paths = []
+    for index in range(FILES):
+        path = os.path.join(directory, f"{index:02d}.wav")
+        sf.write(path, np.zeros((44100 * 5, 2), dtype=np.float32), 44100)
+        paths.append(path)
+    return paths
+
+
+def _wait_for_tracks(app, count: int) -> None:
+    """等待扫描把曲目加入播放列表"""
+    deadline = time.monotonic() + 30
+    while app.playlist_manager.get_track_count() < count and time.monotonic() < deadline:
+        app.app.processEvents()
+        time.sleep(0.001)
+    assert app.playlist_manager.get_track_count() == count
+
+
+def test_playlist_change_keeps_queued_decoder(app, tmp_path, monkeypatch):
+    from music_player.models.playlist_manager import PlaybackMode
+    
+    paths = _make_files(tmp_path)
+    app.controller.set_replay_gain_mode("off")  # 不启动响度分析
+    app.controller.add_tracks(paths[:3])
+    _wait_for_tracks(app, 3)
+    
+    queued = []
+    queue_next_track = app.engine.queue_next_track
+    
+    def counting_queue(file_path):
+        queued.append(file_path)
+        return queue_next_track(file_path)
+    
+    monkeypatch.setattr(app.engine, "queue_next_track", counting_queue)
+    app.controller.set_gapless(True)
+    app.controller.play_track_at_index(0)
+    assert queued == [paths[1]]
+    
+    # 新的一批曲目加入末尾，下一首不变
+    app.controller.add_tracks(paths[3:])
+    _wait_for_tracks(app, FILES)
+    assert queued == [paths[1]]
+    assert app.engine.get_next_track() == paths[1]
+    
+    # 切换到单曲循环，下一首变成当前曲目
+    app.controller.set_play_mode(PlaybackMode.SINGLE_REPEAT)
+    assert queued == [paths[1], paths[0]]
+    assert app.engine.get_next_track() == paths[0]
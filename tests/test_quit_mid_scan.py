@@ -0,0 +1,64 @@
+"""退出时仍在后台读取元数据的文件也要保存到播放列表"""
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+FILES = 300
+PARSE_DELAY = 0.005  # 放慢解析，保证退出时扫描还没结束
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """使用临时配置目录的播放器"""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    from music_player.main import MusicPlayerApp
+    from music_player.models.metadata_reader import MetadataReader
+    
+    parse = MetadataReader.parse
+    
+    def slow_parse(self, file_path):
+        time.sleep(PARSE_DELAY)
+        return parse(self, file_path)
+    
+    monkeypatch.setattr(MetadataReader, "parse", slow_parse)
+    return MusicPlayerApp()
+
+
+def _make_files(directory) -> list:
+    """生成 FILES 个短 WAV 文件"""
+    template = os.path.join(directory, "template.wav")
+    sf.write(template, np.zeros((4410, 2), dtype=np.float32), 44100)
+    paths = []
+    for index in range(FILES):
+        path = os.path.join(directory, f"{index:04d}.wav")
+        shutil.copyfile(template, path)
+        paths.append(path)
+    return paths
+
+
+def test_quit_mid_scan_keeps_undelivered_paths(app, tmp_path):
+    paths = _make_files(tmp_path)
+    app.controller.add_tracks(paths)
+    
+    # 等第一批曲目加入播放列表，在扫描结束之前退出
+    deadline = time.monotonic() + 30
+    while app.playlist_manager.get_track_count() == 0 and time.monotonic() < deadline:
+        app.app.processEvents()
+        time.sleep(0.001)
+    delivered = app.playlist_manager.get_track_count()
+    assert 0 < delivered < FILES
+    assert app.controller.scanner.is_scanning()
+    
+    app._quit_application()
+    
+    with open(app.config_manager.config_file, encoding="utf-8") as f:
+        saved = json.load(f)["playlist"]
+    assert saved == paths